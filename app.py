@@ -27,33 +27,53 @@
 
 import sys
 from multiprocessing import freeze_support
-import multiprocessing
 
-from PySide6.QtGui import QFont, QPalette
-from PySide6.QtWidgets import QApplication, QStyleFactory
-from loguru import logger
 
-from src.main_window import MainWindow
-from src.util.app_init_util import AppInitUtil
-from src.util.common_util import CommonUtil
-from src.const.fs_constants import FsConstants
-import  os
+def main():
+    """
+    只在主进程执行：spawn/forkserver 启动的子进程会以 __mp_main__ 重新导入本文件，
+    所以性能分析、日志输出和界面模块都不放在模块顶层，子进程只导入任务需要的模块
+    """
+    from src.util.startup_profiler import StartupProfiler
 
+    # 启动性能分析，需在导入其他模块之前开启，才能统计到导入耗时
+    profiler = StartupProfiler.from_environment()
 
-# 配置 loguru 日志输出（可选）
-logger.add(f"{CommonUtil.get_external_path()}/error.log", rotation="10 MB", retention="10 days", level="ERROR")
+    from loguru import logger
 
-@logger.catch
-def main():
-    app = QApplication(sys.argv)
+    from src.util.common_util import CommonUtil
+    from src.util.log_sink import LogSink
+
+    # 配置 loguru 日志输出（可选）
+    logger.add(f"{CommonUtil.get_external_path()}/error.log", rotation="10 MB", retention="10 days", level="ERROR")
+    # 日志窗口的缓冲，窗口按需创建，打开时回放之前的日志
+    logger.add(LogSink(), level="INFO")
+    logger.catch(run)(profiler)
+
+
+def run(profiler):
+    from PySide6.QtCore import QTimer
+    from PySide6.QtGui import QFont
+    from PySide6.QtWidgets import QApplication, QStyleFactory
+
+    from src.main_window import MainWindow
+    from src.util.app_init_util import AppInitUtil
+    from src.util.worker_pool import WorkerPool
+    from src.const.fs_constants import FsConstants
+
+    profiler.mark("imports")
+    with profiler.phase("QApplication"):
+        app = QApplication(sys.argv)
 
 
     # 初始化配置文件
-    AppInitUtil.write_init_file()
+    with profiler.phase("write_init_file"):
+        AppInitUtil.write_init_file()
 
 
     # 加载样式表文件
-    AppInitUtil.load_external_stylesheet(app)
+    with profiler.phase("load_external_stylesheet"):
+        AppInitUtil.load_external_stylesheet(app)
 
 
     # Qt界面风格
@@ -63,15 +83,27 @@ def main():
     app.setStyle(QStyleFactory.create("Fusion"))
 
     # 加载外部字体
-    font_family = AppInitUtil.load_external_font()
+    with profiler.phase("load_external_font"):
+        font_family = AppInitUtil.load_external_font()
     if font_family:
         app.setFont(QFont(font_family))
 
-    window = MainWindow()
-    window.show()
+    with profiler.phase("MainWindow"):
+        window = MainWindow()
+    with profiler.phase("show"):
+        window.show()
+
+    # 首次绘制后在后台启动进程池并预加载图像库，第一次批量处理不用等待进程启动
+    QTimer.singleShot(FsConstants.WORKER_POOL_WARMUP_DELAY, WorkerPool().warm_up)
+    app.aboutToQuit.connect(WorkerPool().shutdown)
+
+    # 事件循环处理完首次绘制后输出启动耗时
+    if profiler.enabled:
+        QTimer.singleShot(0, lambda: profiler.finish(app))
     sys.exit(app.exec())
 
 
 if __name__ == '__main__':
-
+    # 打包后的程序用 spawn 启动子进程时，子进程在这里执行任务后退出，不会再启动界面
+    freeze_support()
     main()
@@ -0,0 +1,224 @@
+"""
+图片处理基准测试：生成不同尺寸、带/不带透明通道的 JPEG/PNG 合成图片，
+通过各工具的核心函数测量加水印、压缩、缩放、旋转、裁剪的吞吐量。
+
+用法：
+    python benchmarks/image_benchmark.py -o result.json
+    python benchmarks/image_benchmark.py --save-baseline benchmarks/baseline.json
+    python benchmarks/image_benchmark.py --baseline benchmarks/baseline.json --threshold 0.15
+
+对比基线时，吞吐量低于基线 (1 - threshold) 的用例视为性能回退，脚本以退出码 1 结束。
+基线与机器相关，需要在同一台机器上生成后再对比。
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+import numpy as np
+from PIL import Image
+from PySide6.QtGui import QImage
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from src.batch_watermark import process_single_image
+from src.image_compressor import encode_image
+from src.image_editor import crop_region
+from src.image_resize import resize_qimage
+from src.image_rotate import rotate_qimage
+
+# (宽, 高)
+SIZES = [(640, 480), (1920, 1080), (4000, 3000)]
+# (格式, 是否带透明通道)，JPEG 不支持透明通道
+VARIANTS = [("jpg", False), ("png", False), ("png", True)]
+
+
+def generate_image(width, height, alpha, seed=0):
+    """生成带渐变和噪声的合成图片，接近真实照片的压缩难度"""
+    rng = np.random.default_rng(seed)
+    x = np.linspace(0, 255, width, dtype=np.float32)
+    y = np.linspace(0, 255, height, dtype=np.float32)[:, None]
+    base = np.stack([np.broadcast_to(x, (height, width)), np.broadcast_to(y, (height, width)),
+                     np.broadcast_to((x + y) / 2, (height, width))], axis=-1)
+    noise = rng.normal(0, 12, (height, width, 3)).astype(np.float32)
+    pixels = np.clip(base + noise, 0, 255).astype(np.uint8)
+    if alpha:
+        alpha_channel = np.broadcast_to(np.linspace(64, 255, width, dtype=np.uint8), (height, width))
+        pixels = np.dstack([pixels, alpha_channel])
+        return Image.fromarray(pixels, "RGBA")
+    return Image.fromarray(pixels, "RGB")
+
+
+def generate_dataset(directory, count, sizes):
+    """按尺寸和格式生成测试图片，返回 {数据集名称: [文件路径]}"""
+    datasets = {}
+    for width, height in sizes:
+        for extension, alpha in VARIANTS:
+            name = f"{extension}/{width}x{height}/{'rgba' if alpha else 'rgb'}"
+            paths = []
+            for index in range(count):
+                path = os.path.join(directory, f"{extension}_{width}x{height}_{int(alpha)}_{index}.{extension}")
+                generate_image(width, height, alpha, seed=index).save(path)
+                paths.append(path)
+            datasets[name] = paths
+    return datasets
+
+
+def watermark_case(path, output_folder):
+    watermark = Image.new("RGBA", (200, 80), (255, 255, 255, 160))
+    process_single_image(path, watermark, "右下角", 60, 100, output_folder)
+
+
+def compress_case(path, output_folder):
+    image = cv2.imread(path, cv2.IMREAD_UNCHANGED)
+    success, buffer = encode_image(image, ".jpg" if image.shape[-1] == 3 else ".png", 50)
+    buffer.tofile(os.path.join(output_folder, os.path.basename(path)))
+
+
+def resize_case(path, output_folder):
+    resize_qimage(QImage(path), 0.5).save(os.path.join(output_folder, os.path.basename(path)))
+
+
+def rotate_case(path, output_folder):
+    rotate_qimage(QImage(path), 90).save(os.path.join(output_folder, os.path.basename(path)))
+
+
+def crop_case(path, output_folder):
+    image = cv2.imread(path, cv2.IMREAD_UNCHANGED)
+    height, width = image.shape[:2]
+    cropped = crop_region(image, width // 4, height // 4, width * 3 // 4, height * 3 // 4)
+    cv2.imwrite(os.path.join(output_folder, os.path.basename(path)), cropped)
+
+
+CASES = {
+    "watermark": watermark_case,
+    "compress": compress_case,
+    "resize": resize_case,
+    "rotate": rotate_case,
+    "crop": crop_case,
+}
+
+
+def warm_up(_):
+    """进程池预热：让每个进程提前完成模块导入"""
+    return os.getpid()
+
+
+def run_case(function, paths, output_folder, executor):
+    """单线程（executor 为 None）或进程池模式处理一组图片，返回耗时（秒）"""
+    start = time.perf_counter()
+    if executor is None:
+        for path in paths:
+            function(path, output_folder)
+    else:
+        list(executor.map(function, paths, [output_folder] * len(paths)))
+    return time.perf_counter() - start
+
+
+def run_benchmark(datasets, output_folder, cases, workers, repeat):
+    # Qt 加载插件后 fork 子进程可能死锁，统一用 spawn；进程池复用并预热，不把启动耗时计入结果
+    executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+    try:
+        list(executor.map(warm_up, range(workers)))
+        return run_cases(datasets, output_folder, cases, workers, repeat, executor)
+    finally:
+        executor.shutdown()
+
+
+def run_cases(datasets, output_folder, cases, workers, repeat, executor):
+    results = {}
+    for case_name in cases:
+        function = CASES[case_name]
+        for dataset_name, paths in datasets.items():
+            for mode, mode_workers, mode_executor in (("single", 1, None), ("pool", workers, executor)):
+                # 取多次运行中最快的一次，减少系统抖动的影响
+                seconds = min(run_case(function, paths, output_folder, mode_executor) for _ in range(repeat))
+                width, height = map(int, dataset_name.split("/")[1].split("x"))
+                key = f"{case_name}/{dataset_name}/{mode}"
+                results[key] = {
+                    "files": len(paths),
+                    "workers": mode_workers,
+                    "seconds": seconds,
+                    "images_per_sec": len(paths) / seconds,
+                    "mpix_per_sec": len(paths) * width * height / 1e6 / seconds,
+                }
+                print(f"{key}: {results[key]['images_per_sec']:.2f} 张/秒", file=sys.stderr)
+    return results
+
+
+def compare_with_baseline(results, baseline, threshold):
+    """返回吞吐量低于基线 (1 - threshold) 的用例"""
+    regressions = []
+    for key, result in results.items():
+        if key not in baseline:
+            continue
+        expected = baseline[key]["images_per_sec"]
+        actual = result["images_per_sec"]
+        if actual < expected * (1 - threshold):
+            regressions.append({"case": key, "baseline": expected, "current": actual,
+                                "change": actual / expected - 1})
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FSBestPNG 图片处理基准测试")
+    parser.add_argument("-n", "--count", type=int, default=4, help="每种尺寸/格式生成的图片数量")
+    parser.add_argument("--cases", nargs="+", choices=list(CASES), default=list(CASES), help="要测试的操作")
+    parser.add_argument("--sizes", nargs="+", default=[f"{width}x{height}" for width, height in SIZES],
+                        help="图片尺寸，如 1920x1080")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="进程池模式的进程数")
+    parser.add_argument("--repeat", type=int, default=3, help="每个用例重复次数，取最快一次")
+    parser.add_argument("-o", "--output", help="结果 JSON 文件，不指定则输出到标准输出")
+    parser.add_argument("--baseline", help="与之对比的基线 JSON 文件")
+    parser.add_argument("--save-baseline", help="把本次结果保存为基线")
+    parser.add_argument("--threshold", type=float, default=0.15, help="允许的吞吐量下降比例")
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="fsbestpng_bench_")
+    try:
+        input_folder = os.path.join(work_dir, "input")
+        output_folder = os.path.join(work_dir, "output")
+        os.makedirs(input_folder)
+        os.makedirs(output_folder)
+        sizes = [tuple(int(value) for value in size.split("x")) for size in args.sizes]
+        datasets = generate_dataset(input_folder, args.count, sizes)
+        results = run_benchmark(datasets, output_folder, args.cases, args.workers, args.repeat)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    report = {
+        "platform": sys.platform,
+        "cpu_count": os.cpu_count(),
+        "count": args.count,
+        "results": results,
+    }
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as file:
+            regressions = compare_with_baseline(results, json.load(file)["results"], args.threshold)
+        report["regressions"] = regressions
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
+
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(text)
+    else:
+        print(text)
+
+    for regression in regressions:
+        print(f"性能回退: {regression['case']} {regression['change']:+.1%}", file=sys.stderr)
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+NumPy -> QImage/QPixmap 转换微基准：对比各工具页原先手写的转换方式和 QImageUtil 的零拷贝包装。
+
+用法：
+    python benchmarks/qimage_benchmark.py
+    python benchmarks/qimage_benchmark.py --sizes 1920x1080 6000x4000 -o result.json
+
+每个用例记录耗时，以及 tracemalloc 统计到的额外内存峰值（numpy 分配的中间拷贝）；
+Qt 内部分配的内存不经过 Python 分配器，不计入峰值，只从耗时上体现。
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+from PySide6.QtGui import QImage, QPixmap
+from PySide6.QtWidgets import QApplication
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from src.util.qimage_util import QImageUtil
+
+SIZES = [(640, 480), (1920, 1080), (6000, 4000)]
+
+
+def legacy_compressor_bgr(image):
+    """ImageCompressor.display_image 原先的做法：cvtColor 复制一份 RGB 再包装"""
+    image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+    height, width, channels = image_rgb.shape
+    return QPixmap.fromImage(QImage(image_rgb.data, width, height, channels * width, QImage.Format.Format_RGB888))
+
+
+def legacy_compressor_bgra(image):
+    image_rgba = cv2.cvtColor(image, cv2.COLOR_BGRA2RGBA)
+    height, width, channels = image_rgba.shape
+    return QPixmap.fromImage(QImage(image_rgba.data, width, height, channels * width, QImage.Format.Format_RGBA8888))
+
+
+def legacy_editor(image):
+    """ImageEditor.display_image 原先的做法：ascontiguousarray 后 rgbSwapped 再复制一份"""
+    contiguous_image = np.ascontiguousarray(image)
+    height, width, _ = contiguous_image.shape
+    q_image = QImage(contiguous_image.data, width, height, 3 * width, QImage.Format.Format_RGB888).rgbSwapped()
+    return QPixmap.fromImage(q_image)
+
+
+def bridge(image):
+    return QImageUtil.to_pixmap(image)
+
+
+def measure(function, image, repeat):
+    """返回 (最快一次耗时, numpy 额外内存峰值)"""
+    function(image)
+    seconds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(image)
+        seconds.append(time.perf_counter() - start)
+    tracemalloc.start()
+    function(image)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return min(seconds), peak
+
+
+def make_cases(width, height):
+    rng = np.random.default_rng(0)
+    bgr = rng.integers(0, 256, (height, width, 3), dtype=np.uint8)
+    bgra = rng.integers(0, 256, (height, width, 4), dtype=np.uint8)
+    # 裁剪得到的非连续视图（ImageEditor 裁剪后显示的情况）
+    cropped = bgr[height // 8: height * 7 // 8, width // 8: width * 7 // 8]
+    return [
+        ("bgr", bgr, legacy_compressor_bgr),
+        ("bgra", bgra, legacy_compressor_bgra),
+        ("crop", cropped, legacy_editor),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="NumPy -> QImage 转换微基准")
+    parser.add_argument("--sizes", nargs="+", default=[f"{width}x{height}" for width, height in SIZES],
+                        help="图片尺寸，如 1920x1080")
+    parser.add_argument("--repeat", type=int, default=5, help="每个用例重复次数，取最快一次")
+    parser.add_argument("-o", "--output", help="结果 JSON 文件，不指定则输出到标准输出")
+    args = parser.parse_args()
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    results = {}
+    for size in args.sizes:
+        width, height = (int(value) for value in size.split("x"))
+        for name, image, legacy in make_cases(width, height):
+            legacy_seconds, legacy_peak = measure(legacy, image, args.repeat)
+            bridge_seconds, bridge_peak = measure(bridge, image, args.repeat)
+            key = f"{name}/{width}x{height}"
+            results[key] = {
+                "pixel_bytes": image.nbytes,
+                "legacy_seconds": legacy_seconds,
+                "bridge_seconds": bridge_seconds,
+                "speedup": legacy_seconds / bridge_seconds,
+                "legacy_peak_bytes": legacy_peak,
+                "bridge_peak_bytes": bridge_peak,
+            }
+            print(f"{key}: {legacy_seconds * 1000:.1f} ms -> {bridge_seconds * 1000:.1f} ms, "
+                  f"额外内存 {legacy_peak / 1024 / 1024:.1f} MB -> {bridge_peak / 1024 / 1024:.1f} MB",
+                  file=sys.stderr)
+
+    text = json.dumps({"platform": sys.platform, "results": results}, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(text)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
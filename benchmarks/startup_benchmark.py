@@ -0,0 +1,108 @@
+"""
+启动耗时基准测试：在 Qt offscreen 平台下多次启动 app.main，统计从进程启动到首次绘制的各阶段耗时。
+
+用法：
+    python benchmarks/startup_benchmark.py -n 10 -o startup.json
+    python benchmarks/startup_benchmark.py -n 10 --exe dist/FSBestPNG.exe   # 打包后的程序
+
+打包后的程序同样支持 FSBESTPNG_* 环境变量，所以源码和 Nuitka/PyInstaller 产物可以用同一套脚本对比。
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from src.const.fs_constants import FsConstants
+
+
+def run_once(command, timeout):
+    """启动一次应用，返回子进程写出的分析结果和总耗时"""
+    fd, output_path = tempfile.mkstemp(suffix=".json")
+    os.close(fd)
+    env = dict(os.environ)
+    env.update({
+        "QT_QPA_PLATFORM": "offscreen",
+        FsConstants.PROFILE_STARTUP_ENV: "1",
+        FsConstants.PROFILE_OUTPUT_ENV: output_path,
+        FsConstants.PROFILE_EXIT_AFTER_SHOW_ENV: "1",
+    })
+    try:
+        env[FsConstants.PROFILE_LAUNCH_TIME_ENV] = repr(time.time())
+        start = time.perf_counter()
+        subprocess.run(command, cwd=ROOT_DIR, env=env, timeout=timeout,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        wall_time = time.perf_counter() - start
+        with open(output_path, "r", encoding="utf-8") as file:
+            result = json.load(file)
+    finally:
+        os.remove(output_path)
+    result["process_wall_time"] = wall_time
+    return result
+
+
+def summarize(values):
+    return {
+        "min": min(values),
+        "median": statistics.median(values),
+        "mean": statistics.mean(values),
+        "max": max(values),
+    }
+
+
+def aggregate(runs):
+    """按阶段汇总多次运行的结果"""
+    phase_durations = {}
+    phase_since_launch = {}
+    for run in runs:
+        for phase in run["phases"]:
+            phase_durations.setdefault(phase["name"], []).append(phase["duration"])
+            if phase["since_launch"] is not None:
+                phase_since_launch.setdefault(phase["name"], []).append(phase["since_launch"])
+    # 只统计顶层导入，嵌套导入已计入父模块的累计耗时
+    import_totals = [sum(item["cumulative"] for item in run["imports"] if item["depth"] == 0) for run in runs]
+    return {
+        "process_wall_time": summarize([run["process_wall_time"] for run in runs]),
+        "import_time": summarize(import_totals),
+        "phase_duration": {name: summarize(values) for name, values in phase_durations.items()},
+        "phase_since_launch": {name: summarize(values) for name, values in phase_since_launch.items()},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FSBestPNG 启动耗时基准测试")
+    parser.add_argument("-n", "--iterations", type=int, default=5, help="统计的运行次数")
+    parser.add_argument("--warmup", type=int, default=1, help="预热次数，不计入结果")
+    parser.add_argument("--exe", help="打包后的可执行文件，不指定则用当前解释器运行 app.py")
+    parser.add_argument("--timeout", type=float, default=60, help="单次运行超时（秒）")
+    parser.add_argument("-o", "--output", help="结果 JSON 文件，不指定则输出到标准输出")
+    args = parser.parse_args()
+
+    command = [args.exe] if args.exe else [sys.executable, os.path.join(ROOT_DIR, "app.py")]
+    for _ in range(args.warmup):
+        run_once(command, args.timeout)
+    runs = [run_once(command, args.timeout) for _ in range(args.iterations)]
+
+    result = {
+        "command": command,
+        "iterations": args.iterations,
+        "platform": sys.platform,
+        "summary": aggregate(runs),
+        "runs": runs,
+    }
+    text = json.dumps(result, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(text)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+import os
+
+from PySide6.QtCore import Qt
+from PySide6.QtGui import QIcon, QColor
+from PySide6.QtWidgets import (
+    QApplication, QWidget, QLabel, QLineEdit, QPushButton, QVBoxLayout, QHBoxLayout, QFileDialog, QComboBox,
+    QSpinBox, QCheckBox, QColorDialog, QTableWidget, QTableWidgetItem, QHeaderView
+)
+from fs_base.message_util import MessageUtil
+from loguru import logger
+
+from src.const.fs_constants import FsConstants
+from src.util.common_util import CommonUtil
+from src.util.convert_util import ConvertUtil
+from src.util.job_scheduler import Job, JobScheduler, collect_paths
+
+
+def format_size(size):
+    if size >= 1024 * 1024:
+        return f"{size / 1024 / 1024:.2f} MB"
+    return f"{size / 1024:.1f} KB"
+
+
+class BatchConvertApp(QWidget):
+    def __init__(self):
+        super().__init__()
+        self.setWindowTitle("批量格式转换")
+        self.setWindowIcon(QIcon(CommonUtil.get_ico_full_path()))
+
+        self.active_jobs = 0  # 本页提交、尚未结束的任务数
+        self.background = QColor(FsConstants.CONVERT_BACKGROUND_DEFAULT)
+
+        # 输入、输出文件夹
+        self.input_edit = QLineEdit()
+        self.input_button = QPushButton("选择")
+        self.input_button.clicked.connect(lambda: self.select_folder(self.input_edit, "选择输入文件夹"))
+        self.output_edit = QLineEdit()
+        self.output_button = QPushButton("选择")
+        self.output_button.clicked.connect(lambda: self.select_folder(self.output_edit, "选择输出文件夹"))
+
+        # 目标格式和编码参数
+        self.format_combo = QComboBox()
+        self.format_combo.addItems(FsConstants.CONVERT_FORMATS)
+        self.format_combo.currentTextChanged.connect(self.update_options)
+        self.lossless_checkbox = QCheckBox("无损")
+        self.lossless_checkbox.toggled.connect(self.update_options)
+        self.quality_spinbox = QSpinBox()
+        self.quality_spinbox.setRange(1, 100)
+        self.quality_spinbox.setValue(FsConstants.CONVERT_QUALITY_DEFAULT)
+
+        # 透明通道铺底色、元数据、体积
+        self.background_button = QPushButton()
+        self.background_button.clicked.connect(self.select_background)
+        self.update_background_button()
+        self.metadata_checkbox = QCheckBox("保留 ICC/EXIF")
+        self.metadata_checkbox.setChecked(True)
+        self.skip_larger_checkbox = QCheckBox("跳过比原图大的输出")
+        self.skip_larger_checkbox.setChecked(True)
+
+        # 逐个文件的体积对比
+        self.result_table = QTableWidget(0, 4)
+        self.result_table.setHorizontalHeaderLabels(["文件", "原大小", "新大小", "结果"])
+        self.result_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        self.result_table.verticalHeader().hide()
+        self.result_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.summary_label = QLabel()
+
+        self.process_button = QPushButton("开始转换")
+        self.process_button.clicked.connect(self.start_convert)
+
+        layout = QVBoxLayout()
+        for title, edit, button in (("输入文件夹路径:", self.input_edit, self.input_button),
+                                    ("输出文件夹路径:", self.output_edit, self.output_button)):
+            row = QHBoxLayout()
+            row.addWidget(QLabel(title))
+            row.addWidget(edit)
+            row.addWidget(button)
+            layout.addLayout(row)
+
+        format_layout = QHBoxLayout()
+        format_layout.addWidget(QLabel("目标格式:"))
+        format_layout.addWidget(self.format_combo)
+        format_layout.addWidget(self.lossless_checkbox)
+        format_layout.addWidget(QLabel("质量:"))
+        format_layout.addWidget(self.quality_spinbox)
+        layout.addLayout(format_layout)
+
+        option_layout = QHBoxLayout()
+        option_layout.addWidget(QLabel("透明底色:"))
+        option_layout.addWidget(self.background_button)
+        option_layout.addWidget(self.metadata_checkbox)
+        option_layout.addWidget(self.skip_larger_checkbox)
+        layout.addLayout(option_layout)
+
+        layout.addWidget(self.process_button)
+        layout.addWidget(self.result_table)
+        layout.addWidget(self.summary_label)
+        self.setLayout(layout)
+        self.update_options()
+
+    def select_folder(self, edit, title):
+        folder = QFileDialog.getExistingDirectory(self, title)
+        if folder:
+            edit.setText(folder)
+
+    def select_background(self):
+        color = QColorDialog.getColor(self.background, self, "透明区域底色")
+        if color.isValid():
+            self.background = color
+            self.update_background_button()
+
+    def update_background_button(self):
+        self.background_button.setText(self.background.name().upper())
+        self.background_button.setStyleSheet(f"background-color: {self.background.name()};")
+
+    def update_options(self):
+        """按格式启用选项：PNG/BMP 只有无损，JPEG 只有有损，WebP/TIFF 可选"""
+        image_format = self.format_combo.currentText()
+        selectable = image_format in (FsConstants.CONVERT_FORMAT_WEBP, FsConstants.CONVERT_FORMAT_TIFF)
+        lossless = image_format in (FsConstants.CONVERT_FORMAT_PNG, FsConstants.CONVERT_FORMAT_BMP) or \
+            (selectable and self.lossless_checkbox.isChecked())
+        self.lossless_checkbox.setEnabled(selectable)
+        if not selectable:
+            self.lossless_checkbox.blockSignals(True)
+            self.lossless_checkbox.setChecked(lossless)
+            self.lossless_checkbox.blockSignals(False)
+        self.quality_spinbox.setEnabled(not lossless)
+        self.background_button.setEnabled(image_format in ConvertUtil.OPAQUE_FORMATS)
+        self.metadata_checkbox.setEnabled(image_format != FsConstants.CONVERT_FORMAT_BMP)
+
+    def get_options(self):
+        return {
+            "format": self.format_combo.currentText(),
+            "quality": self.quality_spinbox.value(),
+            "lossless": self.lossless_checkbox.isChecked(),
+            "background": self.background.name(),
+            "keep_metadata": self.metadata_checkbox.isChecked(),
+            "skip_larger": self.skip_larger_checkbox.isChecked(),
+        }
+
+    def start_convert(self):
+        input_folder = self.input_edit.text()
+        output_folder = self.output_edit.text()
+        if not input_folder or not output_folder:
+            MessageUtil.show_warning_message("请填写所有路径！")
+            return
+        self.create_jobs([input_folder])
+
+    def create_jobs(self, paths):
+        """
+        把文件和文件夹作为一个转换任务提交到全局调度器，拖放到窗口时也由这里处理
+        :return: 提交的任务列表
+        """
+        output_folder = self.output_edit.text()
+        if not output_folder:
+            MessageUtil.show_warning_message("请先选择输出文件夹！")
+            return []
+        paths = collect_paths(paths, FsConstants.CONVERT_INPUT_EXTENSIONS)
+        if not paths:
+            MessageUtil.show_warning_message("没有可转换的图片！")
+            return []
+        options = self.get_options()
+        job = Job(f"格式转换 -> {options['format']}（{len(paths)} 个文件）",
+                  lambda job: ConvertUtil.convert_folder(paths, output_folder, options, workers=job.workers,
+                                                         on_result=job.report_item, stopped=job.is_cancelled),
+                  max_workers=min(os.cpu_count() or 1, FsConstants.CONVERT_MAX_WORKERS))
+        if not self.active_jobs:
+            self.result_table.setRowCount(0)
+        self.active_jobs += 1
+        job.item_done.connect(self.on_file_done)
+        job.finished.connect(lambda results, target=job: self.on_completed(target, results))
+        self.summary_label.setText("已提交任务，可在“任务”页查看进度或取消")
+        return [JobScheduler().submit(job)]
+
+    def on_file_done(self, result):
+        """每完成一个文件追加一行体积对比"""
+        if result["error"]:
+            status = f"失败: {result['error']}"
+        elif result["skipped"]:
+            status = "跳过（输出更大）"
+        else:
+            status = f"{result['size_out'] / result['size_in']:.0%}" if result["size_in"] else "完成"
+        row = self.result_table.rowCount()
+        self.result_table.insertRow(row)
+        for column, text in enumerate((os.path.basename(result["path"]), format_size(result["size_in"]),
+                                       format_size(result["size_out"]), status)):
+            item = QTableWidgetItem(text)
+            if column in (1, 2):
+                item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+            self.result_table.setItem(row, column, item)
+        self.result_table.scrollToBottom()
+
+    def on_completed(self, job, results):
+        self.active_jobs -= 1
+        if job.error:
+            MessageUtil.show_error_message(f"转换过程中出现错误：\n{job.error}")
+            return
+        if results is None:
+            return
+        written = [result for result in results if not result["error"] and not result["skipped"]]
+        skipped = sum(1 for result in results if result["skipped"])
+        failed = sum(1 for result in results if result["error"])
+        size_in = sum(result["size_in"] for result in written)
+        size_out = sum(result["size_out"] for result in written)
+        text = f"转换 {len(written)} 个，跳过 {skipped} 个，失败 {failed} 个"
+        if size_in:
+            text += f"；已转换文件 {format_size(size_in)} -> {format_size(size_out)}" \
+                    f"（{size_out / size_in:.0%}）"
+        self.summary_label.setText(text)
+        logger.info(f"批量格式转换完成：{text}")
+
+
+if __name__ == "__main__":
+    app = QApplication([])
+    window = BatchConvertApp()
+    window.show()
+    app.exec()
@@ -0,0 +1,143 @@
+import os
+
+from PySide6.QtCore import Qt
+from PySide6.QtGui import QIcon
+from PySide6.QtWidgets import (
+    QApplication, QWidget, QLabel, QLineEdit, QPushButton, QVBoxLayout, QHBoxLayout, QFileDialog, QCheckBox,
+    QTableWidget, QTableWidgetItem, QHeaderView
+)
+from fs_base.message_util import MessageUtil
+from loguru import logger
+
+from src.batch_convert import format_size
+from src.const.fs_constants import FsConstants
+from src.util.common_util import CommonUtil
+from src.util.job_scheduler import Job, JobScheduler, collect_paths
+from src.util.metadata_strip_util import MetadataStripUtil
+
+
+class BatchStripApp(QWidget):
+    def __init__(self):
+        super().__init__()
+        self.setWindowTitle("批量去除元数据")
+        self.setWindowIcon(QIcon(CommonUtil.get_ico_full_path()))
+
+        self.active_jobs = 0  # 本页提交、尚未结束的任务数
+
+        # 输入、输出文件夹
+        self.input_edit = QLineEdit()
+        self.input_button = QPushButton("选择")
+        self.input_button.clicked.connect(lambda: self.select_folder(self.input_edit, "选择输入文件夹"))
+        self.output_edit = QLineEdit()
+        self.output_button = QPushButton("选择")
+        self.output_button.clicked.connect(lambda: self.select_folder(self.output_edit, "选择输出文件夹"))
+
+        self.icc_checkbox = QCheckBox("保留 ICC 色彩配置")
+        self.icc_checkbox.setChecked(True)
+        self.hint_label = QLabel("只改写 PNG/JPEG 的文件结构，不重新编码像素；JPEG 去除 EXIF 时保留方向信息")
+        self.hint_label.setWordWrap(True)
+
+        # 逐个文件的体积对比和删除的块
+        self.result_table = QTableWidget(0, 4)
+        self.result_table.setHorizontalHeaderLabels(["文件", "原大小", "新大小", "删除"])
+        self.result_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        self.result_table.verticalHeader().hide()
+        self.result_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.summary_label = QLabel()
+
+        self.process_button = QPushButton("开始处理")
+        self.process_button.clicked.connect(self.start_strip)
+
+        layout = QVBoxLayout()
+        for title, edit, button in (("输入文件夹路径:", self.input_edit, self.input_button),
+                                    ("输出文件夹路径:", self.output_edit, self.output_button)):
+            row = QHBoxLayout()
+            row.addWidget(QLabel(title))
+            row.addWidget(edit)
+            row.addWidget(button)
+            layout.addLayout(row)
+        layout.addWidget(self.icc_checkbox)
+        layout.addWidget(self.hint_label)
+        layout.addWidget(self.process_button)
+        layout.addWidget(self.result_table)
+        layout.addWidget(self.summary_label)
+        self.setLayout(layout)
+
+    def select_folder(self, edit, title):
+        folder = QFileDialog.getExistingDirectory(self, title)
+        if folder:
+            edit.setText(folder)
+
+    def start_strip(self):
+        input_folder = self.input_edit.text()
+        output_folder = self.output_edit.text()
+        if not input_folder or not output_folder:
+            MessageUtil.show_warning_message("请填写所有路径！")
+            return
+        self.create_jobs([input_folder])
+
+    def create_jobs(self, paths):
+        """
+        把文件和文件夹作为一个任务提交到全局调度器，拖放到窗口时也由这里处理
+        :return: 提交的任务列表
+        """
+        output_folder = self.output_edit.text()
+        if not output_folder:
+            MessageUtil.show_warning_message("请先选择输出文件夹！")
+            return []
+        paths = collect_paths(paths, FsConstants.METADATA_STRIP_EXTENSIONS)
+        if not paths:
+            MessageUtil.show_warning_message("没有可处理的 PNG/JPEG 图片！")
+            return []
+        keep_icc = self.icc_checkbox.isChecked()
+        job = Job(f"去除元数据（{len(paths)} 个文件）",
+                  lambda job: MetadataStripUtil.strip_folder(paths, output_folder, keep_icc, workers=job.workers,
+                                                             on_result=job.report_item, stopped=job.is_cancelled),
+                  max_workers=FsConstants.METADATA_STRIP_WORKERS)
+        if not self.active_jobs:
+            self.result_table.setRowCount(0)
+        self.active_jobs += 1
+        job.item_done.connect(self.on_file_done)
+        job.finished.connect(lambda results, target=job: self.on_completed(target, results))
+        self.summary_label.setText("已提交任务，可在“任务”页查看进度或取消")
+        return [JobScheduler().submit(job)]
+
+    def on_file_done(self, result):
+        """每完成一个文件追加一行"""
+        if result["error"]:
+            status = f"失败: {result['error']}"
+        else:
+            status = ", ".join(sorted(set(result["removed"]))) or "无"
+        row = self.result_table.rowCount()
+        self.result_table.insertRow(row)
+        for column, text in enumerate((os.path.basename(result["path"]), format_size(result["size_in"]),
+                                       format_size(result["size_out"]), status)):
+            item = QTableWidgetItem(text)
+            if column in (1, 2):
+                item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+            self.result_table.setItem(row, column, item)
+        self.result_table.scrollToBottom()
+
+    def on_completed(self, job, results):
+        self.active_jobs -= 1
+        if job.error:
+            MessageUtil.show_error_message(f"处理过程中出现错误：\n{job.error}")
+            return
+        if results is None:
+            return
+        written = [result for result in results if not result["error"]]
+        failed = len(results) - len(written)
+        size_in = sum(result["size_in"] for result in written)
+        size_out = sum(result["size_out"] for result in written)
+        text = f"处理 {len(written)} 个，失败 {failed} 个"
+        if size_in:
+            text += f"；{format_size(size_in)} -> {format_size(size_out)}，减少 {format_size(size_in - size_out)}"
+        self.summary_label.setText(text)
+        logger.info(f"批量去除元数据完成：{text}")
+
+
+if __name__ == "__main__":
+    app = QApplication([])
+    window = BatchStripApp()
+    window.show()
+    app.exec()
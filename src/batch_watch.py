@@ -0,0 +1,195 @@
+import os
+
+from PySide6.QtGui import QIcon
+from PySide6.QtWidgets import (
+    QApplication, QWidget, QLabel, QLineEdit, QPushButton, QVBoxLayout, QHBoxLayout, QFileDialog, QComboBox,
+    QSpinBox, QCheckBox, QListWidget
+)
+from fs_base.message_util import MessageUtil
+
+from src.const.fs_constants import FsConstants
+from src.util.common_util import CommonUtil
+from src.util.watch_folder import WatchFolderService, WatchPipeline
+
+
+class BatchWatchApp(QWidget):
+    """
+    监视文件夹：配置处理流程并启停监视，流程保存后下次启动自动恢复；
+    主窗口隐藏到托盘时仍在后台处理
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.setWindowTitle("监视文件夹")
+        self.setWindowIcon(QIcon(CommonUtil.get_ico_full_path()))
+        self.service = WatchFolderService()
+
+        # 输入、输出文件夹
+        self.input_edit = QLineEdit()
+        self.input_button = QPushButton("选择")
+        self.input_button.clicked.connect(lambda: self.select_folder(self.input_edit, "选择监视的文件夹"))
+        self.output_edit = QLineEdit()
+        self.output_button = QPushButton("选择")
+        self.output_button.clicked.connect(lambda: self.select_folder(self.output_edit, "选择输出文件夹"))
+
+        # 加水印
+        self.watermark_checkbox = QCheckBox("加水印")
+        self.watermark_edit = QLineEdit()
+        self.watermark_button = QPushButton("选择")
+        self.watermark_button.clicked.connect(self.select_watermark_file)
+        self.position_combo = QComboBox()
+        self.position_combo.addItems(["左上角", "右上角", "左下角", "右下角"])
+        self.transparency_spinbox = QSpinBox()
+        self.transparency_spinbox.setRange(0, 100)
+        self.scale_spinbox = QSpinBox()
+        self.scale_spinbox.setRange(10, 300)
+
+        # 转换/压缩
+        self.convert_checkbox = QCheckBox("转换/压缩")
+        self.format_combo = QComboBox()
+        self.format_combo.addItems(FsConstants.CONVERT_FORMATS)
+        self.quality_spinbox = QSpinBox()
+        self.quality_spinbox.setRange(1, 100)
+
+        # 去除元数据
+        self.strip_checkbox = QCheckBox("去除元数据")
+        self.icc_checkbox = QCheckBox("保留 ICC")
+
+        self.toggle_button = QPushButton()
+        self.toggle_button.clicked.connect(self.toggle_watch)
+        self.status_label = QLabel()
+        self.log_list = QListWidget()
+
+        layout = QVBoxLayout()
+        for title, edit, button in (("监视文件夹路径:", self.input_edit, self.input_button),
+                                    ("输出文件夹路径:", self.output_edit, self.output_button)):
+            row = QHBoxLayout()
+            row.addWidget(QLabel(title))
+            row.addWidget(edit)
+            row.addWidget(button)
+            layout.addLayout(row)
+
+        watermark_layout = QHBoxLayout()
+        watermark_layout.addWidget(self.watermark_checkbox)
+        watermark_layout.addWidget(self.watermark_edit)
+        watermark_layout.addWidget(self.watermark_button)
+        layout.addLayout(watermark_layout)
+        watermark_option_layout = QHBoxLayout()
+        watermark_option_layout.addWidget(QLabel("位置:"))
+        watermark_option_layout.addWidget(self.position_combo)
+        watermark_option_layout.addWidget(QLabel("透明度(%):"))
+        watermark_option_layout.addWidget(self.transparency_spinbox)
+        watermark_option_layout.addWidget(QLabel("缩放(%):"))
+        watermark_option_layout.addWidget(self.scale_spinbox)
+        layout.addLayout(watermark_option_layout)
+
+        convert_layout = QHBoxLayout()
+        convert_layout.addWidget(self.convert_checkbox)
+        convert_layout.addWidget(QLabel("格式:"))
+        convert_layout.addWidget(self.format_combo)
+        convert_layout.addWidget(QLabel("质量:"))
+        convert_layout.addWidget(self.quality_spinbox)
+        layout.addLayout(convert_layout)
+
+        strip_layout = QHBoxLayout()
+        strip_layout.addWidget(self.strip_checkbox)
+        strip_layout.addWidget(self.icc_checkbox)
+        strip_layout.addStretch()
+        layout.addLayout(strip_layout)
+
+        layout.addWidget(self.toggle_button)
+        layout.addWidget(self.status_label)
+        layout.addWidget(self.log_list)
+        self.setLayout(layout)
+
+        self.load_config(self.service.config)
+        self.service.state_changed.connect(self.on_state_changed)
+        self.service.batch_done.connect(self.on_batch_done)
+        self.on_state_changed(self.service.running)
+
+    def select_folder(self, edit, title):
+        folder = QFileDialog.getExistingDirectory(self, title)
+        if folder:
+            edit.setText(folder)
+
+    def select_watermark_file(self):
+        file, _ = QFileDialog.getOpenFileName(self, "选择水印文件", filter="Images (*.png *.jpg *.jpeg)")
+        if file:
+            self.watermark_edit.setText(file)
+
+    def load_config(self, config):
+        self.input_edit.setText(config["input"])
+        self.output_edit.setText(config["output"])
+        watermark = config["watermark"]
+        self.watermark_checkbox.setChecked(watermark["enabled"])
+        self.watermark_edit.setText(watermark["path"])
+        self.position_combo.setCurrentText(watermark["position"])
+        self.transparency_spinbox.setValue(watermark["transparency"])
+        self.scale_spinbox.setValue(watermark["scale"])
+        convert = config["convert"]
+        self.convert_checkbox.setChecked(convert["enabled"])
+        self.format_combo.setCurrentText(convert["format"])
+        self.quality_spinbox.setValue(convert["quality"])
+        self.strip_checkbox.setChecked(config["strip"]["enabled"])
+        self.icc_checkbox.setChecked(config["strip"]["keep_icc"])
+
+    def get_config(self):
+        config = WatchPipeline.load_config()
+        config["input"] = self.input_edit.text()
+        config["output"] = self.output_edit.text()
+        config["watermark"].update({
+            "enabled": self.watermark_checkbox.isChecked(),
+            "path": self.watermark_edit.text(),
+            "position": self.position_combo.currentText(),
+            "transparency": self.transparency_spinbox.value(),
+            "scale": self.scale_spinbox.value(),
+        })
+        config["convert"].update({
+            "enabled": self.convert_checkbox.isChecked(),
+            "format": self.format_combo.currentText(),
+            "quality": self.quality_spinbox.value(),
+        })
+        config["strip"].update({"enabled": self.strip_checkbox.isChecked(), "keep_icc": self.icc_checkbox.isChecked()})
+        return config
+
+    def toggle_watch(self):
+        """启停监视并保存配置，启用状态决定下次启动时是否自动监视"""
+        config = self.get_config()
+        config["enabled"] = not self.service.running
+        if config["enabled"]:
+            error = WatchPipeline.validate(config)
+            if error:
+                MessageUtil.show_warning_message(error)
+                return
+        WatchPipeline.save_config(config)
+        if config["enabled"]:
+            if not self.service.start(config):
+                MessageUtil.show_error_message("无法读取输入或输出文件夹，未开始监视！")
+        else:
+            self.service.stop()
+            self.service.config = config
+
+    def on_state_changed(self, running):
+        self.toggle_button.setText("停止监视" if running else "开始监视")
+        self.status_label.setText(f"正在监视: {self.service.config['input']}" if running else "未监视")
+        for widget in (self.input_edit, self.input_button, self.output_edit, self.output_button,
+                       self.watermark_checkbox, self.watermark_edit, self.watermark_button, self.position_combo,
+                       self.transparency_spinbox, self.scale_spinbox, self.convert_checkbox, self.format_combo,
+                       self.quality_spinbox, self.strip_checkbox, self.icc_checkbox):
+            widget.setEnabled(not running)
+
+    def on_batch_done(self, results):
+        for result in results:
+            name = os.path.basename(result["path"])
+            text = f"失败: {name} {result['error']}" if result["error"] else \
+                f"{name} -> {os.path.basename(result['output'])}"
+            self.log_list.insertItem(0, text)
+        while self.log_list.count() > FsConstants.WATCH_LOG_LINES:
+            self.log_list.takeItem(self.log_list.count() - 1)
+
+
+if __name__ == "__main__":
+    app = QApplication([])
+    window = BatchWatchApp()
+    window.show()
+    app.exec()
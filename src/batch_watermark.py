@@ -2,6 +2,7 @@ from PySide6.QtGui import QIcon
 from fs_base.message_util import MessageUtil
 from fs_base.widget import CustomProgressBar
 from loguru import logger
+import io
 import os
 from PIL import Image, ImageEnhance
 from PySide6.QtWidgets import (
@@ -10,52 +11,145 @@ from PySide6.QtWidgets import (
 )
 from PySide6.QtCore import Qt, QThread, Signal
 
+from src.const.fs_constants import FsConstants
+from src.util.admission_util import AdmissionController
 from src.util.common_util import CommonUtil
+from src.util.duplicate_util import DuplicateUtil
+from src.util.metrics_util import FileMetrics, JobMetrics
+from src.util.pipeline_util import StagedPipeline
+from src.util.tile_util import TileUtil
+from src.widget.thumbnail_grid import ThumbnailGrid
 
 
 
 def process_single_image(image_path, watermark, position, transparency, scale, output_folder):
+    """
+    给单张图片添加水印并保存为 PNG，并发调用时按内存预算排队，超出预算的大图分块处理
+    :return: FileMetrics 各阶段（读取、解码、合成、编码、写入）的耗时和字节数
+    """
+    metrics = FileMetrics(image_path)
     try:
-        image = Image.open(image_path).convert("RGBA")
+        with AdmissionController().admit(image_path) as ticket:
+            source = read_image(image_path, metrics, ticket.memory_budget)
+            output_path = os.path.join(output_folder, os.path.basename(image_path))
+            output_data = render_image(source, watermark, position, transparency, scale, output_path, metrics,
+                                       ticket.memory_budget)
+        write_image(output_path, output_data, metrics)
+    finally:
+        metrics.finish()
+    return metrics
+
+
+def read_image(image_path, metrics, memory_budget=None):
+    """
+    读取阶段：预算内整文件读入内存；超出预算的大图直接按路径解码，避免再多一份压缩数据的拷贝
+    :return: BytesIO 或文件路径
+    """
+    try:
+        with metrics.stage("read"):
+            source = image_path
+            if TileUtil.fits_in_budget(image_path, memory_budget):
+                with open(image_path, "rb") as file:
+                    source = io.BytesIO(file.read())
+        metrics.bytes_in = os.path.getsize(image_path)
+        return source
+    except Exception as e:
+        logger.error(f"{e}")
+        metrics.error = str(e)
+        raise e
 
-        # 缩放水印
-        original_size = watermark.size
-        scaled_size = (int(original_size[0] * scale / 100), int(original_size[1] * scale / 100))
-        watermark_resized = watermark.resize(scaled_size, Image.Resampling.LANCZOS)
 
-        # 设置透明度
-        alpha = watermark_resized.split()[3]
-        alpha = ImageEnhance.Brightness(alpha).enhance(transparency / 100.0)
-        watermark_resized.putalpha(alpha)
+def render_image(source, watermark, position, transparency, scale, output_path, metrics, memory_budget=None):
+    """
+    解码、合成、编码阶段
+    :return: 编码后的 PNG 字节；大图直接流式编码到 output_path，返回 None
+    """
+    frame = None
+    try:
+        with metrics.stage("decode"):
+            frame = TileUtil.open_frame(source, memory_budget)
+            if frame.image.mode not in ("RGB", "RGBA"):
+                converted = TileUtil.convert(frame, "RGBA", memory_budget)
+                frame.close()
+                frame = converted
+        metrics.pixel_bytes = TileUtil.estimate_frame_bytes(frame.image.size, frame.image.mode)
+
+        with metrics.stage("transform"):
+            add_watermark(frame.image, watermark, position, transparency, scale)
+
+        with metrics.stage("encode"):
+            if frame.mapped:
+                # 大图直接流式编码到文件，不在内存中保留整份输出
+                frame.image.save(output_path, 'PNG')
+                return None
+            buffer = io.BytesIO()
+            frame.image.save(buffer, 'PNG')
+            return buffer.getvalue()
+    except Exception as e:
+        logger.error(f"{e}")
+        metrics.error = str(e)
+        raise e
+    finally:
+        if frame is not None:
+            frame.close()
+
 
-        # 计算水印位置
-        position_cords = (0, 0)
-        image_width, image_height = image.size
-        watermark_width, watermark_height = watermark_resized.size
-        if position == "左上角":
-            position_cords = (0, 0)
-        elif position == "右上角":
-            position_cords = (image_width - watermark_width, 0)
-        elif position == "左下角":
-            position_cords = (0, image_height - watermark_height)
-        elif position == "右下角":
-            position_cords = (image_width - watermark_width, image_height - watermark_height)
-
-        # 添加水印
-        image.paste(watermark_resized, position_cords, mask=watermark_resized)
-        output_path = os.path.join(output_folder, os.path.basename(image_path))
-        image.save(output_path, 'PNG')
+def write_image(output_path, output_data, metrics):
+    """写入阶段，output_data 为 None 表示编码时已经写入"""
+    try:
+        if output_data is not None:
+            with metrics.stage("write"):
+                with open(output_path, "wb") as file:
+                    file.write(output_data)
+        metrics.bytes_out = os.path.getsize(output_path)
     except Exception as e:
         logger.error(f"{e}")
+        metrics.error = str(e)
         raise e
 
 
+def add_watermark(image, watermark, position, transparency, scale):
+    """在 RGB/RGBA 图片上原地叠加水印，只合成水印覆盖的区域"""
+    # 缩放水印
+    original_size = watermark.size
+    scaled_size = (int(original_size[0] * scale / 100), int(original_size[1] * scale / 100))
+    watermark_resized = watermark.resize(scaled_size, Image.Resampling.LANCZOS)
+
+    # 设置透明度
+    alpha = watermark_resized.split()[3]
+    alpha = ImageEnhance.Brightness(alpha).enhance(transparency / 100.0)
+    watermark_resized.putalpha(alpha)
+
+    # 计算水印位置
+    position_cords = (0, 0)
+    image_width, image_height = image.size
+    watermark_width, watermark_height = watermark_resized.size
+    if position == "左上角":
+        position_cords = (0, 0)
+    elif position == "右上角":
+        position_cords = (image_width - watermark_width, 0)
+    elif position == "左下角":
+        position_cords = (0, image_height - watermark_height)
+    elif position == "右下角":
+        position_cords = (image_width - watermark_width, image_height - watermark_height)
+
+    # 添加水印：取出水印区域按 RGBA 合成后贴回，不转换整张图片
+    x, y = position_cords
+    box = (x, y, x + watermark_width, y + watermark_height)
+    region = image.crop(box).convert("RGBA")
+    region.paste(watermark_resized, (0, 0), mask=watermark_resized)
+    image.paste(region.convert(image.mode), box)
+
+
 class WatermarkWorker(QThread):
     progress = Signal(int)
     completed = Signal()
     error = Signal(str)
+    metrics_ready = Signal(dict)  # 任务结束后发出处理指标汇总
+    duplicates_found = Signal(list, bool)  # 重复图片分组, 是否跳过
 
-    def __init__(self, input_folder, watermark_path, output_folder, position, transparency, scale):
+    def __init__(self, input_folder, watermark_path, output_folder, position, transparency, scale,
+                 duplicate_mode=FsConstants.DUPLICATE_MODE_NONE):
         super().__init__()
         self.input_folder = input_folder
         self.watermark_path = watermark_path
@@ -63,22 +157,80 @@ class WatermarkWorker(QThread):
         self.position = position
         self.transparency = transparency
         self.scale = scale
+        self.duplicate_mode = duplicate_mode
+        self.watermark = None
+        self.total_images = 0
+        self.written = 0  # 已写出的文件数，用于进度
+        self.job_metrics = None
 
     def run(self):
         try:
-            watermark = Image.open(self.watermark_path).convert("RGBA")
-            images = [f for f in os.listdir(self.input_folder) if f.endswith(('.png', '.jpg', '.jpeg'))]
-            total_images = len(images)
-
-            for idx, filename in enumerate(images):
-                image_path = os.path.join(self.input_folder, filename)
-                process_single_image(image_path, watermark, self.position, self.transparency, self.scale,
-                                     self.output_folder)
-                self.progress.emit(int((idx + 1) / total_images * 100))  # 更新进度
+            self.watermark = Image.open(self.watermark_path).convert("RGBA")
+            images = [f for f in os.listdir(self.input_folder) if f.endswith(FsConstants.BATCH_IMAGE_EXTENSIONS)]
+            if self.duplicate_mode != FsConstants.DUPLICATE_MODE_NONE:
+                images = self.check_duplicates(images)
+            self.total_images = len(images)
+            self.written = 0
+            self.job_metrics = JobMetrics("batch_watermark")
+
+            # 读取线程预读原始字节，写入线程异步落盘，本线程只做解码、合成和编码
+            pipeline = StagedPipeline(self.read_stage, self.process_stage, self.write_stage,
+                                      FsConstants.PIPELINE_READ_AHEAD, FsConstants.PIPELINE_WRITE_BEHIND)
+            try:
+                pipeline.run(images)
+            finally:
+                self.job_metrics.pipeline = pipeline.report()
+                self.metrics_ready.emit(self.job_metrics.finish().export())
             self.completed.emit()
         except Exception as e:
             self.error.emit(str(e))
 
+    def check_duplicates(self, images):
+        """处理前检测重复图片，跳过模式下每组只保留第一张"""
+        groups = DuplicateUtil.find_duplicates([os.path.join(self.input_folder, f) for f in images])
+        skip = self.duplicate_mode == FsConstants.DUPLICATE_MODE_SKIP
+        self.duplicates_found.emit(groups, skip)
+        if not skip:
+            return images
+        skipped = {os.path.basename(path) for group in groups for path in group[1:]}
+        return [f for f in images if f not in skipped]
+
+    def read_stage(self, filename):
+        image_path = os.path.join(self.input_folder, filename)
+        metrics = FileMetrics(image_path)
+        ticket = AdmissionController().plan(image_path)
+        try:
+            return metrics, read_image(image_path, metrics, ticket.memory_budget), ticket
+        except Exception:
+            # 出错后流水线停止，失败的文件也计入指标
+            self.job_metrics.add(metrics.finish())
+            raise
+
+    def process_stage(self, item):
+        """解码前按内存预算排队，与其他工具同时解码的图片共用预算"""
+        metrics, source, ticket = item
+        output_path = os.path.join(self.output_folder, os.path.basename(metrics.path))
+        controller = AdmissionController()
+        controller.acquire(ticket.cost)
+        try:
+            output_data = render_image(source, self.watermark, self.position, self.transparency, self.scale,
+                                       output_path, metrics, ticket.memory_budget)
+        except Exception:
+            self.job_metrics.add(metrics.finish())
+            raise
+        finally:
+            controller.release(ticket.cost)
+        return metrics, output_path, output_data
+
+    def write_stage(self, item):
+        metrics, output_path, output_data = item
+        try:
+            write_image(output_path, output_data, metrics)
+        finally:
+            self.job_metrics.add(metrics.finish())
+        self.written += 1
+        self.progress.emit(int(self.written / self.total_images * 100))  # 更新进度
+
 
 class BatchWatermarkApp(QWidget):
     def __init__(self):
@@ -93,6 +245,11 @@ class BatchWatermarkApp(QWidget):
         self.input_edit = QLineEdit()
         self.input_button = QPushButton("选择")
         self.input_button.clicked.connect(self.select_input_folder)
+        self.input_edit.editingFinished.connect(lambda: self.thumbnail_grid.set_folder(self.input_edit.text()))
+
+        # 输入文件夹缩略图
+        self.thumbnail_grid = ThumbnailGrid()
+        self.thumbnail_grid.setMinimumHeight(FsConstants.THUMBNAIL_SIZE * 2 + 60)
 
         # Watermark path
         self.watermark_label = QLabel("水印文件路径:")
@@ -123,10 +280,26 @@ class BatchWatermarkApp(QWidget):
         self.scale_spinbox.setRange(10, 300)
         self.scale_spinbox.setValue(100)
 
+        # 重复图片
+        self.duplicate_label = QLabel("重复图片:")
+        self.duplicate_combo = QComboBox()
+        self.duplicate_combo.addItems(FsConstants.DUPLICATE_MODES)
+
         # Progress bar
         self.progress_bar = CustomProgressBar()
         self.progress_bar.hide()
 
+        # 处理统计
+        self.metrics_label = QLabel()
+        self.metrics_label.setTextInteractionFlags(Qt.TextInteractionFlag.TextSelectableByMouse)
+        self.metrics_label.hide()
+
+        # 重复图片检测结果
+        self.duplicates_label = QLabel()
+        self.duplicates_label.setTextInteractionFlags(Qt.TextInteractionFlag.TextSelectableByMouse)
+        self.duplicates_label.setWordWrap(True)
+        self.duplicates_label.hide()
+
 
         # Process button
         self.process_button = QPushButton("开始处理")
@@ -162,22 +335,31 @@ class BatchWatermarkApp(QWidget):
         scale_layout.addWidget(self.scale_label)
         scale_layout.addWidget(self.scale_spinbox)
 
+        duplicate_layout = QHBoxLayout()
+        duplicate_layout.addWidget(self.duplicate_label)
+        duplicate_layout.addWidget(self.duplicate_combo)
+
         button_layout = QHBoxLayout()
         button_layout.addWidget(self.process_button)
         layout.addLayout(input_layout)
+        layout.addWidget(self.thumbnail_grid)
         layout.addLayout(watermark_layout)
         layout.addLayout(output_layout)
         layout.addLayout(transparency_layout)
         layout.addLayout(scale_layout)
         layout.addLayout(position_layout)
+        layout.addLayout(duplicate_layout)
         layout.addLayout(button_layout)
         layout.addWidget(self.progress_bar)
+        layout.addWidget(self.duplicates_label)
+        layout.addWidget(self.metrics_label)
         self.setLayout(layout)
 
     def select_input_folder(self):
         folder = QFileDialog.getExistingDirectory(self, "选择输入文件夹")
         if folder:
             self.input_edit.setText(folder)
+            self.thumbnail_grid.set_folder(folder)
 
     def select_watermark_file(self):
         file, _ = QFileDialog.getOpenFileName(self, "选择水印文件", filter="Images (*.png *.jpg *.jpeg)")
@@ -201,10 +383,14 @@ class BatchWatermarkApp(QWidget):
             MessageUtil.show_warning_message("请填写所有路径！")
             return
         # 初始化线程
-        self.worker = WatermarkWorker(input_folder, watermark_path, output_folder, position, transparency, scale)
+        self.worker = WatermarkWorker(input_folder, watermark_path, output_folder, position, transparency, scale,
+                                      self.duplicate_combo.currentText())
         self.worker.progress.connect(self.progress_bar.update_progress)
         self.worker.completed.connect(self.on_completed)
         self.worker.error.connect(self.on_error)
+        self.worker.metrics_ready.connect(self.on_metrics_ready)
+        self.worker.duplicates_found.connect(self.on_duplicates_found)
+        self.duplicates_label.hide()
         self.worker.start()
         self.progress_bar.show()
 
@@ -212,6 +398,27 @@ class BatchWatermarkApp(QWidget):
 
 
 
+    def on_duplicates_found(self, groups, skipped):
+        """展示重复图片分组，每组第一张为保留的图片"""
+        if not groups:
+            self.duplicates_label.setText("未发现重复图片")
+        else:
+            count = sum(len(group) - 1 for group in groups)
+            lines = [f"发现 {len(groups)} 组重复图片，共 {count} 张{'已跳过' if skipped else '（仍会处理）'}:"]
+            for group in groups[:FsConstants.DUPLICATE_REPORT_GROUPS]:
+                lines.append(" = ".join(os.path.basename(path) for path in group))
+            if len(groups) > FsConstants.DUPLICATE_REPORT_GROUPS:
+                lines.append(f"... 另有 {len(groups) - FsConstants.DUPLICATE_REPORT_GROUPS} 组")
+            self.duplicates_label.setText("\n".join(lines))
+            for group in groups:
+                logger.info(f"重复图片: {' = '.join(group)}")
+        self.duplicates_label.show()
+
+    def on_metrics_ready(self, summary):
+        """展示本次任务的处理统计"""
+        self.metrics_label.setText(JobMetrics.format_summary(summary))
+        self.metrics_label.show()
+
     def on_completed(self):
         self.process_button.setEnabled(True)
         self.progress_bar.hide()
@@ -48,3 +48,211 @@ class FsConstants(AppConstants):
     PREFERENCES_WINDOW_TITLE = "首选项"
     PREFERENCES_WINDOW_TITLE_ABOUT = "关于"
     PREFERENCES_WINDOW_TITLE_GENERAL = "常规"
+
+    # 启动性能分析开关
+    PROFILE_STARTUP_ARG = "--profile-startup"
+    PROFILE_STARTUP_ENV = "FSBESTPNG_PROFILE_STARTUP"
+    # 启动基准测试：结果输出路径、首次绘制后退出、父进程启动时间戳
+    PROFILE_OUTPUT_ENV = "FSBESTPNG_PROFILE_OUTPUT"
+    PROFILE_EXIT_AFTER_SHOW_ENV = "FSBESTPNG_EXIT_AFTER_SHOW"
+    PROFILE_LAUNCH_TIME_ENV = "FSBESTPNG_LAUNCH_TIME"
+
+    # 日志窗口：最多保留行数、刷新间隔(毫秒)、单次最多渲染条数
+    LOG_MAX_LINES = 5000
+    LOG_FLUSH_INTERVAL = 100
+    LOG_FLUSH_LIMIT = 1000
+    # loguru 日志级别数值
+    LOG_LEVEL_INFO = 20
+    LOG_LEVEL_WARNING = 30
+    LOG_LEVEL_ERROR = 40
+
+    # 处理指标文件（JSON Lines，与 error.log 同目录）
+    METRICS_FILE = "metrics.jsonl"
+    # 批量任务是否用 tracemalloc 统计内存峰值(可在 app.ini 开启)，开启后所有 Python 内存分配都会变慢
+    METRICS_TRACE_MEMORY_KEY = "metrics.trace_memory"
+    METRICS_TRACE_MEMORY_DEFAULT = False
+    AppConstants.DEFAULT_CONFIG[METRICS_TRACE_MEMORY_KEY] = METRICS_TRACE_MEMORY_DEFAULT
+    AppConstants.CONFIG_TYPES[METRICS_TRACE_MEMORY_KEY] = bool
+
+    # 大图分块处理：内存预算(MB，可在 app.ini 配置)、条带占预算的份数、内存映射临时目录
+    TILE_MEMORY_BUDGET_KEY = "tile.memory_budget_mb"
+    TILE_MEMORY_BUDGET_DEFAULT = 512
+    AppConstants.DEFAULT_CONFIG[TILE_MEMORY_BUDGET_KEY] = TILE_MEMORY_BUDGET_DEFAULT
+    AppConstants.CONFIG_TYPES[TILE_MEMORY_BUDGET_KEY] = int
+    TILE_STRIP_PARTS = 8
+    TILE_TEMP_DIR = "tmp"
+    # 大图预览的最大边长
+    TILE_PREVIEW_SIZE = 2048
+
+    # 批量处理流水线：预读队列和写出队列的最大长度
+    PIPELINE_READ_AHEAD = 4
+    PIPELINE_WRITE_BEHIND = 4
+
+    # 全局已解码图片缓存上限(MB，可在 app.ini 配置)
+    IMAGE_CACHE_MAX_MB_KEY = "image_cache.max_mb"
+    IMAGE_CACHE_MAX_MB_DEFAULT = 512
+    AppConstants.DEFAULT_CONFIG[IMAGE_CACHE_MAX_MB_KEY] = IMAGE_CACHE_MAX_MB_DEFAULT
+    AppConstants.CONFIG_TYPES[IMAGE_CACHE_MAX_MB_KEY] = int
+
+    # 分块图片查看器：图块边长、缓存图块数、单次绘制最多加载的图块数、最多可见图块数、缩放范围和步长、背景色
+    TILE_VIEW_TILE_SIZE = 256
+    TILE_VIEW_CACHE_TILES = 256
+    TILE_VIEW_LOADS_PER_PAINT = 16
+    TILE_VIEW_MAX_VISIBLE = 256
+    TILE_VIEW_MIN_ZOOM = 0.5
+    TILE_VIEW_MAX_ZOOM = 32
+    TILE_VIEW_ZOOM_STEP = 1.25
+    TILE_VIEW_BACKGROUND = "#3c3c3c"
+
+    # 批量处理的图片扩展名
+    BATCH_IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+    # 缩略图缓存：目录、索引文件、边长、后台线程数、索引批量写入条数和间隔(毫秒)、
+    # 内存中保留的缩略图数、最多排队的请求数、列表分批布局的条数
+    THUMBNAIL_CACHE_DIR = "thumbnails"
+    THUMBNAIL_INDEX_FILE = "index.sqlite3"
+    THUMBNAIL_SIZE = 96
+    THUMBNAIL_WORKERS = 4
+    THUMBNAIL_INDEX_BATCH = 256
+    THUMBNAIL_INDEX_FLUSH_INTERVAL = 2000
+    THUMBNAIL_MEMORY_ITEMS = 500
+    THUMBNAIL_MAX_PENDING = 256
+    THUMBNAIL_LAYOUT_BATCH = 500
+
+    # 重复图片检测：哈希索引文件、哈希边长(8x8=64 位)、pHash 缩小尺寸、判定重复的最大汉明距离、
+    # 每批向量化计算的图片数、解码线程数
+    HASH_INDEX_FILE = "hash_index.sqlite3"
+    HASH_BITS_SIDE = 8
+    PHASH_SIZE = 32
+    HASH_MAX_DISTANCE = 6
+    HASH_BATCH_SIZE = 256
+    HASH_WORKERS = 4
+    # 批量处理前的重复图片处理方式
+    DUPLICATE_MODE_NONE = "不检测"
+    DUPLICATE_MODE_REPORT = "仅报告"
+    DUPLICATE_MODE_SKIP = "跳过重复"
+    DUPLICATE_MODES = [DUPLICATE_MODE_NONE, DUPLICATE_MODE_REPORT, DUPLICATE_MODE_SKIP]
+    # 界面上最多列出的重复分组数，其余只写入日志
+    DUPLICATE_REPORT_GROUPS = 10
+
+    # 连拍：间隔范围和默认值(毫秒)、帧差分块大小、待编码帧队列长度、编码线程检查是否结束的间隔(秒)、输出格式、记录文件和视频文件名
+    BURST_INTERVAL_MIN = 100
+    BURST_INTERVAL_MAX = 60000
+    BURST_INTERVAL_DEFAULT = 500
+    BURST_BLOCK_SIZE = 32
+    BURST_QUEUE_SIZE = 8
+    BURST_POLL_INTERVAL = 0.1
+    BURST_FORMAT_PNG = "PNG"
+    BURST_FORMAT_WEBP = "WebP"
+    BURST_FORMAT_VIDEO = "MP4 视频"
+    BURST_FORMATS = [BURST_FORMAT_PNG, BURST_FORMAT_WEBP, BURST_FORMAT_VIDEO]
+    BURST_MANIFEST_FILE = "frames.jsonl"
+    BURST_VIDEO_FILE = "burst.mp4"
+
+    # 截图编码：格式、扩展名、默认 PNG 压缩级别和 JPEG/WebP 质量、编码线程数
+    SCREENSHOT_FORMAT_PNG = "PNG"
+    SCREENSHOT_FORMAT_JPEG = "JPEG"
+    SCREENSHOT_FORMAT_WEBP = "WebP"
+    SCREENSHOT_FORMATS = [SCREENSHOT_FORMAT_PNG, SCREENSHOT_FORMAT_JPEG, SCREENSHOT_FORMAT_WEBP]
+    SCREENSHOT_EXTENSIONS = {SCREENSHOT_FORMAT_PNG: ".png", SCREENSHOT_FORMAT_JPEG: ".jpg",
+                             SCREENSHOT_FORMAT_WEBP: ".webp"}
+    SCREENSHOT_PNG_LEVEL_DEFAULT = 3
+    SCREENSHOT_QUALITY_DEFAULT = 90
+    SCREENSHOT_ENCODE_WORKERS = 2
+    # 截图历史：保留条数、压缩级别（优先速度）、缩略图边长
+    SCREENSHOT_HISTORY_SIZE = 20
+    SCREENSHOT_HISTORY_PNG_LEVEL = 1
+    SCREENSHOT_THUMBNAIL_SIZE = 120
+
+    # 主色提取：颜色数、取样像素数、忽略的透明度阈值、k-means 最大迭代次数和收敛阈值、缓存的图片数
+    PALETTE_COLOR_COUNT = 8
+    PALETTE_SAMPLE_PIXELS = 65536
+    PALETTE_MIN_ALPHA = 16
+    PALETTE_KMEANS_ITERATIONS = 10
+    PALETTE_KMEANS_TOLERANCE = 0.5
+    PALETTE_CACHE_ITEMS = 64
+
+    # 调色板量化：查找表每个通道的位数、分块映射的像素数、视为透明的 alpha 阈值
+    QUANTIZE_LUT_BITS = 6
+    QUANTIZE_CHUNK_PIXELS = 1 << 20
+    QUANTIZE_ALPHA_THRESHOLD = 128
+
+    # 调色板：色块边长、间距、建议宽度的列数、最多显示的行数（超出时滚动），调色板文件目录（与 app.ini 同级）和文件类型
+    SWATCH_CELL_SIZE = 24
+    SWATCH_SPACING = 4
+    SWATCH_HINT_COLUMNS = 12
+    SWATCH_MAX_ROWS = 6
+    PALETTE_DIR = "palettes"
+    PALETTE_FILE_FILTER = "Palettes (*.gpl *.ase *.json);;GIMP (*.gpl);;Adobe Swatch Exchange (*.ase);;JSON (*.json)"
+
+    # 批量格式转换：支持的格式、扩展名、对应的 PIL 格式名、输入扩展名、默认质量和底色、进程池最大进程数
+    CONVERT_FORMAT_PNG = "PNG"
+    CONVERT_FORMAT_JPEG = "JPEG"
+    CONVERT_FORMAT_WEBP = "WebP"
+    CONVERT_FORMAT_BMP = "BMP"
+    CONVERT_FORMAT_TIFF = "TIFF"
+    CONVERT_FORMATS = [CONVERT_FORMAT_PNG, CONVERT_FORMAT_JPEG, CONVERT_FORMAT_WEBP, CONVERT_FORMAT_BMP,
+                       CONVERT_FORMAT_TIFF]
+    CONVERT_EXTENSIONS = {CONVERT_FORMAT_PNG: ".png", CONVERT_FORMAT_JPEG: ".jpg", CONVERT_FORMAT_WEBP: ".webp",
+                          CONVERT_FORMAT_BMP: ".bmp", CONVERT_FORMAT_TIFF: ".tif"}
+    CONVERT_PIL_FORMATS = {CONVERT_FORMAT_PNG: "PNG", CONVERT_FORMAT_JPEG: "JPEG", CONVERT_FORMAT_WEBP: "WEBP",
+                           CONVERT_FORMAT_BMP: "BMP", CONVERT_FORMAT_TIFF: "TIFF"}
+    CONVERT_INPUT_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.webp', '.bmp', '.tif', '.tiff')
+    CONVERT_QUALITY_DEFAULT = 85
+    CONVERT_BACKGROUND_DEFAULT = "#FFFFFF"
+    CONVERT_MAX_WORKERS = 8
+
+    # 去除元数据：读写块大小、线程数、PNG 中保留的辅助块（影响显示效果和 APNG 动画）、输入扩展名
+    METADATA_STRIP_BLOCK_SIZE = 1 << 20
+    METADATA_STRIP_WORKERS = 4
+    METADATA_STRIP_PNG_KEEP = (b"tRNS", b"gAMA", b"cHRM", b"sRGB", b"sBIT", b"pHYs", b"acTL", b"fcTL", b"fdAT")
+    METADATA_STRIP_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+
+    # 后台任务调度：CPU 槽位(0 为全部核心)，可在 app.ini 配置；优先级、状态
+    # 内存由 AdmissionController 按单张图片统一控制，见 ADMISSION_*
+    JOB_MAX_CPU_KEY = "jobs.max_cpu"
+    JOB_MAX_CPU_DEFAULT = 0
+    AppConstants.DEFAULT_CONFIG[JOB_MAX_CPU_KEY] = JOB_MAX_CPU_DEFAULT
+    AppConstants.CONFIG_TYPES[JOB_MAX_CPU_KEY] = int
+    JOB_PRIORITY_LOW = 0
+    JOB_PRIORITY_NORMAL = 1
+    JOB_PRIORITY_HIGH = 2
+    JOB_PRIORITIES = {JOB_PRIORITY_HIGH: "高", JOB_PRIORITY_NORMAL: "普通", JOB_PRIORITY_LOW: "低"}
+    JOB_STATE_QUEUED = "排队中"
+    JOB_STATE_RUNNING = "运行中"
+    JOB_STATE_DONE = "完成"
+    JOB_STATE_FAILED = "失败"
+    JOB_STATE_CANCELLED = "已取消"
+
+    # 监视文件夹：配置文件（与 app.ini 同级）、检查间隔、文件稳定多久视为写完、合并批次的等待时间(毫秒)、
+    # 单批最多文件数、常驻处理线程数、界面保留的记录条数
+    WATCH_CONFIG_FILE = "watch.json"
+    WATCH_POLL_INTERVAL = 250
+    WATCH_SETTLE_TIME = 500
+    WATCH_BATCH_DELAY = 300
+    WATCH_BATCH_MAX = 64
+    WATCH_WORKERS = 4
+    WATCH_LOG_LINES = 200
+
+    # 常驻进程池：最大进程数、主窗口显示后延迟预热的时间(毫秒)、空闲关闭时间(秒，可在 app.ini 配置)、子进程预加载的模块、
+    # 等待任务完成时检查取消的间隔(秒)
+    WORKER_POOL_MAX_WORKERS = 8
+    WORKER_POOL_WARMUP_DELAY = 500
+    WORKER_POOL_IDLE_TIMEOUT_KEY = "worker_pool.idle_timeout_s"
+    WORKER_POOL_IDLE_TIMEOUT_DEFAULT = 300
+    AppConstants.DEFAULT_CONFIG[WORKER_POOL_IDLE_TIMEOUT_KEY] = WORKER_POOL_IDLE_TIMEOUT_DEFAULT
+    AppConstants.CONFIG_TYPES[WORKER_POOL_IDLE_TIMEOUT_KEY] = int
+    WORKER_POOL_PRELOAD = ("numpy", "cv2", "PIL.Image", "PIL.PngImagePlugin", "PIL.JpegImagePlugin",
+                           "src.util.convert_util", "src.util.quantize_util")
+    WORKER_POOL_WAIT_INTERVAL = 0.5
+
+    # 并发解码准入：各工具同时解码的图片内存之和不超过预算(MB，可在首选项配置)；
+    # 整帧处理按解码帧的倍数估算（原图加转换/输出副本），分块处理按条带数估算；预算不足时等待的检查间隔(秒)
+    ADMISSION_MEMORY_BUDGET_KEY = "admission.memory_budget_mb"
+    ADMISSION_MEMORY_BUDGET_DEFAULT = 1024
+    AppConstants.DEFAULT_CONFIG[ADMISSION_MEMORY_BUDGET_KEY] = ADMISSION_MEMORY_BUDGET_DEFAULT
+    AppConstants.CONFIG_TYPES[ADMISSION_MEMORY_BUDGET_KEY] = int
+    ADMISSION_MEMORY_BUDGET_MIN = 128
+    ADMISSION_MEMORY_BUDGET_MAX = 65536
+    ADMISSION_WORK_FACTOR = 2
+    ADMISSION_TILED_STRIPS = 2
+    ADMISSION_WAIT_INTERVAL = 0.1
@@ -1,11 +1,38 @@
+import os
 import sys
 import cv2
+import numpy as np
 from PySide6.QtWidgets import (
     QApplication, QWidget, QLabel, QPushButton, QVBoxLayout, QFileDialog, QSlider, QHBoxLayout
 )
-from PySide6.QtGui import QPixmap, QImage
 from PySide6.QtCore import Qt
 
+from src.const.fs_constants import FsConstants
+from src.util.image_cache import ImageCache
+from src.util.metrics_util import FileMetrics, JobMetrics
+from src.util.qimage_util import QImageUtil
+from src.util.tile_util import TileUtil
+from src.widget.send_to_button import SendToButton
+
+
+def encode_image(image, extension, quality):
+    """
+    按扩展名把 OpenCV 图像编码为字节
+    :param image: BGR/BGRA 图像
+    :param extension: ".jpg" 或 ".png"
+    :param quality: JPEG 压缩质量 1~100，PNG 忽略
+    :return: (是否成功, 编码后的 numpy 缓冲)
+    """
+    if extension == ".jpg":
+        if image.ndim == 3 and image.shape[2] == 4:
+            # JPEG 不支持透明通道
+            image = cv2.cvtColor(image, cv2.COLOR_BGRA2BGR)
+        return cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    if extension == ".png":
+        return cv2.imencode(".png", image, [cv2.IMWRITE_PNG_COMPRESSION, 3])
+    return False, None
+
+
 class ImageCompressor(QWidget):
     def __init__(self):
         super().__init__()
@@ -19,6 +46,7 @@ class ImageCompressor(QWidget):
         self.upload_button = QPushButton("上传图片")
         self.compress_button = QPushButton("压缩图片")
         self.compress_button.setEnabled(False)  # 默认禁用压缩按钮
+        self.send_button = SendToButton()
 
         # 压缩质量滑动条
         self.quality_slider = QSlider(Qt.Orientation.Horizontal)
@@ -31,6 +59,7 @@ class ImageCompressor(QWidget):
         button_layout = QHBoxLayout()
         button_layout.addWidget(self.upload_button)
         button_layout.addWidget(self.compress_button)
+        button_layout.addWidget(self.send_button)
 
         layout = QVBoxLayout()
         layout.addWidget(self.image_label)
@@ -41,6 +70,8 @@ class ImageCompressor(QWidget):
         # 当前图片的文件路径
         self.image_path = None
         self.original_image = None  # 用于保存原始图像数据
+        self.large_image = False  # 超出内存预算的大图只加载预览，保存时分块处理
+        self.file_metrics = None  # 当前图片的处理指标
 
         # 按钮事件绑定
         self.upload_button.clicked.connect(self.upload_image)
@@ -51,35 +82,52 @@ class ImageCompressor(QWidget):
         file_dialog = QFileDialog(self)
         file_dialog.setNameFilter("Images (*.png *.jpg *.jpeg *.bmp)")
         if file_dialog.exec():
-            self.image_path = file_dialog.selectedFiles()[0]
-            # 使用 OpenCV 加载图片
-            self.original_image = cv2.imread(self.image_path)
-            if self.original_image is None:
-                self.image_label.setText("无法加载图片，请选择有效图片")
-                self.compress_button.setEnabled(False)
-                return
-
-            # 显示图片
-            self.display_image(self.original_image)
-            self.compress_button.setEnabled(True)  # 启用压缩按钮
+            self.open_image(file_dialog.selectedFiles()[0])
+
+    def open_image(self, image_path):
+        """加载图片，已解码的图片直接从全局缓存获取"""
+        self.image_path = image_path
+        self.file_metrics = FileMetrics(self.image_path)
+        self.file_metrics.bytes_in = os.path.getsize(self.image_path)
+        self.large_image = not TileUtil.fits_in_budget(self.image_path)
+        with self.file_metrics.stage("decode"):
+            if self.large_image:
+                # 大图只解码缩小后的预览用于显示
+                preview = TileUtil.preview(self.image_path, FsConstants.TILE_PREVIEW_SIZE).convert("RGB")
+                self.original_image = cv2.cvtColor(np.asarray(preview), cv2.COLOR_RGB2BGR)
+            else:
+                self.original_image = ImageCache().get(self.image_path)
+        if self.original_image is None:
+            self.image_label.setText("无法加载图片，请选择有效图片")
+            self.compress_button.setEnabled(False)
+            self.send_button.setEnabled(False)
+            return
+        self.show_loaded_image()
+
+    def open_buffer(self, image, image_path):
+        """接收其他工具页已解码（可能已编辑）的 BGR/BGRA 图片，不再读取文件；路径只用于显示和指标"""
+        self.image_path = image_path
+        self.file_metrics = FileMetrics(image_path)
+        self.file_metrics.bytes_in = os.path.getsize(image_path)
+        self.large_image = False
+        self.original_image = image
+        self.show_loaded_image()
+
+    def current_image(self):
+        """发送给其他工具页的图片；大图只解码了预览，返回 None，由目标页按路径打开"""
+        return None if self.large_image else self.original_image
+
+    def show_loaded_image(self):
+        # 显示图片
+        self.display_image(self.original_image)
+        self.compress_button.setEnabled(True)  # 启用压缩按钮
+        self.send_button.setEnabled(True)
 
     def display_image(self, image):
-        # 检查是否有透明通道 (Alpha 通道)
-        if image.shape[-1] == 4:  # BGRA 格式
-            # 转换为 RGBA 格式
-            image_rgba = cv2.cvtColor(image, cv2.COLOR_BGRA2RGBA)
-            height, width, channels = image_rgba.shape
-            bytes_per_line = channels * width
-            q_image = QImage(image_rgba.data, width, height, bytes_per_line, QImage.Format.Format_RGBA8888)
-        else:
-            # 如果没有透明通道，转换为 RGB 格式
-            image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-            height, width, channels = image_rgb.shape
-            bytes_per_line = channels * width
-            q_image = QImage(image_rgb.data, width, height, bytes_per_line, QImage.Format.Format_RGB888)
+        # 直接按 BGR/BGRA 包装，不再转换颜色通道
+        pixmap = QImageUtil.to_pixmap(image)
 
         # 设置图片到 QLabel
-        pixmap = QPixmap.fromImage(q_image)
         self.image_label.setPixmap(pixmap.scaled(self.image_label.size(), Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation))
 
     def compress_image(self):
@@ -94,22 +142,58 @@ class ImageCompressor(QWidget):
         # 打开文件保存对话框选择压缩后的文件路径
         save_path, _ = QFileDialog.getSaveFileName(self, "保存压缩图片", "", "JPEG (*.jpg);;PNG (*.png)")
         if save_path:
-            if save_path.endswith(".jpg"):
-                # 保存为JPEG格式
-                success = cv2.imwrite(save_path, self.original_image, [cv2.IMWRITE_JPEG_QUALITY, quality])
-                if not success:
-                    self.image_label.setText("保存失败，请检查文件路径和权限")
-                    return
-            elif save_path.endswith(".png"):
-                # 保存为PNG格式
-                success = cv2.imwrite(save_path, self.original_image, [cv2.IMWRITE_PNG_COMPRESSION, 3])
-                if not success:
-                    self.image_label.setText("保存失败，请检查文件路径和权限")
-                    return
+            if self.large_image:
+                self.compress_large_image(save_path, quality)
+                return
+            metrics = self.file_metrics or FileMetrics(self.image_path)
+            metrics.pixel_bytes = self.original_image.nbytes
+            # 按扩展名保存为 JPEG 或 PNG 格式
+            with metrics.stage("encode"):
+                success, buffer = encode_image(self.original_image, os.path.splitext(save_path)[1], quality)
+            if success:
+                try:
+                    with metrics.stage("write"):
+                        buffer.tofile(save_path)
+                except OSError:
+                    success = False
+            if not success:
+                self.image_label.setText("保存失败，请检查文件路径和权限")
+                return
 
+            metrics.bytes_out = buffer.nbytes
+            job_metrics = JobMetrics("compress", trace_memory=False)
+            job_metrics.add(metrics.finish())
+            job_metrics.finish().export()
             self.image_label.setText("图片已成功压缩并保存！")
             self.compress_button.setEnabled(False)
 
+    def compress_large_image(self, save_path, quality):
+        """大图解码到内存映射缓冲后由 PIL 流式编码，不在内存中保留整帧"""
+        extension = os.path.splitext(save_path)[1].lower()
+        if extension not in (".jpg", ".png"):
+            self.image_label.setText("保存失败，请检查文件路径和权限")
+            return
+        metrics = self.file_metrics or FileMetrics(self.image_path)
+        try:
+            with metrics.stage("decode"):
+                frame = TileUtil.open_frame(self.image_path)
+            with frame:
+                metrics.pixel_bytes = TileUtil.estimate_frame_bytes(frame.image.size, frame.image.mode)
+                with metrics.stage("encode"):
+                    if extension == ".jpg":
+                        metrics.bytes_out = TileUtil.save(frame, save_path, quality=quality)
+                    else:
+                        metrics.bytes_out = TileUtil.save(frame, save_path, compress_level=3)
+        except (OSError, ValueError):
+            self.image_label.setText("保存失败，请检查文件路径和权限")
+            return
+
+        job_metrics = JobMetrics("compress", trace_memory=False)
+        job_metrics.add(metrics.finish())
+        job_metrics.finish().export()
+        self.image_label.setText("图片已成功压缩并保存！")
+        self.compress_button.setEnabled(False)
+
 if __name__ == "__main__":
     app = QApplication(sys.argv)
     window = ImageCompressor()
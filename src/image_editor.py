@@ -1,11 +1,33 @@
 import sys
 import cv2
 import numpy as np
+from PIL import Image
 from PySide6.QtWidgets import (
-    QApplication, QMainWindow, QLabel, QPushButton, QSlider, QFileDialog, QVBoxLayout, QHBoxLayout, QWidget
+    QApplication, QMainWindow, QLabel, QPushButton, QSlider, QFileDialog, QVBoxLayout, QHBoxLayout, QWidget,
+    QCheckBox
 )
-from PySide6.QtGui import QPixmap, QImage, QPainter, QColor, QPen
+from PySide6.QtGui import QPainter, QColor, QPen
 from PySide6.QtCore import Qt, QRect
+from fs_base.message_util import MessageUtil
+from fs_base.widget import CustomProgressBar
+
+from src.const.fs_constants import FsConstants
+from src.util.image_cache import ImageCache
+from src.util.job_scheduler import Job, JobScheduler, collect_paths
+from src.util.qimage_util import QImageUtil
+from src.util.quantize_util import QuantizeUtil
+from src.util.worker_pool import WorkerPool
+from src.widget.color_palette_widget import ColorPaletteWidget
+from src.widget.send_to_button import SendToButton
+
+
+def crop_region(image, x1, y1, x2, y2):
+    """裁剪图像的矩形区域，坐标超出范围时自动截断，返回原数组的视图"""
+    height, width = image.shape[:2]
+    x1, y1 = max(0, x1), max(0, y1)
+    x2, y2 = min(width, x2), min(height, y2)
+    return image[y1:y2, x1:x2]
+
 
 class ImageEditor(QMainWindow):
     def __init__(self):
@@ -15,6 +37,8 @@ class ImageEditor(QMainWindow):
         # 图像存储
         self.image = None
         self.processed_image = None
+        self.indexed_image = None  # 量化后的索引色图片，保存为 PNG 时使用
+        self.image_path = None
 
         # 裁剪相关变量
         self.is_cropping = False
@@ -54,8 +78,31 @@ class ImageEditor(QMainWindow):
         save_button.clicked.connect(self.save_image)
         button_layout.addWidget(save_button)
 
+        self.send_button = SendToButton()
+        button_layout.addWidget(self.send_button)
+
         layout.addLayout(button_layout)
 
+        # 图片主色，加载图片后自动提取
+        self.palette_widget = ColorPaletteWidget()
+        self.palette_widget.setMinimumSize(0, 0)
+        layout.addWidget(self.palette_widget)
+
+        # 按调色板量化
+        quantize_layout = QHBoxLayout()
+        self.dither_checkbox = QCheckBox("Floyd–Steinberg 抖动")
+        quantize_layout.addWidget(self.dither_checkbox)
+        quantize_button = QPushButton("按调色板量化")
+        quantize_button.clicked.connect(self.quantize_image)
+        quantize_layout.addWidget(quantize_button)
+        self.quantize_folder_button = QPushButton("批量量化文件夹")
+        self.quantize_folder_button.clicked.connect(self.quantize_folder)
+        quantize_layout.addWidget(self.quantize_folder_button)
+        layout.addLayout(quantize_layout)
+        self.progress_bar = CustomProgressBar()
+        self.progress_bar.hide()
+        layout.addWidget(self.progress_bar)
+
         # 设置中心窗口
         container = QWidget()
         container.setLayout(layout)
@@ -64,29 +111,46 @@ class ImageEditor(QMainWindow):
     def load_image(self):
         file_path, _ = QFileDialog.getOpenFileName(self, "选择图片", "", "Images (*.png *.jpg *.bmp)")
         if file_path:
-            self.image = cv2.imread(file_path)
-            self.processed_image = self.image.copy()
-            self.display_image()
+            self.open_image(file_path)
+
+    def open_image(self, file_path):
+        """加载图片，已解码的图片直接从全局缓存获取"""
+        image = ImageCache().get(file_path)
+        if image is None:
+            return
+        self.set_image(image, file_path)
+        self.palette_widget.extract_from_image(file_path)
+
+    def open_buffer(self, image, image_path):
+        """接收其他工具页已解码（可能已编辑）的 BGR/BGRA 图片，不再读取文件；路径只用于显示和保存"""
+        self.set_image(image, image_path)
+        self.palette_widget.extract_from_image(image_path, self.image)
+
+    def set_image(self, image, image_path):
+        self.image_path = image_path
+        # 缓存中的数组只读且可能带透明通道，编辑前转为自己的 BGR 副本
+        self.image = cv2.cvtColor(image, cv2.COLOR_BGRA2BGR) if image.shape[2] == 4 else image.copy()
+        self.processed_image = self.image.copy()
+        self.indexed_image = None
+        self.display_image()
+        self.send_button.setEnabled(True)
+
+    def current_image(self):
+        """发送给其他工具页的图片，包含裁剪、量化等编辑"""
+        return self.processed_image
 
     def reset_image(self):
         """将图片重置为原始状态"""
         if self.image is not None:
             self.processed_image = self.image.copy()
+            self.indexed_image = None
             self.display_image()
 
     def display_image(self):
         """将处理后的图像显示在 QLabel 中"""
         if self.processed_image is not None:
-            # 确保内存连续
-            contiguous_image = np.ascontiguousarray(self.processed_image)
-            height, width, channel = contiguous_image.shape
-            bytes_per_line = 3 * width
-
-            # 创建 QImage
-            q_image = QImage(
-                contiguous_image.data, width, height, bytes_per_line, QImage.Format.Format_RGB888
-            ).rgbSwapped()
-            pixmap = QPixmap.fromImage(q_image)
+            # 裁剪后的视图也可以直接按 BGR 包装，不需要先复制成连续内存再交换通道
+            pixmap = QImageUtil.to_pixmap(self.processed_image)
 
             # 将图像缩放以适应 QLabel 区域
             scaled_pixmap = pixmap.scaled(self.image_label.size(), Qt.AspectRatioMode.KeepAspectRatio)
@@ -117,12 +181,9 @@ class ImageEditor(QMainWindow):
             x2 = int((self.selection_rect.x() + self.selection_rect.width()) * scale_w)
             y2 = int((self.selection_rect.y() + self.selection_rect.height()) * scale_h)
 
-            # 确保坐标合法
-            x1, y1 = max(0, x1), max(0, y1)
-            x2, y2 = min(width, x2), min(height, y2)
-
-            # 裁剪图像
-            self.processed_image = self.processed_image[y1:y2, x1:x2]
+            # 裁剪图像（坐标超出范围时自动截断）
+            self.processed_image = crop_region(self.processed_image, x1, y1, x2, y2)
+            self.indexed_image = None
             self.display_image()
 
             # 重置裁剪相关变量
@@ -136,9 +197,74 @@ class ImageEditor(QMainWindow):
         if self.processed_image is not None:
             file_path, _ = QFileDialog.getSaveFileName(self, "保存图片", "", "Images (*.png *.jpg *.bmp)")
             if file_path:
-                cv2.imwrite(file_path, self.processed_image)
+                if self.indexed_image is not None and file_path.lower().endswith(".png"):
+                    # 量化后保存为索引色 PNG，体积远小于真彩色
+                    params = {"optimize": True}
+                    if "transparency" in self.indexed_image.info:
+                        params["transparency"] = self.indexed_image.info["transparency"]
+                    self.indexed_image.save(file_path, "PNG", **params)
+                else:
+                    cv2.imwrite(file_path, self.processed_image)
                 print("图片已保存:", file_path)
 
+    def palette_colors(self):
+        return [color.getRgb()[:3] for color in self.palette_widget.colors]
+
+    def quantize_image(self):
+        """把当前图片映射到调色板中的颜色"""
+        if self.processed_image is None:
+            return
+        colors = self.palette_colors()
+        if not colors:
+            MessageUtil.show_warning_message("调色板中没有颜色！")
+            return
+        source = Image.fromarray(cv2.cvtColor(self.processed_image, cv2.COLOR_BGR2RGB))
+        self.indexed_image = QuantizeUtil.quantize(source, colors, self.dither_checkbox.isChecked())
+        self.processed_image = cv2.cvtColor(np.asarray(self.indexed_image.convert("RGB")), cv2.COLOR_RGB2BGR)
+        self.display_image()
+
+    def quantize_folder(self):
+        """选择输入和输出文件夹，在后台批量量化为索引色 PNG"""
+        colors = self.palette_colors()
+        if not colors:
+            MessageUtil.show_warning_message("调色板中没有颜色！")
+            return
+        input_folder = QFileDialog.getExistingDirectory(self, "选择输入文件夹")
+        if not input_folder:
+            return
+        output_folder = QFileDialog.getExistingDirectory(self, "选择输出文件夹")
+        if not output_folder:
+            return
+        paths = collect_paths([input_folder], FsConstants.BATCH_IMAGE_EXTENSIONS)
+        if not paths:
+            MessageUtil.show_warning_message("没有可量化的图片！")
+            return
+        dither = self.dither_checkbox.isChecked()
+        # 提交到全局调度器，与其他批量任务共享 CPU 槽位，可在“任务”页查看进度或取消
+        job = Job(f"调色板量化（{len(paths)} 个文件）",
+                  lambda job: QuantizeUtil.quantize_folder(
+                      paths, output_folder, colors, dither, workers=job.workers,
+                      progress=lambda done, total: job.report_progress(int(done / total * 100)),
+                      stopped=job.is_cancelled),
+                  max_workers=WorkerPool.get_max_workers())
+        job.progress.connect(self.progress_bar.update_progress)
+        job.finished.connect(lambda result, target=job: self.on_quantize_finished(target, result))
+        JobScheduler().submit(job)
+        self.progress_bar.show()
+        self.quantize_folder_button.setEnabled(False)
+
+    def on_quantize_finished(self, job, result):
+        self.quantize_folder_button.setEnabled(True)
+        self.progress_bar.hide()
+        if job.error:
+            MessageUtil.show_error_message(f"批量量化出现错误：\n{job.error}")
+            return
+        if result is None:
+            return  # 已取消
+        count, bytes_in, bytes_out = result
+        ratio = f"，体积 {bytes_out / bytes_in:.0%}" if bytes_in else ""
+        MessageUtil.show_success_message(f"已量化 {count} 张图片{ratio}")
+
     def mousePressEvent(self, event):
         """鼠标按下事件"""
         if self.is_cropping and event.button() == Qt.MouseButton.LeftButton:
@@ -167,13 +293,8 @@ class ImageEditor(QMainWindow):
 
         if self.selection_rect and self.is_cropping:
             if self.processed_image is not None:
-                # 在原始图像副本上绘制裁剪框
-                temp_image = self.processed_image.copy()
-                height, width, channel = temp_image.shape
-                bytes_per_line = 3 * width
-                q_image = QImage(temp_image.data, width, height, bytes_per_line,
-                                 QImage.Format.Format_RGB888).rgbSwapped()
-                pixmap = QPixmap.fromImage(q_image)
+                # 在 QPixmap 副本上绘制裁剪框，原图不受影响
+                pixmap = QImageUtil.to_pixmap(self.processed_image)
 
                 # 使用 QPainter 在 Pixmap 上绘制
                 painter = QPainter(pixmap)
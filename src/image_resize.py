@@ -1,10 +1,29 @@
+import os
 import sys
+import cv2
 from PySide6.QtCore import Qt
-from PySide6.QtGui import QImage, QPixmap, QPainter
 from PySide6.QtWidgets import (
-    QApplication, QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QGraphicsView,
-    QGraphicsScene, QGraphicsPixmapItem, QFileDialog, QSlider, QLabel
+    QApplication, QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QFileDialog, QSlider, QLabel
 )
+from fs_base.message_util import MessageUtil
+
+from src.util.image_cache import ImageCache
+from src.util.metrics_util import FileMetrics, JobMetrics
+from src.util.qimage_util import QImageUtil
+from src.util.tile_util import TileUtil
+from src.widget.send_to_button import SendToButton
+from src.widget.tiled_image_view import TiledImageView
+
+
+def resize_qimage(image, scale_factor):
+    """按比例平滑缩放图片"""
+    return image.scaled(
+        image.width() * scale_factor,
+        image.height() * scale_factor,
+        Qt.AspectRatioMode.KeepAspectRatio,
+        Qt.TransformationMode.SmoothTransformation
+    )
+
 
 class ImageResizeApp(QWidget):
     def __init__(self):
@@ -15,16 +34,18 @@ class ImageResizeApp(QWidget):
         # 初始化图片
         self.image = None
         self.original_image = None  # 保存原始 QImage
+        self.image_array = None  # 缓存中的像素数组，original_image 与其共享内存，需保持引用
+        self.image_path = None
+        self.large_image_path = None  # 超出内存预算的大图由查看器分块显示，保存时分块缩放
+        self.file_metrics = None  # 当前图片的处理指标
 
         # 主布局
         layout = QVBoxLayout(self)
 
-        # 创建 QGraphicsView 和 QGraphicsScene
-        self.scene = QGraphicsScene(self)
-        self.view = QGraphicsView(self.scene, self)
-        self.view.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform)
-        self.view.setFixedSize(600, 400)  # 设置固定视图大小
-        layout.addWidget(self.view, alignment=Qt.AlignmentFlag.AlignCenter)
+        # 分块查看器：可缩放平移，大图只加载可见的图块
+        self.view = TiledImageView(self)
+        self.view.setMinimumSize(600, 400)
+        layout.addWidget(self.view)
 
         # 水平布局，放置上传和保存按钮
         button_layout = QHBoxLayout()
@@ -37,6 +58,8 @@ class ImageResizeApp(QWidget):
         self.save_button.setEnabled(False)  # 初始禁用保存按钮
         button_layout.addWidget(self.save_button)
 
+        self.send_button = SendToButton()
+        button_layout.addWidget(self.send_button)
 
         # 缩小比例滑块
         self.scale_slider = QSlider(Qt.Orientation.Horizontal)
@@ -54,38 +77,67 @@ class ImageResizeApp(QWidget):
         """上传并显示图片"""
         file_path, _ = QFileDialog.getOpenFileName(self, "选择图片", "", "Image Files (*.png *.jpg *.bmp)")
         if file_path:
-            self.image = QImage(file_path)
-            self.original_image = self.image.copy()  # 保存原始图片
-            self.display_image()
-            self.save_button.setEnabled(True)  # 启用保存按钮
+            self.open_image(file_path)
+
+    def open_image(self, file_path):
+        """加载图片，已解码的图片直接从全局缓存获取"""
+        self.image_path = file_path
+        self.file_metrics = FileMetrics(file_path)
+        self.file_metrics.bytes_in = os.path.getsize(file_path)
+        self.large_image_path = None if TileUtil.fits_in_budget(file_path) else file_path
+        with self.file_metrics.stage("decode"):
+            if self.large_image_path:
+                # 大图由查看器在后台解码并生成金字塔
+                self.image_array = None
+                self.image = None
+                self.view.set_path(file_path)
+            else:
+                image_array = ImageCache().get(file_path)
+                if image_array is None:
+                    return
+                self.set_array(image_array)
+        self.show_loaded_image()
+
+    def open_buffer(self, image, image_path):
+        """接收其他工具页已解码（可能已编辑）的 BGR/BGRA 图片，不再读取文件；路径只用于显示和指标"""
+        self.image_path = image_path
+        self.file_metrics = FileMetrics(image_path)
+        self.file_metrics.bytes_in = os.path.getsize(image_path)
+        self.large_image_path = None
+        self.set_array(image)
+        self.show_loaded_image()
+
+    def set_array(self, image_array):
+        self.image_array = image_array
+        self.image = QImageUtil.from_array(image_array)
+        self.view.set_image(image_array)
+
+    def show_loaded_image(self):
+        # QImage 隐式共享，缩放和保存都会生成新图片，无需再复制一份原图
+        self.original_image = self.image
+        self.display_image(self.scale_slider.value() / 100.0)
+        self.save_button.setEnabled(True)  # 启用保存按钮
+        self.send_button.setEnabled(True)
+
+    def current_image(self):
+        """发送给其他工具页的图片，按当前比例缩放；大图返回 None，由目标页按路径分块打开"""
+        if self.large_image_path or self.image_array is None:
+            return None
+        scale_factor = self.scale_slider.value() / 100.0
+        if scale_factor == 1:
+            return self.image_array
+        height, width = self.image_array.shape[:2]
+        return cv2.resize(self.image_array, TileUtil.scaled_size((width, height), scale_factor),
+                          interpolation=cv2.INTER_AREA)
 
     def display_image(self, scale=1.0):
-        """按比例显示图片"""
-        if self.original_image:
-            # 获取 QGraphicsView 的固定大小
-            view_width = self.view.width()
-            view_height = self.view.height()
-
-            # 按比例缩放图片
-            scaled_image = self.original_image.scaled(
-                view_width * scale,
-                view_height * scale,
-                Qt.AspectRatioMode.KeepAspectRatio,
-                Qt.TransformationMode.SmoothTransformation
-            )
-
-            # 转换为 QPixmap 并显示在 QGraphicsView 中
-            pixmap = QPixmap.fromImage(scaled_image)
-            self.scene.clear()  # 清空场景
-            pixmap_item = QGraphicsPixmapItem(pixmap)
-            self.scene.addItem(pixmap_item)
-
-            # 调整视图以适应场景
-            self.view.setSceneRect(self.scene.sceneRect())
+        """按比例显示图片：缩放到适应查看器的 scale 倍"""
+        if self.image_path:
+            self.view.fit_to_view(scale)
 
     def scale_image(self):
         """根据滑块值动态缩小图片"""
-        if self.original_image:
+        if self.image_path:
             scale_percentage = self.scale_slider.value()  # 获取滑块的值
             self.scale_label.setText(f"当前比例: {scale_percentage}%")  # 更新比例显示
             scale_factor = scale_percentage / 100.0  # 转换为缩放比例
@@ -93,19 +145,52 @@ class ImageResizeApp(QWidget):
 
     def save_image(self):
         """保存当前显示的图片"""
-        if self.original_image:
+        if self.image_path:
             # 打开保存文件对话框
             file_path, _ = QFileDialog.getSaveFileName(self, "保存图片", "", "Image Files (*.png *.jpg *.bmp)")
             if file_path:
+                metrics = self.file_metrics or FileMetrics(file_path)
                 # 获取滑块当前比例，按比例保存缩放后的图片
                 scale_factor = self.scale_slider.value() / 100.0
-                scaled_image = self.original_image.scaled(
-                    self.original_image.width() * scale_factor,
-                    self.original_image.height() * scale_factor,
-                    Qt.AspectRatioMode.KeepAspectRatio,
-                    Qt.TransformationMode.SmoothTransformation
-                )
-                scaled_image.save(file_path)  # 保存图片
+                try:
+                    if self.large_image_path:
+                        self.save_large_image(file_path, scale_factor, metrics)
+                        return
+                    with metrics.stage("transform"):
+                        scaled_image = resize_qimage(self.original_image, scale_factor)
+                    metrics.pixel_bytes = scaled_image.sizeInBytes()
+                    # 先编码到内存再写文件，分别统计耗时
+                    with metrics.stage("encode"):
+                        image_format = os.path.splitext(file_path)[1][1:].upper() or "PNG"
+                        data = QImageUtil.encode(scaled_image, image_format)
+                    with metrics.stage("write"):
+                        with open(file_path, "wb") as file:
+                            file.write(data)
+                except (OSError, ValueError) as e:
+                    MessageUtil.show_error_message(f"保存失败: {e}")
+                    return
+                metrics.bytes_out = len(data)
+                job_metrics = JobMetrics("resize", trace_memory=False)
+                job_metrics.add(metrics.finish())
+                job_metrics.finish().export()
+                # 同一张图片再次保存时重新统计
+                self.file_metrics = FileMetrics(metrics.path)
+
+    def save_large_image(self, file_path, scale_factor, metrics):
+        """大图解码到内存映射缓冲，按条带缩放后流式编码保存"""
+        with metrics.stage("decode"):
+            frame = TileUtil.open_frame(self.large_image_path)
+        with frame:
+            with metrics.stage("transform"):
+                scaled_frame = TileUtil.resize(frame, TileUtil.scaled_size(frame.image.size, scale_factor))
+            with scaled_frame:
+                metrics.pixel_bytes = TileUtil.estimate_frame_bytes(scaled_frame.image.size, scaled_frame.image.mode)
+                with metrics.stage("encode"):
+                    metrics.bytes_out = TileUtil.save(scaled_frame, file_path)
+        job_metrics = JobMetrics("resize", trace_memory=False)
+        job_metrics.add(metrics.finish())
+        job_metrics.finish().export()
+        self.file_metrics = FileMetrics(metrics.path)
 
 
 if __name__ == "__main__":
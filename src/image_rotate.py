@@ -1,8 +1,23 @@
+import os
 import sys
-from PySide6.QtCore import Qt
-from PySide6.QtGui import QImage, QPixmap, QTransform, QPainter
-from PySide6.QtWidgets import QApplication, QWidget, QVBoxLayout, QPushButton, QGraphicsView, QGraphicsScene, \
-    QGraphicsPixmapItem, QFileDialog, QGraphicsItem, QHBoxLayout
+import numpy as np
+from PySide6.QtGui import QTransform
+from PySide6.QtWidgets import QApplication, QWidget, QVBoxLayout, QPushButton, QFileDialog, QHBoxLayout
+from fs_base.message_util import MessageUtil
+
+from src.util.image_cache import ImageCache
+from src.util.metrics_util import FileMetrics, JobMetrics
+from src.util.qimage_util import QImageUtil
+from src.util.tile_util import TileUtil
+from src.widget.send_to_button import SendToButton
+from src.widget.tiled_image_view import TiledImageView
+
+
+def rotate_qimage(image, angle=90):
+    """按角度旋转图片"""
+    transform = QTransform()
+    transform.rotate(angle)
+    return image.transformed(transform)
 
 
 class ImageRotateApp(QWidget):
@@ -13,17 +28,19 @@ class ImageRotateApp(QWidget):
 
         # 初始化图片
         self.image = None
+        self.image_array = None  # 缓存中的像素数组，image 与其共享内存，需保持引用
+        self.image_path = None
+        self.large_image_path = None  # 超出内存预算的大图由查看器分块显示，保存时分块旋转
+        self.angle = 0  # 累计顺时针旋转角度，预览只旋转显示，保存时才旋转像素
+        self.file_metrics = None  # 当前图片的处理指标
 
         # 主布局
         layout = QVBoxLayout(self)
 
-        # 创建 QGraphicsView 和 QGraphicsScene
-        self.scene = QGraphicsScene(self)
-        self.view = QGraphicsView(self.scene, self)
-        self.view.setRenderHint(QPainter.RenderHint.Antialiasing)
-        self.view.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform)
-        self.view.setFixedSize(600, 400)  # 设置固定视图大小
-        layout.addWidget(self.view, alignment=Qt.AlignmentFlag.AlignCenter)
+        # 分块查看器：可缩放平移，大图只加载可见的图块
+        self.view = TiledImageView(self)
+        self.view.setMinimumSize(600, 400)
+        layout.addWidget(self.view)
 
         button_layout = QHBoxLayout()
         # 上传图片按钮
@@ -40,62 +57,112 @@ class ImageRotateApp(QWidget):
         self.save_button = QPushButton("保存图片")
         self.save_button.clicked.connect(self.save_image)
         button_layout.addWidget(self.save_button)
+
+        self.send_button = SendToButton()
+        button_layout.addWidget(self.send_button)
         layout.addLayout(button_layout)
 
     def upload_image(self):
         """上传并显示图片"""
         file_path, _ = QFileDialog.getOpenFileName(self, "选择图片", "", "Image Files (*.png *.jpg *.bmp)")
         if file_path:
-            self.image = QImage(file_path)
-            self.display_image()
-
-    def display_image(self):
-        """显示加载的图片，并按比例缩放"""
-        if self.image:
-
-            # 获取 QGraphicsView 的固定大小
-            view_width = self.view.width()
-            view_height = self.view.height()
-
-            # 等比例缩放图片
-            scaled_image = self.image.scaled(view_width, view_height, Qt.AspectRatioMode.KeepAspectRatio,
-                                             Qt.TransformationMode.SmoothTransformation)
-            pixmap = QPixmap.fromImage(scaled_image)
-            # 创建 QGraphicsPixmapItem 并添加到场景
-            pixmap_item = QGraphicsPixmapItem(pixmap)
-            self.scene.clear()  # 清空场景
-            self.scene.addItem(pixmap_item)  # 添加图片到场景
+            self.open_image(file_path)
+
+    def open_image(self, file_path):
+        """加载图片，已解码的图片直接从全局缓存获取"""
+        self.image_path = file_path
+        self.file_metrics = FileMetrics(file_path)
+        self.file_metrics.bytes_in = os.path.getsize(file_path)
+        self.large_image_path = None if TileUtil.fits_in_budget(file_path) else file_path
+        self.angle = 0
+        self.view.set_rotation(0)
+        with self.file_metrics.stage("decode"):
+            if self.large_image_path:
+                # 大图由查看器在后台解码并生成金字塔
+                self.image_array = None
+                self.image = None
+                self.view.set_path(file_path)
+            else:
+                image_array = ImageCache().get(file_path)
+                if image_array is None:
+                    return
+                self.set_array(image_array)
+        self.send_button.setEnabled(True)
+
+    def open_buffer(self, image, image_path):
+        """接收其他工具页已解码（可能已编辑）的 BGR/BGRA 图片，不再读取文件；路径只用于显示和指标"""
+        self.image_path = image_path
+        self.file_metrics = FileMetrics(image_path)
+        self.file_metrics.bytes_in = os.path.getsize(image_path)
+        self.large_image_path = None
+        self.angle = 0
+        self.view.set_rotation(0)
+        self.set_array(image)
+        self.send_button.setEnabled(True)
+
+    def set_array(self, image_array):
+        self.image_array = image_array
+        self.image = QImageUtil.from_array(image_array)
+        self.view.set_image(image_array)
+
+    def current_image(self):
+        """发送给其他工具页的图片，包含当前的旋转；大图返回 None，由目标页按路径分块打开"""
+        if self.large_image_path or self.image_array is None:
+            return None
+        if not self.angle:
+            return self.image_array
+        # 顺时针旋转，与预览和保存的方向一致
+        return np.ascontiguousarray(np.rot90(self.image_array, -self.angle // 90))
 
     def rotate_image(self):
-        """旋转图像 90 度"""
-        if self.image:
-            transform = QTransform()
-            transform.rotate(90)
-            rotated_image = self.image.transformed(transform)
-
-            # 更新图像
-            pixmap = QPixmap.fromImage(rotated_image)
-
-            # 获取 QGraphicsView 的固定大小
-            view_width = self.view.width()
-            view_height = self.view.height()
-
-            # 等比例缩放图片
-            pixmap = pixmap.scaled(view_width, view_height, Qt.AspectRatioMode.KeepAspectRatio)
-
-            # 创建 QGraphicsPixmapItem 并添加到场景
-            pixmap_item = QGraphicsPixmapItem(pixmap)
-            self.scene.clear()  # 清空场景
-            self.scene.addItem(pixmap_item)  # 添加旋转后的图片到场景
-
-            self.image = rotated_image  # 更新原始图像
+        """旋转图像 90 度，只旋转显示"""
+        if self.image_path:
+            self.angle = (self.angle + 90) % 360
+            self.view.set_rotation(self.angle)
 
     def save_image(self):
         """保存旋转后的图片"""
-        if self.image:
+        if self.image_path:
             file_path, _ = QFileDialog.getSaveFileName(self, "保存图片", "", "Image Files (*.png *.jpg *.bmp)")
             if file_path:
-                self.image.save(file_path)
+                metrics = self.file_metrics or FileMetrics(file_path)
+                try:
+                    if self.large_image_path:
+                        self.save_large_image(file_path, metrics)
+                    else:
+                        with metrics.stage("transform"):
+                            rotated_image = rotate_qimage(self.image, self.angle) if self.angle else self.image
+                        metrics.pixel_bytes = rotated_image.sizeInBytes()
+                        # 先编码到内存再写文件，分别统计耗时
+                        with metrics.stage("encode"):
+                            image_format = os.path.splitext(file_path)[1][1:].upper() or "PNG"
+                            data = QImageUtil.encode(rotated_image, image_format)
+                        with metrics.stage("write"):
+                            with open(file_path, "wb") as file:
+                                file.write(data)
+                        metrics.bytes_out = len(data)
+                except (OSError, ValueError) as e:
+                    MessageUtil.show_error_message(f"保存失败: {e}")
+                    return
+                job_metrics = JobMetrics("rotate", trace_memory=False)
+                job_metrics.add(metrics.finish())
+                job_metrics.finish().export()
+                # 同一张图片再次保存时重新统计
+                self.file_metrics = FileMetrics(metrics.path)
+
+    def save_large_image(self, file_path, metrics):
+        """大图解码到内存映射缓冲，按条带旋转后流式编码保存"""
+        with metrics.stage("decode"):
+            frame = TileUtil.open_frame(self.large_image_path)
+        with frame:
+            with metrics.stage("transform"):
+                rotated_frame = TileUtil.rotate(frame, self.angle)
+            with rotated_frame:
+                metrics.pixel_bytes = TileUtil.estimate_frame_bytes(rotated_frame.image.size,
+                                                                    rotated_frame.image.mode)
+                with metrics.stage("encode"):
+                    metrics.bytes_out = TileUtil.save(rotated_frame, file_path)
+
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
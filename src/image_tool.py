@@ -6,12 +6,17 @@ from fs_base.widget import ToolBoxAnimation, TabAnimation
 from loguru import logger
 
 from src.batch_watermark import BatchWatermarkApp
+from src.batch_convert import BatchConvertApp
+from src.batch_strip import BatchStripApp
+from src.batch_watch import BatchWatchApp
 from src.const.fs_constants import FsConstants
 from src.image_compressor import ImageCompressor
 from src.image_editor import ImageEditor
 from src.image_resize import ImageResizeApp
 from src.image_rotate import ImageRotateApp
 from src.util.common_util import CommonUtil
+from src.util.job_scheduler import collect_paths
+from src.widget.job_panel import JobPanel
 
 
 
@@ -64,6 +69,12 @@ class ImageToolApp(QWidget):
             ]),
             ("批量", [
                 (BatchWatermarkApp(), "加水印"),
+                (BatchConvertApp(), "格式转换"),
+                (BatchStripApp(), "去元数据"),
+                (BatchWatchApp(), "监视文件夹"),
+            ]),
+            ("任务", [
+                (JobPanel(), "队列"),
             ]),
             # ("高级", [
             #     (FileGeneratorApp(), "文件生成"),
@@ -74,6 +85,7 @@ class ImageToolApp(QWidget):
 
         for toolbox_title, tabs in toolbox_data:
             tab_widget = self.create_tab_widget(tabs)
+            self.connect_send_targets(tab_widget, tabs)
             self.toolbox.addItem(tab_widget, toolbox_title)
 
     @staticmethod
@@ -92,6 +104,59 @@ class ImageToolApp(QWidget):
 
         return tab_widget
 
+    def connect_send_targets(self, tab_widget, tabs):
+        """为带“发送到”按钮的工具页填充同组的其他工具页"""
+        targets = [(tab, title) for tab, title in tabs if hasattr(tab, "send_button")]
+        for tab, _ in targets:
+            tab.send_button.set_targets([(title, target) for target, title in targets if target is not tab])
+            tab.send_button.send_requested.connect(
+                lambda target, source=tab: self.send_to_tab(tab_widget, source, target))
+
+    @staticmethod
+    def send_to_tab(tab_widget, source, target):
+        """
+        把源工具页当前的图片（含裁剪、缩放等编辑）直接交给目标工具页，不再读取文件；
+        路径只用于显示和保存的默认值。超出内存预算的大图没有整帧数组，目标页按路径分块打开
+        """
+        if not source.image_path:
+            return
+        image = source.current_image()
+        logger.info(f"发送图片到其他工具页: {source.image_path}")
+        if image is not None:
+            target.open_buffer(image, source.image_path)
+        else:
+            target.open_image(source.image_path)
+        tab_widget.setCurrentWidget(target)
+
+    def current_tab(self):
+        tab_widget = self.toolbox.currentWidget()
+        return tab_widget.currentWidget() if tab_widget is not None else None
+
+    def dragEnterEvent(self, event):
+        if event.mimeData().hasUrls():
+            event.acceptProposedAction()
+
+    def dropEvent(self, event):
+        paths = [url.toLocalFile() for url in event.mimeData().urls() if url.isLocalFile()]
+        if paths:
+            self.handle_dropped_paths(paths)
+            event.acceptProposedAction()
+
+    def handle_dropped_paths(self, paths):
+        """
+        拖入的文件和文件夹交给当前工具页：批量页提交为后台任务，单图页打开第一张图片
+        """
+        tab = self.current_tab()
+        if hasattr(tab, "create_jobs"):
+            jobs = tab.create_jobs(paths)
+            logger.info(f"拖放提交 {len(jobs)} 个任务: {paths}")
+        elif hasattr(tab, "open_image"):
+            images = collect_paths(paths, FsConstants.BATCH_IMAGE_EXTENSIONS)
+            if images:
+                logger.info(f"拖放打开图片: {images[0]}")
+                tab.open_image(images[0])
+        else:
+            logger.info(f"当前页不支持拖放: {paths}")
 
     def closeEvent(self, event):
         """窗口关闭事件"""
@@ -1,35 +1,25 @@
 import sys
 import platform
-import tempfile
-from PySide6.QtGui import QAction, QIcon
-from PySide6.QtWidgets import QMenuBar, QMenu, QMainWindow, QTextEdit, QVBoxLayout, QWidget, QSystemTrayIcon, QMenu
+from PySide6.QtCore import QTimer
+from PySide6.QtGui import QIcon, QColor, QTextCharFormat, QTextCursor
+from PySide6.QtWidgets import QVBoxLayout, QHBoxLayout, QPlainTextEdit, QLabel, QComboBox, QPushButton
 from fs_base.widget import MenuWindow
 
 from src.const.fs_constants import FsConstants
-import os
 from src.util.common_util import CommonUtil
+from src.util.log_sink import LogSink
 from loguru import logger
 
 
-
 class LogStream:
-    """自定义日志流，将输出重定向到 QTextEdit"""
+    """自定义日志流，将 print 等标准输出重定向到日志缓冲"""
 
-    def __init__(self, text_edit):
-        self.text_edit = text_edit
+    def __init__(self, sink):
+        self.sink = sink
 
     def write(self, message):
-        """将信息写入 QTextEdit 控件"""
-        if self.text_edit:
-            # 根据日志级别设置颜色
-            if "ERROR" in message:
-                self.text_edit.setTextColor("red")  # 错误信息为红色
-            elif "WARNING" in message:
-                self.text_edit.setTextColor("orange")  # 警告信息为橙色
-            else:
-                self.text_edit.setTextColor("black")  # 普通信息为黑色
-
-            self.text_edit.append(message.strip())  # 去掉多余换行符
+        """写入日志缓冲，由日志窗口定时批量渲染"""
+        self.sink.write(message)
 
     def flush(self):
         """flush 方法用于兼容 sys.stdout"""
@@ -39,6 +29,14 @@ class LogStream:
 class LogWindow(MenuWindow):
     """日志窗口类"""
 
+    # 级别筛选项：显示名称 -> 最低级别
+    LEVEL_FILTERS = [
+        ("全部", 0),
+        ("INFO", FsConstants.LOG_LEVEL_INFO),
+        ("WARNING", FsConstants.LOG_LEVEL_WARNING),
+        ("ERROR", FsConstants.LOG_LEVEL_ERROR),
+    ]
+
     def __init__(self):
         super().__init__()
         self.setWindowTitle("日志窗口")
@@ -47,10 +45,28 @@ class LogWindow(MenuWindow):
 
         self.setGeometry(0, 0, 800, 400)
         self.layout = QVBoxLayout(self)
-
-        # 创建 QTextEdit 控件来显示日志
-        self.log_text_edit = QTextEdit(self)
+        self.sink = LogSink()
+        self.min_level = 0
+        self.formats = self.create_formats()
+
+        # 级别筛选和清空按钮
+        filter_layout = QHBoxLayout()
+        filter_layout.addWidget(QLabel("级别:"))
+        self.level_combo = QComboBox()
+        self.level_combo.addItems([name for name, _ in self.LEVEL_FILTERS])
+        self.level_combo.currentIndexChanged.connect(self.apply_level_filter)
+        filter_layout.addWidget(self.level_combo)
+        filter_layout.addStretch()
+        clear_button = QPushButton("清空")
+        clear_button.clicked.connect(self.clear_logs)
+        filter_layout.addWidget(clear_button)
+        self.layout.addLayout(filter_layout)
+
+        # 纯文本控件按块布局，只排版可见区域；超过最大行数时自动丢弃最早的行
+        self.log_text_edit = QPlainTextEdit(self)
         self.log_text_edit.setReadOnly(True)
+        self.log_text_edit.setUndoRedoEnabled(False)
+        self.log_text_edit.setMaximumBlockCount(FsConstants.LOG_MAX_LINES)
 
         self.layout.addWidget(self.log_text_edit)
         self.setLayout(self.layout)
@@ -59,15 +75,83 @@ class LogWindow(MenuWindow):
         self.original_stdout = sys.stdout
         self.original_stderr = sys.stderr
 
-        # 将日志输出到 QTextEdit
-        sys.stdout = LogStream(self.log_text_edit)
-        sys.stderr = LogStream(self.log_text_edit)
-        logger.add(sys.stdout, level="INFO")
-        logger.add(sys.stdout, level="WARNING")
-        logger.add(sys.stderr, level="ERROR")
+        # 将标准输出写入日志缓冲
+        sys.stdout = LogStream(self.sink)
+        sys.stderr = LogStream(self.sink)
+        # 回放窗口创建前的日志
+        self.append_records(self.sink.replay(), 0)
         # 添加基础信息
         self.add_basic_info()
 
+        # 定时批量刷新
+        self.flush_timer = QTimer(self)
+        self.flush_timer.timeout.connect(self.flush_pending)
+        self.flush_timer.start(FsConstants.LOG_FLUSH_INTERVAL)
+
+    @staticmethod
+    def create_formats():
+        """每个级别一份字符格式，批量插入时复用"""
+        formats = {}
+        for level, color in ((FsConstants.LOG_LEVEL_ERROR, "red"), (FsConstants.LOG_LEVEL_WARNING, "orange"),
+                             (0, "black")):
+            text_format = QTextCharFormat()
+            text_format.setForeground(QColor(color))
+            formats[level] = text_format
+        return formats
+
+    def get_format(self, level):
+        if level >= FsConstants.LOG_LEVEL_ERROR:
+            return self.formats[FsConstants.LOG_LEVEL_ERROR]
+        if level >= FsConstants.LOG_LEVEL_WARNING:
+            return self.formats[FsConstants.LOG_LEVEL_WARNING]
+        return self.formats[0]
+
+    def flush_pending(self):
+        """把缓冲中的日志批量追加到界面，窗口隐藏时不渲染"""
+        if not self.isVisible():
+            return
+        records, dropped = self.sink.drain(FsConstants.LOG_FLUSH_LIMIT)
+        if records or dropped:
+            self.append_records(records, dropped)
+
+    def append_records(self, records, dropped):
+        """一次编辑块内追加多条记录，只触发一次重新布局"""
+        scroll_bar = self.log_text_edit.verticalScrollBar()
+        at_bottom = scroll_bar.value() >= scroll_bar.maximum()
+
+        document = self.log_text_edit.document()
+        cursor = QTextCursor(document)
+        cursor.movePosition(QTextCursor.MoveOperation.End)
+        cursor.beginEditBlock()
+        if dropped:
+            records = [(FsConstants.LOG_LEVEL_WARNING, f"...... 日志过多，已省略 {dropped} 条 ......")] + records
+        for level, text in records:
+            if document.characterCount() > 1:
+                cursor.insertBlock()
+            cursor.insertText(text, self.get_format(level))
+            block = cursor.block()
+            # 记录级别，筛选时只切换块的可见性，不重新生成文本
+            block.setUserState(level)
+            block.setVisible(level >= self.min_level)
+        cursor.endEditBlock()
+
+        if at_bottom:
+            scroll_bar.setValue(scroll_bar.maximum())
+
+    def apply_level_filter(self, index):
+        """按最低级别切换块的可见性"""
+        self.min_level = self.LEVEL_FILTERS[index][1]
+        document = self.log_text_edit.document()
+        block = document.firstBlock()
+        while block.isValid():
+            block.setVisible(block.userState() >= self.min_level)
+            block = block.next()
+        document.markContentsDirty(0, document.characterCount())
+        self.log_text_edit.viewport().update()
+
+    def clear_logs(self):
+        self.log_text_edit.clear()
+
     @staticmethod
     def add_basic_info():
         """添加系统和环境基础信息"""
@@ -1,12 +1,10 @@
-import base64
 import datetime
 import sys
-import uuid
 
-import requests
 from PySide6.QtWidgets import QWidget, QVBoxLayout, QGridLayout, QSystemTrayIcon, QMenu, QMainWindow, QLabel, QTextEdit, \
     QFileDialog
 
+from PySide6.QtCore import QTimer
 from PySide6.QtGui import QIcon, Qt, QDragEnterEvent, QDropEvent
 from fs_base.app_mini import AppMini
 from fs_base.app_tray_menu import AppTrayMenu
@@ -16,6 +14,7 @@ from loguru import logger
 from src.util.common_util import CommonUtil
 from src.const.fs_constants import FsConstants
 from src.util.menu_bar import MenuBar
+from src.util.watch_folder import WatchFolderService
 
 
 class MainWindow(QMainWindow):
@@ -53,9 +52,29 @@ class MainWindow(QMainWindow):
 
         # 创建主布局
         main_layout = QVBoxLayout(central_widget)
-        image_tool = ImageToolApp()
+        self.image_tool = ImageToolApp()
 
-        main_layout.addWidget(image_tool)  # 将其添加到布局中
+        main_layout.addWidget(self.image_tool)  # 将其添加到布局中
+
+        # 监视文件夹在后台运行，窗口显示后按保存的配置恢复
+        self.watch_service = WatchFolderService()
+        self.watch_service.batch_done.connect(self.on_watch_batch_done)
+        QTimer.singleShot(0, self.watch_service.start_from_config)
+
+    # 隐藏到托盘时用通知提示监视文件夹的处理结果
+    def on_watch_batch_done(self, results):
+        if not results or self.isVisible():
+            return
+        failed = sum(1 for result in results if result["error"])
+        message = f"已处理 {len(results) - failed} 个文件" + (f"，失败 {failed} 个" if failed else "")
+        self.tray_menu.tray_icon.showMessage("监视文件夹", message, QSystemTrayIcon.MessageIcon.Information)
+
+    # 拖放到窗口边缘时交给工具页处理
+    def dragEnterEvent(self, event: QDragEnterEvent):
+        self.image_tool.dragEnterEvent(event)
+
+    def dropEvent(self, event: QDropEvent):
+        self.image_tool.dropEvent(event)
 
     # 从托盘菜单点击显示主界面
     def tray_menu_show_main(self):
@@ -1,7 +1,7 @@
 from PySide6.QtCore import Qt, Signal
 from PySide6.QtWidgets import (
     QApplication, QWidget, QGroupBox, QVBoxLayout, QHBoxLayout, QLabel,
-    QLineEdit, QPushButton, QFileDialog, QMessageBox, QCheckBox, QSlider
+    QLineEdit, QPushButton, QFileDialog, QMessageBox, QCheckBox, QSlider, QSpinBox
 )
 from PySide6.QtGui import QIcon
 import os
@@ -92,6 +92,20 @@ class OptionGeneral(MenuWindow):
             self.tray_menu_checkbox.setChecked(True)
             self.tray_menu_path_input.setText(self.config_manager.get_config(FsConstants.APP_TRAY_MENU_IMAGE_KEY))
 
+        # 同时解码的图片内存上限，超出时后续图片排队，单张超出的大图分块处理
+        memory_layout = QHBoxLayout()
+        memory_layout.addWidget(QLabel("解码内存预算(MB):"))
+        self.memory_budget_spinbox = QSpinBox()
+        self.memory_budget_spinbox.setRange(FsConstants.ADMISSION_MEMORY_BUDGET_MIN,
+                                            FsConstants.ADMISSION_MEMORY_BUDGET_MAX)
+        self.memory_budget_spinbox.setSingleStep(128)
+        self.memory_budget_spinbox.setValue(
+            self.config_manager.get_config(FsConstants.ADMISSION_MEMORY_BUDGET_KEY) or
+            FsConstants.ADMISSION_MEMORY_BUDGET_DEFAULT)
+        memory_layout.addWidget(self.memory_budget_spinbox)
+        memory_layout.addStretch()
+        layout.addLayout(memory_layout)
+
         group_box.setLayout(layout)
         return group_box
 
@@ -250,6 +264,8 @@ class OptionGeneral(MenuWindow):
             if tray_menu_enabled:
                 self.config_manager.set_config(FsConstants.APP_TRAY_MENU_IMAGE_KEY,
                                                self.tray_menu_path_input.text().strip())
+            self.config_manager.set_config(FsConstants.ADMISSION_MEMORY_BUDGET_KEY,
+                                           self.memory_budget_spinbox.value())
             MessageUtil.show_success_message("设置已成功保存！")
         except Exception as e:
             MessageUtil.show_error_message(f"保存设置失败: {e}")
@@ -1,9 +1,27 @@
+import datetime
+import json
+import os
+import queue
 import sys
+import threading
+import time
+
+import cv2
 from PySide6.QtWidgets import (
-    QApplication, QMainWindow, QLabel, QPushButton, QFileDialog, QVBoxLayout, QWidget
+    QApplication, QMainWindow, QLabel, QPushButton, QFileDialog, QVBoxLayout, QHBoxLayout, QWidget, QSpinBox,
+    QComboBox
 )
-from PySide6.QtCore import Qt, QRect, Signal, QPoint
-from PySide6.QtGui import QPixmap, QImage, QPainter, QColor, QScreen
+from PySide6.QtCore import Qt, QRect, QRectF, Signal, QPoint, QThread, QTimer
+from PySide6.QtGui import QPixmap, QImage, QPainter, QColor
+from fs_base.message_util import MessageUtil
+from loguru import logger
+
+from src.const.fs_constants import FsConstants
+from src.util.burst_capture_util import BurstCaptureUtil
+from src.util.qimage_util import QImageUtil
+from src.util.screen_capture_util import ScreenCaptureUtil
+from src.util.screenshot_encoder import ScreenshotEncoder
+from src.widget.screenshot_history import ScreenshotHistory
 
 
 class ScreenshotTool(QMainWindow):
@@ -26,12 +44,56 @@ class ScreenshotTool(QMainWindow):
         self.save_screenshot_btn = QPushButton("保存截图", self)
         self.save_screenshot_btn.clicked.connect(self.save_screenshot)
 
+        # 保存格式和压缩级别/质量
+        self.format_combo = QComboBox(self)
+        self.format_combo.addItems(FsConstants.SCREENSHOT_FORMATS)
+        self.format_combo.currentTextChanged.connect(self.on_format_changed)
+        self.level_label = QLabel(self)
+        self.level_spinbox = QSpinBox(self)
+        self.on_format_changed(self.format_combo.currentText())
+
+        # 截图历史
+        self.history = ScreenshotHistory(self)
+        self.history.entry_activated.connect(self.copy_history_entry)
+
+        # 后台编码
+        self.encoder = ScreenshotEncoder(self)
+        self.encoder.saved.connect(lambda path: self.statusBar().showMessage(f"已保存: {path}"))
+        self.encoder.failed.connect(lambda message: MessageUtil.show_error_message(f"保存截图失败：\n{message}"))
+        self.encoder.history_ready.connect(self.history.add_entry)
+
+        # 连拍：间隔、输出格式、开始/停止
+        self.burst_interval_spinbox = QSpinBox(self)
+        self.burst_interval_spinbox.setRange(FsConstants.BURST_INTERVAL_MIN, FsConstants.BURST_INTERVAL_MAX)
+        self.burst_interval_spinbox.setValue(FsConstants.BURST_INTERVAL_DEFAULT)
+        self.burst_interval_spinbox.setSuffix(" ms")
+        self.burst_format_combo = QComboBox(self)
+        self.burst_format_combo.addItems(FsConstants.BURST_FORMATS)
+        self.burst_btn = QPushButton("开始连拍", self)
+        self.burst_btn.clicked.connect(self.toggle_burst_capture)
+        self.burst_status_label = QLabel(self)
+
         # 主布局
         layout = QVBoxLayout()
         layout.addWidget(self.image_label)
         layout.addWidget(self.full_screenshot_btn)
         layout.addWidget(self.region_screenshot_btn)
         layout.addWidget(self.save_screenshot_btn)
+        format_layout = QHBoxLayout()
+        format_layout.addWidget(QLabel("保存格式:", self))
+        format_layout.addWidget(self.format_combo)
+        format_layout.addWidget(self.level_label)
+        format_layout.addWidget(self.level_spinbox)
+        layout.addLayout(format_layout)
+        layout.addWidget(self.history)
+        burst_layout = QHBoxLayout()
+        burst_layout.addWidget(QLabel("连拍间隔:", self))
+        burst_layout.addWidget(self.burst_interval_spinbox)
+        burst_layout.addWidget(QLabel("格式:", self))
+        burst_layout.addWidget(self.burst_format_combo)
+        burst_layout.addWidget(self.burst_btn)
+        layout.addLayout(burst_layout)
+        layout.addWidget(self.burst_status_label)
 
         container = QWidget()
         container.setLayout(layout)
@@ -39,25 +101,32 @@ class ScreenshotTool(QMainWindow):
 
         # 截图数据
         self.screenshot = None
+        # 连拍
+        self.burst_timer = QTimer(self)
+        self.burst_timer.timeout.connect(self.capture_burst_frame)
+        self.burst_encoder = None
+        self.burst_dropped = 0
 
     def take_full_screenshot(self):
-        """全屏截图"""
-        screen = QApplication.primaryScreen()
-        screenshot = screen.grabWindow(0)  # 截取整个屏幕
-        self.screenshot = screenshot.toImage()
+        """全屏截图，截取所有显示器"""
+        self.screenshot = ScreenCaptureUtil.grab_virtual_desktop()
         self.display_screenshot()
+        self.encoder.add_to_history(self.screenshot)
 
     def start_region_screenshot(self):
         """启动区域截图模式"""
         self.hide()  # 隐藏主窗口
-        self.region_window = RegionCaptureWindow()
+        self.region_window = RegionCaptureWindow(image_format=self.format_combo.currentText())
         self.region_window.region_selected.connect(self.region_screenshot_taken)
-        self.region_window.showFullScreen()
+        self.region_window.save_requested.connect(self.save_image)
+        self.region_window.canceled.connect(self.show)
+        self.region_window.show_on_desktop()
 
     def region_screenshot_taken(self, image):
         """接收区域截图并显示"""
         self.screenshot = image
         self.display_screenshot()
+        self.encoder.add_to_history(image)
         self.show()  # 显示主窗口
 
     def display_screenshot(self):
@@ -70,36 +139,241 @@ class ScreenshotTool(QMainWindow):
         """保存截图到文件"""
         if self.screenshot is None:
             return
-        options = QFileDialog.Options()
-        file_path, _ = QFileDialog.getSaveFileName(self, "保存截图", "", "PNG Files (*.png);;All Files (*)", options=options)
+        file_path = get_save_path(self, self.format_combo.currentText())
         if file_path:
-            self.screenshot.save(file_path)
+            self.save_image(self.screenshot, file_path)
+
+    def save_image(self, image, file_path):
+        """按当前选择的格式在后台编码保存"""
+        self.encoder.save(image, file_path, self.format_combo.currentText(), self.level_spinbox.value())
+
+    def on_format_changed(self, image_format):
+        if image_format == FsConstants.SCREENSHOT_FORMAT_PNG:
+            self.level_label.setText("压缩级别:")
+            self.level_spinbox.setRange(0, 9)
+            self.level_spinbox.setValue(FsConstants.SCREENSHOT_PNG_LEVEL_DEFAULT)
+        else:
+            self.level_label.setText("质量:")
+            self.level_spinbox.setRange(1, 100)
+            self.level_spinbox.setValue(FsConstants.SCREENSHOT_QUALITY_DEFAULT)
+
+    def copy_history_entry(self, entry):
+        """把历史截图重新复制到剪贴板"""
+        QApplication.clipboard().setImage(entry.to_image())
+        self.statusBar().showMessage(f"已复制 {entry.created.strftime('%H:%M:%S')} 的截图到剪贴板")
+
+
+    def toggle_burst_capture(self):
+        if self.burst_timer.isActive():
+            self.stop_burst_capture()
+        else:
+            self.start_burst_capture()
+
+    def start_burst_capture(self):
+        """按间隔截取整个桌面，帧差分和编码在后台线程进行"""
+        folder = QFileDialog.getExistingDirectory(self, "选择连拍保存文件夹")
+        if not folder:
+            return
+        session_folder = os.path.join(folder, datetime.datetime.now().strftime("burst_%Y%m%d_%H%M%S"))
+        os.makedirs(session_folder, exist_ok=True)
+        interval = self.burst_interval_spinbox.value()
+        self.burst_encoder = BurstEncoder(session_folder, self.burst_format_combo.currentText(), interval)
+        self.burst_encoder.progress.connect(self.on_burst_progress)
+        self.burst_encoder.error.connect(lambda message: MessageUtil.show_error_message(f"连拍保存失败：\n{message}"))
+        self.burst_encoder.finished.connect(self.on_burst_finished)
+        self.burst_encoder.start()
+        self.burst_dropped = 0
+        self.burst_timer.start(interval)
+        self.capture_burst_frame()
+        self.burst_btn.setText("停止连拍")
+        self.burst_interval_spinbox.setEnabled(False)
+        self.burst_format_combo.setEnabled(False)
+
+    def capture_burst_frame(self):
+        """截屏只能在界面线程进行，截好后交给编码线程；编码跟不上时丢弃本帧，不阻塞界面"""
+        if not self.burst_encoder.submit(ScreenCaptureUtil.grab_virtual_desktop(), time.monotonic()):
+            self.burst_dropped += 1
+
+    def stop_burst_capture(self):
+        self.burst_timer.stop()
+        self.burst_encoder.finish()
+        self.burst_btn.setEnabled(False)
+
+    def on_burst_progress(self, captured, stored):
+        text = f"已截取 {captured} 帧，保存变化的 {stored} 帧"
+        if self.burst_dropped:
+            text += f"，编码繁忙丢弃 {self.burst_dropped} 帧"
+        self.burst_status_label.setText(text)
+
+    def on_burst_finished(self):
+        # 编码线程出错提前结束时也停止截屏
+        self.burst_timer.stop()
+        folder = self.burst_encoder.folder
+        self.burst_encoder = None
+        self.burst_btn.setText("开始连拍")
+        self.burst_btn.setEnabled(True)
+        self.burst_interval_spinbox.setEnabled(True)
+        self.burst_format_combo.setEnabled(True)
+        self.burst_status_label.setText(f"{self.burst_status_label.text()}，已保存到 {folder}")
+
+    def closeEvent(self, event):
+        if self.burst_timer.isActive():
+            self.stop_burst_capture()
+        if self.burst_encoder is not None:
+            self.burst_encoder.wait()
+        self.encoder.wait()
+        super().closeEvent(event)
+
+
+def get_save_path(parent, image_format):
+    """选择保存路径，没有扩展名时按格式补上"""
+    extension = ScreenshotEncoder.default_extension(image_format)
+    file_path, _ = QFileDialog.getSaveFileName(parent, "保存截图", "",
+                                               f"{image_format} Files (*{extension});;All Files (*)")
+    return ScreenshotEncoder.with_extension(file_path, image_format) if file_path else ""
+
+
+class BurstEncoder(QThread):
+    """
+    连拍编码线程：与上一帧按块比较，图片格式只保存变化区域（外接矩形），没有变化的帧不保存，
+    每个保存的区域在 frames.jsonl 中记录时间和位置，可据此还原每一帧；
+    视频格式每帧都写入，画面不变的帧由视频编码压缩
+    """
+    progress = Signal(int, int)  # 已截取帧数, 已保存帧数
+    error = Signal(str)
+
+    def __init__(self, folder, output_format, interval):
+        super().__init__()
+        self.folder = folder
+        self.output_format = output_format
+        self.interval = interval
+        self.frames = queue.Queue(maxsize=FsConstants.BURST_QUEUE_SIZE)
+        self.finishing = threading.Event()
+        self.previous = None
+        self.start_time = None
+        self.captured = 0
+        self.stored = 0
+        self.writer = None
+        self.size = None  # 视频尺寸
+
+    def submit(self, image, timestamp):
+        """:return: 队列已满丢弃本帧时返回 False"""
+        try:
+            self.frames.put_nowait((image, timestamp))
+            return True
+        except queue.Full:
+            return False
+
+    def finish(self):
+        """处理完已排队的帧后结束；不向有界队列放结束标记，编码跟不上时也不阻塞界面线程"""
+        self.finishing.set()
+
+    def run(self):
+        manifest = None
+        try:
+            if self.output_format != FsConstants.BURST_FORMAT_VIDEO:
+                manifest = open(os.path.join(self.folder, FsConstants.BURST_MANIFEST_FILE), "w", encoding="utf-8")
+            while True:
+                try:
+                    image, timestamp = self.frames.get(timeout=FsConstants.BURST_POLL_INTERVAL)
+                except queue.Empty:
+                    if self.finishing.is_set():
+                        break
+                    continue
+                if self.start_time is None:
+                    self.start_time = timestamp
+                self.encode_frame(QImageUtil.to_array(image), round((timestamp - self.start_time) * 1000), manifest)
+                self.captured += 1
+                self.progress.emit(self.captured, self.stored)
+        except Exception as e:
+            logger.error(f"连拍编码失败: {e}")
+            self.error.emit(str(e))
+        finally:
+            if manifest is not None:
+                manifest.close()
+            if self.writer is not None:
+                self.writer.release()
+            self.previous = None
+            # 出错后清空队列，避免界面线程还在提交时阻塞
+            while not self.frames.empty():
+                self.frames.get_nowait()
+        logger.info(f"连拍结束：截取 {self.captured} 帧，保存 {self.stored} 帧，{self.folder}")
+
+    def encode_frame(self, frame, time_ms, manifest):
+        if self.output_format == FsConstants.BURST_FORMAT_VIDEO:
+            self.write_video_frame(frame)
+            self.previous = frame
+            return
+        rect = BurstCaptureUtil.changed_rect(self.previous, frame, FsConstants.BURST_BLOCK_SIZE)
+        self.previous = frame
+        if rect is None:
+            return
+        x, y, width, height = rect
+        region = frame[y:y + height, x:x + width, :3]
+        if self.output_format == FsConstants.BURST_FORMAT_WEBP:
+            extension, params = ".webp", [cv2.IMWRITE_WEBP_QUALITY, 101]  # 大于 100 为无损
+        else:
+            extension, params = ".png", [cv2.IMWRITE_PNG_COMPRESSION, 3]
+        file_name = f"{self.stored:06d}{extension}"
+        success, buffer = cv2.imencode(extension, region, params)
+        if not success:
+            raise ValueError(f"编码失败: {file_name}")
+        buffer.tofile(os.path.join(self.folder, file_name))
+        manifest.write(json.dumps({"index": self.captured, "time_ms": time_ms, "file": file_name,
+                                   "x": x, "y": y, "width": width, "height": height}) + "\n")
+        self.stored += 1
+
+    def write_video_frame(self, frame):
+        if self.writer is None:
+            height, width = frame.shape[:2]
+            path = os.path.join(self.folder, FsConstants.BURST_VIDEO_FILE)
+            self.writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), 1000 / self.interval,
+                                          (width, height))
+            if not self.writer.isOpened():
+                raise ValueError(f"无法创建视频文件: {path}")
+            self.size = (width, height)
+        if (frame.shape[1], frame.shape[0]) != self.size:
+            # 连拍过程中屏幕布局变化，缩放到视频尺寸
+            frame = cv2.resize(frame, self.size, interpolation=cv2.INTER_AREA)
+        self.writer.write(cv2.cvtColor(frame, cv2.COLOR_BGRA2BGR))
+        self.stored += 1
 
 
 class RegionCaptureWindow(QWidget):
     """用于区域截图的窗口"""
     region_selected = Signal(QImage)
+    save_requested = Signal(QImage, str)  # 截图, 保存路径
+    canceled = Signal()
 
-    def __init__(self):
+    def __init__(self, screens=None, image_format=FsConstants.SCREENSHOT_FORMAT_PNG):
         super().__init__()
+        self.image_format = image_format
         self.setWindowFlags(Qt.WindowType.FramelessWindowHint | Qt.WindowType.WindowStaysOnTopHint | Qt.WindowType.Tool)
 
-        self.setAttribute(Qt.WA_TranslucentBackground, True)
+        # 每次绘制都用截图完整覆盖脏区域，不需要系统先清空背景
+        self.setAttribute(Qt.WidgetAttribute.WA_OpaquePaintEvent, True)
+        self.setAttribute(Qt.WidgetAttribute.WA_NoSystemBackground, True)
         self.setCursor(Qt.CrossCursor)  # 鼠标变为十字形
-        self.setGeometry(QApplication.primaryScreen().geometry())  # 设置窗口为全屏
 
         self.start_point = QPoint()
         self.end_point = QPoint()
         self.is_selecting = False
         # 设置窗口覆盖所有屏幕
-        geometry = QApplication.primaryScreen().geometry()  # 获取多显示器范围
+        self.screens = ScreenCaptureUtil.get_screens(screens)
+        geometry = ScreenCaptureUtil.virtual_geometry(self.screens)  # 获取多显示器范围
         self.setGeometry(geometry)
-        # 获取当前屏幕截图作为背景
-        screen = QApplication.primaryScreen()
-        self.device_pixel_ratio = screen.devicePixelRatio()
-        self.background_pixmap = screen.grabWindow(
-            0, geometry.x(), geometry.y(), geometry.width(), geometry.height()
-        )
+        # 获取所有屏幕拼接的截图作为背景
+        self.device_pixel_ratio = ScreenCaptureUtil.device_pixel_ratio(self.screens)
+        # 截图保持物理分辨率，按设备像素比 1:1 绘制，不在每帧缩放
+        self.background_image = ScreenCaptureUtil.grab_virtual_desktop(self.screens)
+        self.background_pixmap = QPixmap.fromImage(self.background_image)
+        self.result_image = None
+        # 预先生成变暗的背景，拖动时只需从两张缓存图中复制像素
+        self.darkened_pixmap = QPixmap(self.background_pixmap)
+        mask_painter = QPainter(self.darkened_pixmap)
+        mask_painter.fillRect(self.darkened_pixmap.rect(), QColor(0, 0, 0, 100))
+        mask_painter.end()
+        self.selection_rect = QRect()
 
         # 悬浮按钮
         self.copy_button = QPushButton("复制", self)
@@ -109,52 +383,73 @@ class RegionCaptureWindow(QWidget):
         self.copy_button.hide()
         self.save_button.hide()
 
+    def show_on_desktop(self):
+        """单个屏幕时全屏显示；多个屏幕时按虚拟桌面范围显示，全屏只能覆盖一个屏幕"""
+        if len(self.screens) == 1:
+            self.showFullScreen()
+        else:
+            self.show()
+
     def mousePressEvent(self, event):
         if event.button() == Qt.MouseButton.LeftButton:
             self.start_point = event.position().toPoint()
+            self.end_point = self.start_point
+            self.selection_rect = QRect(self.start_point, self.end_point).normalized()
             self.is_selecting = True
+            self.update()  # 开始选择时整个屏幕变暗，只需重绘这一次
 
     def mouseMoveEvent(self, event):
         if self.is_selecting:
             self.end_point = event.position().toPoint()
-            self.update()  # 触发窗口重绘
+            # 只重绘新旧选区的并集，边框线宽向外多留出几个像素
+            old_rect = self.selection_rect
+            self.selection_rect = QRect(self.start_point, self.end_point).normalized()
+            self.update(old_rect.united(self.selection_rect).adjusted(-2, -2, 2, 2))
 
     def mouseReleaseEvent(self, event):
         if event.button() == Qt.MouseButton.LeftButton and self.is_selecting:
             self.is_selecting = False
             self.capture_region()
+
+    def keyPressEvent(self, event):
+        if event.key() == Qt.Key.Key_Escape:
+            self.canceled.emit()
             self.close()
 
     def paintEvent(self, event):
-        """绘制半透明背景和红色矩形"""
+        """只绘制脏区域：选区外为变暗的背景，选区内为原始截图，再画红色边框"""
         painter = QPainter(self)
-        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        dirty = event.rect()
+        if not self.selection_rect.isValid():
+            self.draw_background(painter, self.background_pixmap, dirty)
+            return
 
-        # 绘制背景截图
-        painter.drawPixmap(self.rect(), self.background_pixmap)
+        self.draw_background(painter, self.darkened_pixmap, dirty)
+        selection = self.selection_rect.intersected(dirty)
+        if not selection.isEmpty():
+            self.draw_background(painter, self.background_pixmap, selection)
 
-        # 绘制红色矩形
-        if self.is_selecting:
-            # 绘制半透明遮罩
-            painter.fillRect(self.rect(), QColor(0, 0, 0, 100))
+        # 绘制红色矩形，水平竖直的线不需要抗锯齿
+        painter.setBrush(Qt.BrushStyle.NoBrush)
+        painter.setPen(QColor(255, 0, 0, 200))  # 红色边框
+        painter.drawRect(self.selection_rect)
+
+    def draw_background(self, painter, pixmap, rect):
+        """把截图中与窗口区域 rect 对应的物理像素原样绘制到 rect"""
+        painter.drawPixmap(QRectF(rect), pixmap, self.to_device_rect(rect))
 
-            rect = QRect(self.start_point, self.end_point).normalized()
-            painter.setBrush(Qt.BrushStyle.NoBrush)
-            painter.setPen(QColor(255, 0, 0, 200))  # 红色边框
-            painter.drawRect(rect)
+    def to_device_rect(self, rect):
+        """窗口逻辑坐标 -> 截图物理像素坐标"""
+        ratio = self.device_pixel_ratio
+        return QRectF(rect.x() * ratio, rect.y() * ratio, rect.width() * ratio, rect.height() * ratio)
 
     def capture_region(self):
         """截取选定区域"""
         rect = QRect(self.start_point, self.end_point).normalized()
         # 考虑 DPI 缩放
-        rect = QRect(
-            rect.x() * self.device_pixel_ratio,
-            rect.y() * self.device_pixel_ratio,
-            rect.width() * self.device_pixel_ratio,
-            rect.height() * self.device_pixel_ratio,
-        )
-        self.result_pixmap = self.background_pixmap.copy(rect)
-        #self.region_selected.emit(cropped_pixmap.toImage())
+        rect = self.to_device_rect(rect).toRect()
+        # 从 QImage 裁剪，结果可以直接交给编码线程
+        self.result_image = self.background_image.copy(rect)
         # 显示悬浮按钮
         self.show_buttons()
 
@@ -177,16 +472,16 @@ class RegionCaptureWindow(QWidget):
     def copy_to_clipboard(self):
         """复制截图到剪贴板"""
         clipboard = QApplication.clipboard()
-        clipboard.setPixmap(self.result_pixmap)
+        clipboard.setImage(self.result_image)
+        self.region_selected.emit(self.result_image)
         self.close()
 
     def save_image(self):
-        """保存截图到文件"""
-        options = QFileDialog.Options()
-        file_path, _ = QFileDialog.getSaveFileName(self, "保存截图", "", "PNG Files (*.png);;All Files (*)",
-                                                   options=options)
+        """选择路径后立即关闭，编码和写入由截图工具在后台完成"""
+        file_path = get_save_path(self, self.image_format)
         if file_path:
-            self.result_pixmap.toImage().save(file_path)
+            self.save_requested.emit(self.result_image, file_path)
+        self.region_selected.emit(self.result_image)
         self.close()
 
 
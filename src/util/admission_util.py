@@ -0,0 +1,109 @@
+import threading
+from contextlib import contextmanager
+
+from PIL import Image
+from fs_base.config_manager import ConfigManager, singleton
+from loguru import logger
+
+from src.const.fs_constants import FsConstants
+from src.util.tile_util import TileUtil
+
+
+class AdmissionTicket:
+    """一张图片的内存估算：整帧解码的占用，以及实际处理方式（整帧或分块）的占用"""
+
+    def __init__(self, path, frame_bytes, estimate, cost, tiled, memory_budget):
+        self.path = path
+        self.frame_bytes = frame_bytes
+        self.estimate = estimate  # 整帧解码处理的峰值内存
+        self.cost = cost  # 按 tiled 选择的处理方式的峰值内存
+        self.tiled = tiled
+        self.memory_budget = memory_budget  # 传给 TileUtil 的单帧预算，超过时解码到内存映射缓冲
+
+
+@singleton
+class AdmissionController:
+    """
+    并发解码的准入控制：只读文件头估算每张图片解码后的内存，所有正在处理的图片之和不超过
+    首选项中设置的预算，超出时后来的任务等待；空闲时总会放行一个，单张超大图片也能处理
+    整帧解码会超出预算的图片改走分块路径，占用按条带估算
+    """
+
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.in_use = 0
+
+    @staticmethod
+    def get_budget():
+        """内存预算（字节），在首选项或 app.ini 中配置，单位 MB"""
+        budget_mb = ConfigManager().get_config(FsConstants.ADMISSION_MEMORY_BUDGET_KEY)
+        return max(int(budget_mb or FsConstants.ADMISSION_MEMORY_BUDGET_DEFAULT), 1) * 1024 * 1024
+
+    @staticmethod
+    def read_header(path):
+        """:return: (尺寸, 颜色模式)，PIL 打开时只解析文件头"""
+        with Image.open(path) as image:
+            return image.size, image.mode
+
+    def plan(self, path):
+        try:
+            size, _ = self.read_header(path)
+        except Exception as e:
+            # 读不出文件头的图片解码时也会失败，不占预算
+            logger.warning(f"读取图片尺寸失败: {path} {e}")
+            size = (0, 0)
+        # 各工具解码后统一转换为 RGB/RGBA，每像素按 4 字节估算
+        frame_bytes = TileUtil.estimate_frame_bytes(size, "RGBA")
+        estimate = frame_bytes * FsConstants.ADMISSION_WORK_FACTOR
+        memory_budget = max(min(TileUtil.get_memory_budget(), self.get_budget() // FsConstants.ADMISSION_WORK_FACTOR),
+                            1)
+        tiled = frame_bytes > memory_budget
+        cost = memory_budget // FsConstants.TILE_STRIP_PARTS * FsConstants.ADMISSION_TILED_STRIPS if tiled \
+            else estimate
+        return AdmissionTicket(path, frame_bytes, estimate, cost, tiled, memory_budget)
+
+    def estimate(self, path):
+        """不支持分块的工具（进程池中的转换、量化）按整帧估算"""
+        return self.plan(path).estimate
+
+    def fits(self, cost):
+        """调用方需持有 self.condition"""
+        return self.in_use == 0 or self.in_use + cost <= self.get_budget()
+
+    def try_acquire(self, cost):
+        with self.condition:
+            if not self.fits(cost):
+                return False
+            self.in_use += cost
+            return True
+
+    def acquire(self, cost, stopped=None):
+        """
+        等待预算足够后占用
+        :param stopped: 返回 True 时放弃等待
+        :return: 是否已占用
+        """
+        with self.condition:
+            while not self.fits(cost):
+                if stopped is not None and stopped():
+                    return False
+                self.condition.wait(FsConstants.ADMISSION_WAIT_INTERVAL)
+            self.in_use += cost
+            return True
+
+    def release(self, cost):
+        with self.condition:
+            self.in_use -= cost
+            self.condition.notify_all()
+
+    @contextmanager
+    def admit(self, path):
+        """估算并等待预算，处理完成后释放；:return: AdmissionTicket"""
+        ticket = self.plan(path)
+        if ticket.tiled:
+            logger.info(f"图片超出内存预算，改为分块处理: {path}")
+        self.acquire(ticket.cost)
+        try:
+            yield ticket
+        finally:
+            self.release(ticket.cost)
@@ -0,0 +1,40 @@
+import numpy as np
+
+
+class BurstCaptureUtil:
+    """
+    连拍帧差分：把两帧按块比较，只保留发生变化的区域
+    帧为 (高, 宽, 4) 的 uint8 数组，每个像素按一个 uint32 比较
+    """
+
+    @staticmethod
+    def changed_blocks(previous, current, block):
+        """
+        :return: (块行数, 块列数) 的布尔数组，块内有任一像素不同即为 True
+        """
+        height, width = current.shape[:2]
+        different = np.ascontiguousarray(previous).view(np.uint32)[:, :, 0] != \
+            np.ascontiguousarray(current).view(np.uint32)[:, :, 0]
+        rows, columns = -(-height // block), -(-width // block)
+        # 补齐到块大小的整数倍后按块归约
+        padded = np.zeros((rows * block, columns * block), dtype=bool)
+        padded[:height, :width] = different
+        return padded.reshape(rows, block, columns, block).any(axis=(1, 3))
+
+    @staticmethod
+    def changed_rect(previous, current, block):
+        """
+        变化块的外接矩形，按块对齐并裁剪到帧内
+        :return: (x, y, 宽, 高)，没有变化时返回 None；尺寸不同（屏幕变化）时返回整帧
+        """
+        height, width = current.shape[:2]
+        if previous is None or previous.shape != current.shape:
+            return 0, 0, width, height
+        blocks = BurstCaptureUtil.changed_blocks(previous, current, block)
+        rows = np.flatnonzero(blocks.any(axis=1))
+        if not len(rows):
+            return None
+        columns = np.flatnonzero(blocks.any(axis=0))
+        left, top = columns[0] * block, rows[0] * block
+        right, bottom = min((columns[-1] + 1) * block, width), min((rows[-1] + 1) * block, height)
+        return int(left), int(top), int(right - left), int(bottom - top)
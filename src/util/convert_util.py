@@ -0,0 +1,153 @@
+import io
+import os
+from collections import Counter
+
+from PIL import ExifTags, Image, ImageOps
+from loguru import logger
+
+from src.const.fs_constants import FsConstants
+from src.util.admission_util import AdmissionController
+from src.util.worker_pool import WorkerPool
+
+
+class ConvertUtil:
+    """
+    图片格式转换：按目标格式处理透明通道、选择有损/无损编码、保留或去除 ICC/EXIF
+    先编码到内存，比原文件大时可以不写出
+    """
+
+    # 不支持透明通道、需要铺底色的格式
+    OPAQUE_FORMATS = (FsConstants.CONVERT_FORMAT_JPEG, FsConstants.CONVERT_FORMAT_BMP)
+    # 去除元数据时移除的 info 键（PIL 保存 PNG 时会沿用 info 中的 ICC）
+    METADATA_KEYS = ("icc_profile", "exif", "xmp", "XML:com.adobe.xmp", "comment")
+
+    @staticmethod
+    def output_name(path, image_format, duplicated_stems=()):
+        """输出文件名；同名不同扩展名的输入会转换到同一个名字，加上原扩展名区分"""
+        stem, extension = os.path.splitext(os.path.basename(path))
+        if stem.lower() in duplicated_stems:
+            stem = f"{stem}_{extension.lstrip('.').lower()}"
+        return stem + FsConstants.CONVERT_EXTENSIONS[image_format]
+
+    @staticmethod
+    def flatten(image, background):
+        """透明像素铺到背景色上"""
+        rgba = image.convert("RGBA")
+        base = Image.new("RGBA", rgba.size, background)
+        return Image.alpha_composite(base, rgba).convert("RGB")
+
+    @staticmethod
+    def prepare(image, image_format, background):
+        """转换为目标格式支持的颜色模式"""
+        has_alpha = "A" in image.getbands() or "transparency" in image.info
+        if image_format in ConvertUtil.OPAQUE_FORMATS:
+            if has_alpha:
+                return ConvertUtil.flatten(image, background)
+            return image if image.mode in ("RGB", "L") else image.convert("RGB")
+        if image_format == FsConstants.CONVERT_FORMAT_WEBP:
+            return image if image.mode in ("RGB", "RGBA") else image.convert("RGBA" if has_alpha else "RGB")
+        if image.mode in ("1", "L", "LA", "P", "RGB", "RGBA", "I;16"):
+            return image
+        return image.convert("RGBA" if has_alpha else "RGB")
+
+    @staticmethod
+    def save_params(image_format, quality, lossless, metadata):
+        """各格式的编码参数；metadata 为要写入的 icc_profile/exif"""
+        if image_format == FsConstants.CONVERT_FORMAT_JPEG:
+            params = {"quality": quality, "optimize": True}
+        elif image_format == FsConstants.CONVERT_FORMAT_WEBP:
+            params = {"lossless": True, "quality": 100, "method": 4} if lossless \
+                else {"quality": quality, "method": 4}
+        elif image_format == FsConstants.CONVERT_FORMAT_TIFF:
+            params = {"compression": "tiff_adobe_deflate"} if lossless \
+                else {"compression": "jpeg", "quality": quality}
+        elif image_format == FsConstants.CONVERT_FORMAT_PNG:
+            params = {"optimize": True}
+        else:
+            params = {}
+        if image_format != FsConstants.CONVERT_FORMAT_BMP:
+            params.update(metadata)
+        return params
+
+    @staticmethod
+    def encode(image, image_format, options):
+        """:return: 编码后的字节"""
+        metadata = {}
+        # BMP 不写元数据，同样需要按 EXIF 方向旋转像素
+        keep_metadata = options["keep_metadata"] and image_format != FsConstants.CONVERT_FORMAT_BMP
+        if keep_metadata:
+            for key in ("icc_profile", "exif"):
+                if image.info.get(key):
+                    metadata[key] = image.info[key]
+        owned = False
+        if not keep_metadata and image.getexif().get(ExifTags.Base.Orientation, 1) != 1:
+            # 去掉 EXIF 后查看器不再按方向旋转，先把方向应用到像素上
+            image = ImageOps.exif_transpose(image)
+            owned = True
+        converted = ConvertUtil.prepare(image, image_format, options["background"])
+        if converted is image and not owned:
+            converted = image.copy()
+        for key in ConvertUtil.METADATA_KEYS:
+            converted.info.pop(key, None)
+        if image_format == FsConstants.CONVERT_FORMAT_TIFF and not options["lossless"] \
+                and converted.mode not in ("RGB", "L"):
+            # TIFF 的 JPEG 压缩只支持 RGB/灰度，带透明通道时改用无损压缩
+            options = dict(options, lossless=True)
+        params = ConvertUtil.save_params(image_format, options["quality"], options["lossless"], metadata)
+        buffer = io.BytesIO()
+        converted.save(buffer, FsConstants.CONVERT_PIL_FORMATS[image_format], **params)
+        return buffer.getvalue()
+
+    @staticmethod
+    def convert_file(path, output_path, options):
+        """
+        转换单个文件，供进程池调用
+        :param options: format、quality、lossless、background、keep_metadata、skip_larger
+        :return: {"path", "output", "size_in", "size_out", "skipped", "error"}
+        """
+        result = {"path": path, "output": output_path, "size_in": 0, "size_out": 0, "skipped": False, "error": None}
+        try:
+            result["size_in"] = os.path.getsize(path)
+            with Image.open(path) as image:
+                data = ConvertUtil.encode(image, options["format"], options)
+            result["size_out"] = len(data)
+            if options["skip_larger"] and len(data) >= result["size_in"]:
+                result["skipped"] = True
+                return result
+            with open(output_path, "wb") as file:
+                file.write(data)
+        except Exception as e:
+            result["error"] = str(e)
+        return result
+
+    @staticmethod
+    def convert_folder(paths, output_folder, options, workers=None, on_result=None, stopped=None):
+        """
+        在常驻进程池中批量转换
+        :param workers: 同时转换的文件数，默认为进程池大小
+        :param on_result: 每完成一个文件调用 on_result(结果, 完成数, 总数)
+        :param stopped: 返回 True 时不再开始新的文件
+        :return: 结果列表
+        """
+        stems = Counter(os.path.splitext(os.path.basename(path))[0].lower() for path in paths)
+        duplicated = {stem for stem, count in stems.items() if count > 1}
+        items = [(path, os.path.join(output_folder, ConvertUtil.output_name(path, options["format"], duplicated)),
+                  options) for path in paths]
+        results = []
+        admission = AdmissionController()
+        completed = WorkerPool().map_unordered(ConvertUtil.convert_file, items, workers, stopped,
+                                               lambda item: admission.estimate(item[0]))
+        for (path, output_path, _), future in completed:
+            try:
+                if future.cancelled():
+                    raise ValueError("已取消")
+                result = future.result()
+            except Exception as e:
+                result = {"path": path, "output": output_path, "size_in": 0, "size_out": 0, "skipped": False,
+                          "error": str(e)}
+            if result["error"]:
+                logger.error(f"转换失败: {result['path']} {result['error']}")
+            results.append(result)
+            if on_result is not None:
+                on_result(result, len(results), len(items))
+        return results
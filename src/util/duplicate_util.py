@@ -0,0 +1,216 @@
+import os
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from PIL import Image
+from fs_base.config_manager import singleton
+from loguru import logger
+
+from src.const.fs_constants import FsConstants
+from src.util.common_util import CommonUtil
+
+
+class BKTree:
+    """
+    按汉明距离组织的 BK 树，查找距离不超过 radius 的哈希时只访问可能命中的分支
+    """
+
+    def __init__(self):
+        self.root = None  # [哈希, 数据, {距离: 子节点}]
+
+    @staticmethod
+    def distance(a, b):
+        return bin(a ^ b).count("1")
+
+    def add(self, value, item):
+        if self.root is None:
+            self.root = [value, item, {}]
+            return
+        node = self.root
+        while True:
+            distance = self.distance(value, node[0])
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = [value, item, {}]
+                return
+            node = child
+
+    def search(self, value, radius):
+        """:return: [(距离, 数据)]，按距离从小到大"""
+        results = []
+        nodes = [self.root] if self.root is not None else []
+        while nodes:
+            node = nodes.pop()
+            distance = self.distance(value, node[0])
+            if distance <= radius:
+                results.append((distance, node[1]))
+            # 三角不等式：只有与当前节点距离在 [d - r, d + r] 内的子树可能命中
+            for child_distance, child in node[2].items():
+                if distance - radius <= child_distance <= distance + radius:
+                    nodes.append(child)
+        results.sort(key=lambda result: result[0])
+        return results
+
+
+@singleton
+class HashIndex:
+    """
+    感知哈希索引，保存在 SQLite 中：(路径, 修改时间, 大小) -> (dHash, pHash)
+    再次检测同一文件夹时，只有新增或修改过的文件需要重新解码计算
+    """
+
+    def __init__(self, index_path=None):
+        self.index_path = index_path or os.path.join(CommonUtil.get_external_path(), FsConstants.HASH_INDEX_FILE)
+        os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(self.index_path, check_same_thread=False)
+        self.connection.execute("CREATE TABLE IF NOT EXISTS hashes (path TEXT PRIMARY KEY, folder TEXT, "
+                                "mtime_ns INTEGER, size INTEGER, dhash TEXT, phash TEXT)")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS hashes_folder ON hashes (folder)")
+        self.connection.commit()
+
+    def load(self, folders):
+        """读取若干文件夹的索引：路径 -> (修改时间, 大小, dHash, pHash)"""
+        entries = {}
+        with self.lock:
+            for folder in folders:
+                rows = self.connection.execute("SELECT path, mtime_ns, size, dhash, phash FROM hashes "
+                                               "WHERE folder = ?", (folder,)).fetchall()
+                for path, mtime_ns, size, dhash, phash in rows:
+                    entries[path] = (mtime_ns, size, int(dhash, 16), int(phash, 16))
+        return entries
+
+    def save(self, records):
+        """records: [(路径, 修改时间, 大小, dHash, pHash)]"""
+        rows = [(path, os.path.dirname(path), mtime_ns, size, f"{dhash:016x}", f"{phash:016x}")
+                for path, mtime_ns, size, dhash, phash in records]
+        with self.lock:
+            try:
+                self.connection.executemany("INSERT OR REPLACE INTO hashes VALUES (?, ?, ?, ?, ?, ?)", rows)
+                self.connection.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"写入哈希索引失败: {e}")
+
+    def get_hashes(self, paths):
+        """
+        获取每个文件的 (dHash, pHash)，索引未命中的文件分批解码计算并写回索引
+        :return: 路径 -> (dHash, pHash)，无法解码的文件不包含在内
+        """
+        paths = [os.path.abspath(path) for path in paths]
+        entries = self.load({os.path.dirname(path) for path in paths})
+        hashes = {}
+        missing = []
+        for path in paths:
+            try:
+                stat = os.stat(path)
+            except OSError as e:
+                logger.warning(f"读取图片信息失败: {e}")
+                continue
+            entry = entries.get(path)
+            if entry is not None and entry[0] == stat.st_mtime_ns and entry[1] == stat.st_size:
+                hashes[path] = entry[2:]
+            else:
+                missing.append((path, stat))
+
+        batch = FsConstants.HASH_BATCH_SIZE
+        with ThreadPoolExecutor(max_workers=FsConstants.HASH_WORKERS) as executor:
+            for start in range(0, len(missing), batch):
+                chunk = missing[start:start + batch]
+                # 解码在线程池里进行（PIL 解码时释放 GIL），哈希按批向量化计算
+                loaded = [(path, stat, pixels) for (path, stat), pixels in
+                          zip(chunk, executor.map(DuplicateUtil.load_pixels, [path for path, _ in chunk]))
+                          if pixels is not None]
+                if not loaded:
+                    continue
+                dhashes = DuplicateUtil.dhash_batch(np.stack([pixels[0] for _, _, pixels in loaded]))
+                phashes = DuplicateUtil.phash_batch(np.stack([pixels[1] for _, _, pixels in loaded]))
+                records = []
+                for (path, stat, _), dhash, phash in zip(loaded, dhashes.tolist(), phashes.tolist()):
+                    hashes[path] = (dhash, phash)
+                    records.append((path, stat.st_mtime_ns, stat.st_size, dhash, phash))
+                self.save(records)
+        logger.info(f"感知哈希：{len(hashes)} 张图片，新计算 {len(missing)} 张")
+        return hashes
+
+
+class DuplicateUtil:
+    """
+    基于感知哈希的重复图片检测：dHash 比较相邻像素的明暗，pHash 取低频 DCT 系数与中位数比较，
+    两者都在 64 位内汉明距离足够小才认为是重复，能识别改名、重新编码、缩放过的同一张图片
+    """
+    _dct_matrix = None
+
+    @staticmethod
+    def load_pixels(path):
+        """
+        解码为灰度并缩小：9x8 用于 dHash，32x32 用于 pHash；JPEG 用 draft 模式缩小解码
+        :return: (9x8 数组, 32x32 数组)，无法解码时返回 None
+        """
+        size = FsConstants.PHASH_SIZE
+        try:
+            with Image.open(path) as image:
+                image.draft("L", (size * 2, size * 2))
+                image = image.convert("L")
+                small = image.resize((size, size), Image.Resampling.BOX)
+                tiny = small.resize((FsConstants.HASH_BITS_SIDE + 1, FsConstants.HASH_BITS_SIDE), Image.Resampling.BOX)
+                return np.asarray(tiny, dtype=np.float32), np.asarray(small, dtype=np.float32)
+        except Exception as e:
+            logger.warning(f"计算感知哈希失败: {path} {e}")
+            return None
+
+    @staticmethod
+    def pack_bits(bits):
+        """(N, 64) 布尔数组 -> N 个 64 位无符号整数"""
+        return np.packbits(bits.reshape(len(bits), -1), axis=1).view(">u8").ravel().astype(np.uint64)
+
+    @staticmethod
+    def dhash_batch(pixels):
+        """pixels: (N, 8, 9)，每行相邻像素比较得到 64 位"""
+        return DuplicateUtil.pack_bits(pixels[:, :, 1:] > pixels[:, :, :-1])
+
+    @staticmethod
+    def get_dct_matrix(size):
+        if DuplicateUtil._dct_matrix is None or DuplicateUtil._dct_matrix.shape[0] != size:
+            # DCT-II 正交矩阵，二维 DCT = D @ X @ D.T
+            k = np.arange(size)[:, None]
+            n = np.arange(size)[None, :]
+            matrix = np.cos(np.pi * (2 * n + 1) * k / (2 * size)) * np.sqrt(2 / size)
+            matrix[0] /= np.sqrt(2)
+            DuplicateUtil._dct_matrix = matrix.astype(np.float32)
+        return DuplicateUtil._dct_matrix
+
+    @staticmethod
+    def phash_batch(pixels):
+        """pixels: (N, 32, 32)，取左上角 8x8 低频系数，与去掉直流分量后的中位数比较"""
+        matrix = DuplicateUtil.get_dct_matrix(pixels.shape[1])
+        side = FsConstants.HASH_BITS_SIDE
+        low = (matrix[:side] @ pixels @ matrix[:side].T).reshape(len(pixels), -1)
+        median = np.median(low[:, 1:], axis=1, keepdims=True)
+        return DuplicateUtil.pack_bits(low > median)
+
+    @staticmethod
+    def find_duplicates(paths, max_distance=FsConstants.HASH_MAX_DISTANCE):
+        """
+        查找重复图片，按文件名排序后每组保留第一张
+        :return: [[保留的图片, 重复图片...]]
+        """
+        hashes = HashIndex().get_hashes(paths)
+        tree = BKTree()
+        groups = {}
+        for path in sorted(hashes):
+            dhash, phash = hashes[path]
+            original = None
+            for _, candidate in tree.search(phash, max_distance):
+                if BKTree.distance(dhash, hashes[candidate][0]) <= max_distance:
+                    original = candidate
+                    break
+            if original is None:
+                tree.add(phash, path)
+                groups[path] = [path]
+            else:
+                groups[original].append(path)
+        duplicates = [group for group in groups.values() if len(group) > 1]
+        logger.info(f"重复图片：{len(duplicates)} 组，{sum(len(group) - 1 for group in duplicates)} 张重复")
+        return duplicates
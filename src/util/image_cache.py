@@ -0,0 +1,137 @@
+import io
+import os
+import threading
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+from PIL import ExifTags, Image
+from fs_base.config_manager import ConfigManager, singleton
+from loguru import logger
+
+from src.const.fs_constants import FsConstants
+
+
+@singleton
+class ImageCache:
+    """
+    全局已解码图片缓存，各工具页共用
+    键为 (绝对路径, 修改时间, 文件大小)，文件改动后自动失效；
+    按 LRU 淘汰，总大小不超过 app.ini 中配置的上限
+    缓存的数组统一为 uint8 的 BGR/BGRA（与 OpenCV 一致），并设为只读，需要修改时由使用方复制
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def get_max_bytes():
+        """缓存上限（字节），在 app.ini 中配置，单位 MB"""
+        max_mb = ConfigManager().get_config(FsConstants.IMAGE_CACHE_MAX_MB_KEY)
+        return max(int(max_mb or FsConstants.IMAGE_CACHE_MAX_MB_DEFAULT), 0) * 1024 * 1024
+
+    @staticmethod
+    def make_key(path):
+        stat = os.stat(path)
+        return os.path.abspath(path), stat.st_mtime_ns, stat.st_size
+
+    @staticmethod
+    def read_orientation(data):
+        """只解析文件头读取 EXIF 方向，读不到时返回 1（不旋转）"""
+        try:
+            with Image.open(io.BytesIO(data)) as image:
+                return image.getexif().get(ExifTags.Base.Orientation, 1)
+        except Exception:
+            return 1
+
+    @staticmethod
+    def apply_orientation(image, orientation):
+        """按 EXIF 方向旋转/翻转，与 cv2.imread 和 ImageOps.exif_transpose 的结果一致"""
+        if orientation == 2:
+            return cv2.flip(image, 1)
+        if orientation == 3:
+            return cv2.rotate(image, cv2.ROTATE_180)
+        if orientation == 4:
+            return cv2.flip(image, 0)
+        if orientation == 5:
+            return cv2.transpose(image)
+        if orientation == 6:
+            return cv2.rotate(image, cv2.ROTATE_90_CLOCKWISE)
+        if orientation == 7:
+            return cv2.flip(cv2.transpose(image), -1)
+        if orientation == 8:
+            return cv2.rotate(image, cv2.ROTATE_90_COUNTERCLOCKWISE)
+        return image
+
+    @staticmethod
+    def decode(path):
+        """
+        解码为 uint8 的 BGR/BGRA；np.fromfile + imdecode 支持中文路径
+        IMREAD_UNCHANGED 保留透明通道但不处理 EXIF 方向，解码后按文件头中的方向旋转，与 cv2.imread 一致
+        """
+        data = np.fromfile(path, dtype=np.uint8)
+        image = cv2.imdecode(data, cv2.IMREAD_UNCHANGED)
+        if image is None:
+            return None
+        image = ImageCache.apply_orientation(image, ImageCache.read_orientation(data))
+        if image.dtype == np.uint16:
+            image = (image >> 8).astype(np.uint8)
+        if image.ndim == 2:
+            image = cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+        return image
+
+    def get(self, path):
+        """
+        获取已解码图片，未命中时解码并放入缓存
+        :return: 只读的 BGR/BGRA 数组，无法解码时返回 None
+        """
+        try:
+            key = self.make_key(path)
+        except OSError as e:
+            logger.warning(f"读取图片信息失败: {e}")
+            return None
+        with self.lock:
+            image = self.entries.get(key)
+            if image is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return image
+            self.misses += 1
+
+        image = self.decode(path)
+        if image is not None:
+            self.put(key, image)
+        return image
+
+    def put(self, key, image):
+        image.flags.writeable = False
+        max_bytes = self.get_max_bytes()
+        if image.nbytes > max_bytes:
+            # 单张超过上限的图片不缓存
+            return
+        with self.lock:
+            # 同一路径的旧版本已失效，一并移除
+            for stale_key in [item for item in self.entries if item[0] == key[0] and item != key]:
+                self.current_bytes -= self.entries.pop(stale_key).nbytes
+            if key not in self.entries:
+                self.entries[key] = image
+                self.current_bytes += image.nbytes
+            self.entries.move_to_end(key)
+            while self.current_bytes > max_bytes and self.entries:
+                _, evicted = self.entries.popitem(last=False)
+                self.current_bytes -= evicted.nbytes
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.current_bytes = 0
+
+    def stats(self):
+        with self.lock:
+            return {"entries": len(self.entries), "bytes": self.current_bytes, "hits": self.hits,
+                    "misses": self.misses}
+
@@ -0,0 +1,185 @@
+import heapq
+import itertools
+import os
+import threading
+from concurrent.futures import CancelledError
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal, QCoreApplication
+from fs_base.config_manager import ConfigManager, singleton
+from loguru import logger
+
+from src.const.fs_constants import FsConstants
+
+
+def collect_paths(paths, extensions):
+    """拖入的文件和文件夹展开为文件列表，文件夹不递归"""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(os.path.join(path, f) for f in sorted(os.listdir(path))
+                         if f.lower().endswith(extensions))
+        elif path.lower().endswith(extensions):
+            files.append(path)
+    return files
+
+
+class Job(QObject):
+    """
+    提交给 JobScheduler 的一个任务
+    function(job) 在线程池中执行，按 job.workers 决定自己的并发数，定期调用 report_progress，
+    并在 is_cancelled() 为 True 时尽快返回
+    """
+    progress = Signal(int)
+    item_done = Signal(object)  # 单个文件的处理结果，由任务自行定义
+    state_changed = Signal(str)
+    finished = Signal(object)  # 任务返回值；失败或取消时为 None
+
+    def __init__(self, name, function, priority=FsConstants.JOB_PRIORITY_NORMAL, max_workers=1):
+        """
+        :param max_workers: 最多占用的 CPU 槽位，实际分配的数量在 job.workers
+        """
+        super().__init__()
+        self.name = name
+        self.function = function
+        self.priority = priority
+        self.max_workers = max(max_workers, 1)
+        self.workers = 0
+        self.state = FsConstants.JOB_STATE_QUEUED
+        self.percent = 0
+        self.result = None
+        self.error = None
+        self.cancel_event = threading.Event()
+
+    def is_cancelled(self):
+        return self.cancel_event.is_set()
+
+    def report_progress(self, percent):
+        self.percent = percent
+        self.progress.emit(percent)
+
+    def report_item(self, item, done, total):
+        """单个文件处理完成，同时按完成数更新进度"""
+        self.item_done.emit(item)
+        self.report_progress(int(done / total * 100))
+
+    def set_state(self, state):
+        self.state = state
+        self.state_changed.emit(state)
+
+
+class _JobTask(QRunnable):
+    def __init__(self, job, on_done):
+        super().__init__()
+        self.job = job
+        self.on_done = on_done
+
+    def run(self):
+        try:
+            self.job.result = self.job.function(self.job)
+        except (Exception, CancelledError) as e:
+            # CancelledError 不是 Exception 的子类，退出程序关闭进程池时也要通知调度器
+            logger.error(f"任务失败: {self.job.name} {e}")
+            self.job.error = str(e)
+        # 跨线程发出，由界面线程中的调度器回收资源
+        self.on_done.emit(self.job)
+
+
+@singleton
+class JobScheduler(QObject):
+    """
+    全局任务调度：按优先级排队，所有任务共享 CPU 槽位（可在 app.ini 配置）
+    启动任务时按剩余槽位决定它的并发数，多个任务同时运行也不会超出核心数；
+    内存不在这里分配，任务解码每张图片前向 AdmissionController 申请
+    队首任务资源不足时等待，不让后面的小任务插队，避免大任务一直得不到执行
+    只在界面线程中调用
+    """
+    job_added = Signal(object)
+    job_done = Signal(object)
+    _job_returned = Signal(object)
+
+    def __init__(self):
+        super().__init__()
+        self.queue = []  # [(-优先级, 序号, 任务)]
+        self.counter = itertools.count()
+        self.running = []
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(self.get_max_cpu())
+        self._job_returned.connect(self.on_job_returned)
+        if QCoreApplication.instance() is not None:
+            QCoreApplication.instance().aboutToQuit.connect(self.wait_for_done)
+
+    @staticmethod
+    def get_max_cpu():
+        """CPU 槽位数，app.ini 中为 0 时使用全部核心"""
+        max_cpu = ConfigManager().get_config(FsConstants.JOB_MAX_CPU_KEY)
+        return int(max_cpu or 0) or os.cpu_count() or 1
+
+    def submit(self, job):
+        heapq.heappush(self.queue, (-job.priority, next(self.counter), job))
+        logger.info(f"任务排队: {job.name}，优先级 {job.priority}")
+        self.job_added.emit(job)
+        self.schedule()
+        return job
+
+    def set_priority(self, job, priority):
+        """调整排队中任务的优先级"""
+        job.priority = priority
+        for index, (_, order, queued) in enumerate(self.queue):
+            if queued is job:
+                self.queue[index] = (-priority, order, job)
+                heapq.heapify(self.queue)
+                self.schedule()
+                return
+
+    def cancel(self, job):
+        """排队中的任务直接移除，运行中的任务通知其尽快结束"""
+        job.cancel_event.set()
+        if job.state == FsConstants.JOB_STATE_QUEUED:
+            self.queue = [entry for entry in self.queue if entry[2] is not job]
+            heapq.heapify(self.queue)
+            job.set_state(FsConstants.JOB_STATE_CANCELLED)
+            job.finished.emit(None)
+            self.job_done.emit(job)
+
+    def grant_workers(self, job):
+        """:return: 当前资源下能给任务的并发数，0 表示需要等待"""
+        free_cpu = self.get_max_cpu() - sum(running.workers for running in self.running)
+        return max(min(job.max_workers, free_cpu), 0)
+
+    def schedule(self):
+        while self.queue:
+            job = self.queue[0][2]
+            workers = self.grant_workers(job)
+            if workers < 1:
+                return
+            heapq.heappop(self.queue)
+            job.workers = workers
+            self.running.append(job)
+            job.set_state(FsConstants.JOB_STATE_RUNNING)
+            logger.info(f"任务开始: {job.name}，并发 {workers}")
+            self.pool.start(_JobTask(job, self._job_returned))
+
+    def on_job_returned(self, job):
+        self.running.remove(job)
+        if job.error:
+            job.set_state(FsConstants.JOB_STATE_FAILED)
+        elif job.is_cancelled():
+            job.set_state(FsConstants.JOB_STATE_CANCELLED)
+        else:
+            job.report_progress(100)
+            job.set_state(FsConstants.JOB_STATE_DONE)
+        job.finished.emit(None if job.error else job.result)
+        self.job_done.emit(job)
+        self.schedule()
+
+    def active_jobs(self):
+        return self.running + [entry[2] for entry in sorted(self.queue)]
+
+    def wait_for_done(self, timeout=-1):
+        """退出前等待运行中的任务，排队中的任务不再启动"""
+        for _, _, job in self.queue:
+            job.cancel_event.set()
+        self.queue = []
+        for job in self.running:
+            job.cancel_event.set()
+        return self.pool.waitForDone(timeout)
@@ -0,0 +1,69 @@
+import threading
+from collections import deque
+
+from fs_base.config_manager import singleton
+
+from src.const.fs_constants import FsConstants
+
+
+@singleton
+class LogSink:
+    """
+    线程安全的日志缓冲，作为 loguru 的 sink 使用
+    任意线程写入，只入队不碰界面；日志窗口用定时器批量取出再渲染
+    """
+
+    def __init__(self, max_lines=FsConstants.LOG_MAX_LINES):
+        self.lock = threading.Lock()
+        # 环形缓冲：日志窗口首次打开时回放
+        self.records = deque(maxlen=max_lines)
+        # 尚未刷新到界面的记录，满了以后丢弃最旧的并计数
+        self.pending = deque(maxlen=max_lines)
+        self.dropped = 0
+
+    @staticmethod
+    def parse_level(message):
+        """loguru 消息自带级别，print 等普通输出按关键字判断"""
+        record = getattr(message, "record", None)
+        if record is not None:
+            return record["level"].no
+        if "ERROR" in message:
+            return FsConstants.LOG_LEVEL_ERROR
+        if "WARNING" in message:
+            return FsConstants.LOG_LEVEL_WARNING
+        return FsConstants.LOG_LEVEL_INFO
+
+    def write(self, message):
+        text = message.rstrip("\n")
+        if not text.strip():
+            return
+        item = (self.parse_level(message), text)
+        with self.lock:
+            if len(self.pending) == self.pending.maxlen:
+                self.dropped += 1
+            self.records.append(item)
+            self.pending.append(item)
+
+    def flush(self):
+        """兼容 sys.stdout"""
+        pass
+
+    def drain(self, limit=None):
+        """
+        取出待渲染的记录，按写入顺序从最旧的开始
+        :param limit: 单次最多取出条数（限流），其余留在队列中由后续几次取出
+        :return: (记录列表, 丢弃条数)，丢弃条数只统计队列满后被挤出的记录
+        """
+        with self.lock:
+            count = len(self.pending) if limit is None else min(limit, len(self.pending))
+            items = [self.pending.popleft() for _ in range(count)]
+            dropped = self.dropped
+            self.dropped = 0
+        return items, dropped
+
+    def replay(self):
+        """返回环形缓冲中的全部记录，并清空待渲染队列（它们已包含在回放中）"""
+        with self.lock:
+            self.pending.clear()
+            self.dropped = 0
+            return list(self.records)
@@ -15,18 +15,25 @@ from loguru import logger
 class MenuBar(BaseMenuBar):
     def __init__(self, parent):
         super().__init__(parent)
-        self.log_window = LogWindow()
-        self.option_tab = OptionGeneral()
-        self.about_window = AboutWindow()
+        # 子窗口在首次打开时再创建，避免拖慢启动
+        self.log_window = None
+        self.option_tab = None
+        self.about_window = None
 
     def show_log_window(self):
         """显示日志窗口"""
+        if self.log_window is None:
+            self.log_window = LogWindow()
         self.log_window.show()
 
     def show_option_tab(self):
         """显示首选项窗口"""
+        if self.option_tab is None:
+            self.option_tab = OptionGeneral()
         self.option_tab.show()
 
     def show_about_window(self):
+        if self.about_window is None:
+            self.about_window = AboutWindow()
         self.about_window.show()
 
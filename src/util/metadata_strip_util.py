@@ -0,0 +1,276 @@
+import os
+import struct
+import zlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from loguru import logger
+
+from src.const.fs_constants import FsConstants
+
+
+class MetadataStripUtil:
+    """
+    按字节改写 PNG/JPEG，去除元数据而不解码像素：
+    PNG 删除辅助块、合并 IDAT 并校验 CRC，JPEG 删除 APPn/COM 段，熵编码数据原样拷贝
+    文件按块流式读写，内存占用与图片大小无关
+    """
+
+    PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+    JPEG_SOI = b"\xff\xd8"
+    # PNG 单个块的最大长度
+    PNG_MAX_CHUNK = 0x7FFFFFFF
+    EXIF_HEADER = b"Exif\x00\x00"
+    EXIF_ORIENTATION_TAG = 0x0112
+
+    @staticmethod
+    def copy_bytes(src, dst, length):
+        """从 src 拷贝 length 字节到 dst"""
+        while length > 0:
+            data = src.read(min(length, FsConstants.METADATA_STRIP_BLOCK_SIZE))
+            if not data:
+                raise ValueError("文件被截断")
+            dst.write(data)
+            length -= len(data)
+
+    @staticmethod
+    def read_png_layout(src):
+        """
+        只读块头，跳过数据，:return: [(类型, 数据偏移, 长度, CRC)]
+        """
+        if src.read(8) != MetadataStripUtil.PNG_SIGNATURE:
+            raise ValueError("不是 PNG 文件")
+        chunks = []
+        while True:
+            header = src.read(8)
+            if len(header) < 8:
+                raise ValueError("缺少 IEND 块")
+            length, chunk_type = struct.unpack(">I4s", header)
+            if length > MetadataStripUtil.PNG_MAX_CHUNK:
+                raise ValueError(f"块长度无效: {chunk_type!r}")
+            offset = src.tell()
+            src.seek(length, os.SEEK_CUR)
+            crc = src.read(4)
+            if len(crc) < 4:
+                raise ValueError("文件被截断")
+            chunks.append((chunk_type, offset, length, struct.unpack(">I", crc)[0]))
+            if chunk_type == b"IEND":
+                return chunks
+
+    @staticmethod
+    def plan_png(chunks, keep_icc):
+        """
+        保留关键块和影响显示的辅助块，连续的 IDAT 合并为尽量少的块
+        :return: (输出块列表 [(类型, [原始块...])], 删除的块类型)
+        """
+        keep = set(FsConstants.METADATA_STRIP_PNG_KEEP)
+        if keep_icc:
+            keep.add(b"iCCP")
+        planned = []
+        removed = []
+        for chunk in chunks:
+            chunk_type, _, length, _ = chunk
+            # 块类型首字母大写为关键块，必须保留
+            if not chunk_type[0:1].isupper() and chunk_type not in keep:
+                removed.append(chunk_type.decode("latin-1"))
+                continue
+            if chunk_type == b"IDAT" and planned and planned[-1][0] == b"IDAT" \
+                    and sum(part[2] for part in planned[-1][1]) + length <= MetadataStripUtil.PNG_MAX_CHUNK:
+                planned[-1][1].append(chunk)
+            else:
+                planned.append((chunk_type, [chunk]))
+        return planned, removed
+
+    @staticmethod
+    def strip_png(src, dst, keep_icc):
+        """:return: 删除的块类型"""
+        planned, removed = MetadataStripUtil.plan_png(MetadataStripUtil.read_png_layout(src), keep_icc)
+        dst.write(MetadataStripUtil.PNG_SIGNATURE)
+        for chunk_type, parts in planned:
+            dst.write(struct.pack(">I4s", sum(part[2] for part in parts), chunk_type))
+            out_crc = zlib.crc32(chunk_type)
+            for _, offset, length, expected in parts:
+                src.seek(offset)
+                # 原块的 CRC 覆盖类型和数据，拷贝时同时计算原块和输出块的 CRC
+                in_crc = zlib.crc32(chunk_type)
+                while length > 0:
+                    data = src.read(min(length, FsConstants.METADATA_STRIP_BLOCK_SIZE))
+                    if not data:
+                        raise ValueError("文件被截断")
+                    dst.write(data)
+                    in_crc = zlib.crc32(data, in_crc)
+                    out_crc = zlib.crc32(data, out_crc)
+                    length -= len(data)
+                if in_crc != expected:
+                    raise ValueError(f"CRC 校验失败: {chunk_type.decode('latin-1')}")
+            dst.write(struct.pack(">I", out_crc))
+        return removed
+
+    @staticmethod
+    def jpeg_segment_name(marker, head):
+        if marker == 0xFE:
+            return "COM"
+        if marker == 0xE1:
+            if head.startswith(b"Exif\x00"):
+                return "APP1/Exif"
+            if head.startswith(b"http://ns.adobe.com/"):
+                return "APP1/XMP"
+        if marker == 0xED:
+            return "APP13/IPTC"
+        return f"APP{marker - 0xE0}"
+
+    @staticmethod
+    def keep_jpeg_segment(marker, head, keep_icc):
+        """JFIF、Adobe（决定颜色变换）和可选的 ICC 段保留，其余 APPn 和注释删除"""
+        if marker == 0xE0:
+            return head.startswith(b"JFIF\x00") or head.startswith(b"JFXX\x00")
+        if marker == 0xE2:
+            return keep_icc and head.startswith(b"ICC_PROFILE\x00")
+        if marker == 0xEE:
+            return head.startswith(b"Adobe")
+        return not (0xE1 <= marker <= 0xEF or marker == 0xFE)
+
+    @staticmethod
+    def read_exif_orientation(data):
+        """
+        从 APP1/Exif 段的数据中读取 IFD0 的方向标记
+        :return: 1-8，没有方向标记或无法解析时为 None
+        """
+        tiff = data[len(MetadataStripUtil.EXIF_HEADER):]
+        order = {b"II": "<", b"MM": ">"}.get(tiff[:2])
+        if order is None:
+            return None
+        try:
+            magic, ifd_offset = struct.unpack_from(order + "HI", tiff, 2)
+            if magic != 42:
+                return None
+            count = struct.unpack_from(order + "H", tiff, ifd_offset)[0]
+            for index in range(count):
+                entry = ifd_offset + 2 + index * 12
+                tag, value_type, value_count = struct.unpack_from(order + "HHI", tiff, entry)
+                if tag == MetadataStripUtil.EXIF_ORIENTATION_TAG and value_type == 3 and value_count == 1:
+                    orientation = struct.unpack_from(order + "H", tiff, entry + 8)[0]
+                    return orientation if 1 <= orientation <= 8 else None
+        except struct.error:
+            return None
+        return None
+
+    @staticmethod
+    def exif_orientation_segment(orientation):
+        """只含方向标记的最小 APP1/Exif 段：TIFF 头 + 一个条目的 IFD0"""
+        tiff = struct.pack(">2sHI", b"MM", 42, 8)
+        tiff += struct.pack(">HHHIHHI", 1, MetadataStripUtil.EXIF_ORIENTATION_TAG, 3, 1, orientation, 0, 0)
+        payload = MetadataStripUtil.EXIF_HEADER + tiff
+        return b"\xff\xe1" + struct.pack(">H", len(payload) + 2) + payload
+
+    @staticmethod
+    def strip_jpeg(src, dst, keep_icc):
+        """
+        逐段处理到第一个 SOS，之后的扫描数据原样拷贝
+        EXIF 中的方向标记不是 1 时改写为只含方向标记的 APP1 段，竖拍的照片不会变成横向
+        :return: 删除的段
+        """
+        if src.read(2) != MetadataStripUtil.JPEG_SOI:
+            raise ValueError("不是 JPEG 文件")
+        dst.write(MetadataStripUtil.JPEG_SOI)
+        removed = []
+        orientation_written = False
+        while True:
+            byte = src.read(1)
+            if byte != b"\xff":
+                raise ValueError("JPEG 段结构无效")
+            marker = src.read(1)
+            while marker == b"\xff":  # 段之间允许填充字节
+                marker = src.read(1)
+            if not marker:
+                raise ValueError("文件被截断")
+            marker = marker[0]
+            if marker == 0xD9:
+                dst.write(b"\xff\xd9")
+                return removed
+            if 0xD0 <= marker <= 0xD7 or marker == 0x01:  # 不带长度的标记
+                dst.write(bytes((0xFF, marker)))
+                continue
+            size = src.read(2)
+            if len(size) < 2:
+                raise ValueError("文件被截断")
+            length = struct.unpack(">H", size)[0] - 2
+            if length < 0:
+                raise ValueError("JPEG 段长度无效")
+            head = src.read(min(length, 32))
+            if MetadataStripUtil.keep_jpeg_segment(marker, head, keep_icc):
+                dst.write(bytes((0xFF, marker)) + size + head)
+                MetadataStripUtil.copy_bytes(src, dst, length - len(head))
+            elif MetadataStripUtil.jpeg_segment_name(marker, head) == "APP1/Exif":
+                # EXIF 段最长 64KB，整段读入后解析方向标记
+                data = head + src.read(length - len(head))
+                if len(data) < length:
+                    raise ValueError("文件被截断")
+                orientation = MetadataStripUtil.read_exif_orientation(data)
+                if orientation not in (None, 1) and not orientation_written:
+                    dst.write(MetadataStripUtil.exif_orientation_segment(orientation))
+                    orientation_written = True
+                    removed.append("APP1/Exif（保留方向）")
+                else:
+                    removed.append("APP1/Exif")
+            else:
+                removed.append(MetadataStripUtil.jpeg_segment_name(marker, head))
+                src.seek(length - len(head), os.SEEK_CUR)
+            if marker == 0xDA:
+                # SOS 之后是熵编码数据及后续扫描，直接拷贝到文件末尾
+                while data := src.read(FsConstants.METADATA_STRIP_BLOCK_SIZE):
+                    dst.write(data)
+                return removed
+
+    @staticmethod
+    def strip_file(path, output_path, keep_icc=True):
+        """
+        去除单个文件的元数据，先写临时文件，成功后替换，输入输出可以是同一路径
+        :return: {"path", "output", "size_in", "size_out", "removed", "error"}
+        """
+        result = {"path": path, "output": output_path, "size_in": 0, "size_out": 0, "removed": [], "error": None}
+        temp_path = output_path + ".part"
+        try:
+            result["size_in"] = os.path.getsize(path)
+            with open(path, "rb") as src, open(temp_path, "wb") as dst:
+                signature = src.read(8)
+                src.seek(0)
+                if signature == MetadataStripUtil.PNG_SIGNATURE:
+                    result["removed"] = MetadataStripUtil.strip_png(src, dst, keep_icc)
+                elif signature.startswith(MetadataStripUtil.JPEG_SOI):
+                    result["removed"] = MetadataStripUtil.strip_jpeg(src, dst, keep_icc)
+                else:
+                    raise ValueError("只支持 PNG 和 JPEG")
+            os.replace(temp_path, output_path)
+            result["size_out"] = os.path.getsize(output_path)
+        except Exception as e:
+            result["error"] = str(e)
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        return result
+
+    @staticmethod
+    def strip_folder(paths, output_folder, keep_icc=True, workers=None, on_result=None, stopped=None):
+        """
+        用线程池批量处理，拷贝和 CRC 计算都会释放 GIL，吞吐受磁盘限制
+        :param on_result: 每完成一个文件调用 on_result(结果, 完成数, 总数)
+        :param stopped: 返回 True 时取消尚未开始的文件
+        :return: 结果列表
+        """
+        workers = workers or FsConstants.METADATA_STRIP_WORKERS
+        results = []
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(MetadataStripUtil.strip_file, path,
+                                       os.path.join(output_folder, os.path.basename(path)), keep_icc)
+                       for path in paths]
+            for future in as_completed(futures):
+                result = future.result()
+                if result["error"]:
+                    logger.error(f"去除元数据失败: {result['path']} {result['error']}")
+                results.append(result)
+                if on_result is not None:
+                    on_result(result, len(results), len(futures))
+                if stopped is not None and stopped():
+                    for pending in futures:
+                        pending.cancel()
+                    break
+        return results
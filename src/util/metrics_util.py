@@ -0,0 +1,169 @@
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+from fs_base.config_manager import ConfigManager
+from loguru import logger
+
+from src.const.fs_constants import FsConstants
+from src.util.common_util import CommonUtil
+
+
+class FileMetrics:
+    """
+    单个文件的处理指标：各阶段耗时、输入/输出字节数、解码后的像素缓冲大小
+    流水线中多个文件同时处理，内存峰值无法按文件区分，只在 JobMetrics 中按整批统计
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.stages = {}
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.pixel_bytes = 0
+        self.error = None
+        self.total_time = 0.0
+
+    @contextmanager
+    def stage(self, name):
+        """记录一个处理阶段的耗时，同名阶段累加"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - start
+
+    def finish(self):
+        # 交互式工具在各阶段之间会等待用户操作，所以总耗时取各阶段之和
+        self.total_time = sum(self.stages.values())
+        return self
+
+    def to_dict(self):
+        return {
+            "path": self.path,
+            "stages": self.stages,
+            "total_time": self.total_time,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "pixel_bytes": self.pixel_bytes,
+            "error": self.error,
+        }
+
+
+class JobMetrics:
+    """
+    一次任务（一批文件）的指标汇总，按阶段统计分位数，并以 JSON Lines 追加写到外部目录
+    内存峰值来自 tracemalloc，只统计经 Python 分配器的内存（numpy/OpenCV 数组、字节缓冲），
+    是整批处理期间的近似值；PIL 图像使用自己的内存池，所以另外记录最大的像素缓冲
+    """
+
+    def __init__(self, job_name, trace_memory=None):
+        """:param trace_memory: 是否统计内存峰值，默认按 app.ini 中的配置（默认关闭）"""
+        self.job_name = job_name
+        self.files = []
+        self.lock = threading.Lock()
+        self.start_time = time.perf_counter()
+        self.started_at = CommonUtil.get_current_time()
+        self.wall_time = 0.0
+        self.pipeline = None  # 流水线各阶段的耗时与等待时间
+        self.peak_traced_bytes = None
+        if trace_memory is None:
+            trace_memory = bool(ConfigManager().get_config(FsConstants.METRICS_TRACE_MEMORY_KEY))
+        self.trace_memory = trace_memory
+        # 只在由本任务开启时负责关闭 tracemalloc
+        self.owns_tracing = trace_memory and not tracemalloc.is_tracing()
+        if self.owns_tracing:
+            tracemalloc.start()
+        elif trace_memory:
+            tracemalloc.reset_peak()
+
+    def add(self, file_metrics):
+        with self.lock:
+            self.files.append(file_metrics)
+
+    def finish(self):
+        self.wall_time = time.perf_counter() - self.start_time
+        if self.trace_memory and tracemalloc.is_tracing():
+            self.peak_traced_bytes = tracemalloc.get_traced_memory()[1]
+        if self.owns_tracing:
+            tracemalloc.stop()
+            self.owns_tracing = False
+        return self
+
+    @staticmethod
+    def percentile(values, q):
+        """线性插值的分位数，q 取 0~100"""
+        if not values:
+            return 0.0
+        ordered = sorted(values)
+        position = (len(ordered) - 1) * q / 100
+        lower = int(position)
+        upper = min(lower + 1, len(ordered) - 1)
+        return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+    def summary(self):
+        stage_values = {}
+        for file_metrics in self.files:
+            for name, duration in file_metrics.stages.items():
+                stage_values.setdefault(name, []).append(duration)
+        return {
+            "job": self.job_name,
+            "started_at": self.started_at,
+            "files": len(self.files),
+            "errors": sum(1 for item in self.files if item.error),
+            "wall_time": self.wall_time,
+            "bytes_in": sum(item.bytes_in for item in self.files),
+            "bytes_out": sum(item.bytes_out for item in self.files),
+            "max_pixel_bytes": max((item.pixel_bytes for item in self.files), default=0),
+            "peak_traced_bytes": self.peak_traced_bytes,
+            "stages": {
+                name: {
+                    "total": sum(values),
+                    "p50": self.percentile(values, 50),
+                    "p90": self.percentile(values, 90),
+                    "p99": self.percentile(values, 99),
+                    "max": max(values),
+                }
+                for name, values in stage_values.items()
+            },
+            "pipeline": self.pipeline,
+        }
+
+    def export(self, path=None):
+        """把每个文件的指标和任务汇总追加写入 JSON Lines 文件（默认与 error.log 同目录）"""
+        path = path or os.path.join(CommonUtil.get_external_path(), FsConstants.METRICS_FILE)
+        summary = self.summary()
+        try:
+            with open(path, "a", encoding="utf-8") as file:
+                for file_metrics in self.files:
+                    record = {"type": "file", "job": self.job_name, "started_at": self.started_at}
+                    record.update(file_metrics.to_dict())
+                    file.write(json.dumps(record, ensure_ascii=False) + "\n")
+                record = {"type": "summary"}
+                record.update(summary)
+                file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        except OSError as e:
+            logger.warning(f"写入处理指标失败: {e}")
+        return summary
+
+    @staticmethod
+    def format_summary(summary):
+        """把汇总结果格式化成界面展示的文本"""
+        lines = [
+            f"文件数: {summary['files']}  失败: {summary['errors']}  总耗时: {summary['wall_time']:.2f} s",
+            f"读取: {summary['bytes_in'] / 1024 / 1024:.2f} MB  写出: {summary['bytes_out'] / 1024 / 1024:.2f} MB",
+        ]
+        if summary["peak_traced_bytes"] is not None:
+            lines.append(f"整批内存峰值(Python 分配，近似): {summary['peak_traced_bytes'] / 1024 / 1024:.1f} MB  "
+                         f"最大像素缓冲: {summary['max_pixel_bytes'] / 1024 / 1024:.1f} MB")
+        for name, stats in summary["stages"].items():
+            lines.append(f"{name}: 合计 {stats['total']:.2f} s  p50 {stats['p50'] * 1000:.1f} ms  "
+                         f"p90 {stats['p90'] * 1000:.1f} ms  p99 {stats['p99'] * 1000:.1f} ms")
+        if summary.get("pipeline"):
+            for name, stats in summary["pipeline"]["stages"].items():
+                lines.append(f"流水线 {name}: 工作 {stats['busy']:.2f} s  等待输入 {stats['starved']:.2f} s  "
+                             f"等待输出 {stats['blocked']:.2f} s  利用率 {stats['utilization']:.0%}")
+        return "\n".join(lines)
@@ -0,0 +1,143 @@
+import json
+import os
+import struct
+
+from loguru import logger
+
+from src.const.fs_constants import FsConstants
+from src.util.common_util import CommonUtil
+
+
+class PaletteFileUtil:
+    """
+    调色板文件读写，按扩展名选择格式：
+    .gpl GIMP 调色板（文本）、.ase Adobe Swatch Exchange（二进制，大端序）、.json {"name": ..., "colors": ["#RRGGBB"]}
+    颜色统一为 (R, G, B) 元组
+    """
+
+    @staticmethod
+    def get_palette_dir():
+        """调色板目录，与 app.ini 放在同一个外部目录下"""
+        folder = os.path.join(CommonUtil.get_external_path(), FsConstants.PALETTE_DIR)
+        os.makedirs(folder, exist_ok=True)
+        return folder
+
+    @staticmethod
+    def load(path):
+        """:return: (名称, [(R, G, B)])"""
+        extension = os.path.splitext(path)[1].lower()
+        if extension == ".gpl":
+            return PaletteFileUtil.load_gpl(path)
+        if extension == ".ase":
+            return PaletteFileUtil.load_ase(path)
+        if extension == ".json":
+            return PaletteFileUtil.load_json(path)
+        raise ValueError(f"不支持的调色板格式: {extension}")
+
+    @staticmethod
+    def save(path, colors, name=None):
+        name = name or os.path.splitext(os.path.basename(path))[0]
+        extension = os.path.splitext(path)[1].lower()
+        if extension == ".gpl":
+            PaletteFileUtil.save_gpl(path, colors, name)
+        elif extension == ".ase":
+            PaletteFileUtil.save_ase(path, colors, name)
+        elif extension == ".json":
+            PaletteFileUtil.save_json(path, colors, name)
+        else:
+            raise ValueError(f"不支持的调色板格式: {extension}")
+        logger.info(f"调色板已保存: {path}，{len(colors)} 种颜色")
+
+    @staticmethod
+    def to_hex(color):
+        return "#{:02X}{:02X}{:02X}".format(*color)
+
+    @staticmethod
+    def from_hex(text):
+        text = text.strip().lstrip("#")
+        if len(text) != 6:
+            raise ValueError(f"无效的颜色: {text}")
+        return tuple(int(text[i:i + 2], 16) for i in (0, 2, 4))
+
+    @staticmethod
+    def load_gpl(path):
+        name = os.path.splitext(os.path.basename(path))[0]
+        colors = []
+        with open(path, "r", encoding="utf-8") as file:
+            if file.readline().strip() != "GIMP Palette":
+                raise ValueError("不是 GIMP 调色板文件")
+            for line in file:
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                if line.startswith("Name:"):
+                    name = line[5:].strip()
+                    continue
+                if line.startswith("Columns:"):
+                    continue
+                values = line.split(None, 3)
+                if len(values) >= 3:
+                    colors.append(tuple(max(0, min(int(value), 255)) for value in values[:3]))
+        return name, colors
+
+    @staticmethod
+    def save_gpl(path, colors, name):
+        lines = ["GIMP Palette", f"Name: {name}", "Columns: 8", "#"]
+        lines += [f"{r:3d} {g:3d} {b:3d}\t{PaletteFileUtil.to_hex((r, g, b))}" for r, g, b in colors]
+        with open(path, "w", encoding="utf-8") as file:
+            file.write("\n".join(lines) + "\n")
+
+    @staticmethod
+    def load_ase(path):
+        """只读取 RGB、灰度颜色块，忽略分组块"""
+        name = os.path.splitext(os.path.basename(path))[0]
+        colors = []
+        with open(path, "rb") as file:
+            data = file.read()
+        if data[:4] != b"ASEF":
+            raise ValueError("不是 ASE 调色板文件")
+        count = struct.unpack(">I", data[8:12])[0]
+        offset = 12
+        for _ in range(count):
+            block_type, length = struct.unpack(">HI", data[offset:offset + 6])
+            body = data[offset + 6:offset + 6 + length]
+            offset += 6 + length
+            if block_type != 0x0001:
+                continue
+            name_length = struct.unpack(">H", body[:2])[0]
+            position = 2 + name_length * 2
+            model = body[position:position + 4]
+            position += 4
+            if model == b"RGB ":
+                values = struct.unpack(">3f", body[position:position + 12])
+            elif model == b"Gray":
+                values = struct.unpack(">f", body[position:position + 4]) * 3
+            else:
+                logger.warning(f"忽略不支持的颜色模式: {model}")
+                continue
+            colors.append(tuple(max(0, min(int(round(value * 255)), 255)) for value in values))
+        return name, colors
+
+    @staticmethod
+    def save_ase(path, colors, name):
+        blocks = []
+        for color in colors:
+            title = (PaletteFileUtil.to_hex(color) + "\0").encode("utf-16-be")
+            body = struct.pack(">H", len(title) // 2) + title + b"RGB " + \
+                struct.pack(">3f", *(value / 255 for value in color)) + struct.pack(">H", 2)  # 2: 普通颜色
+            blocks.append(struct.pack(">HI", 0x0001, len(body)) + body)
+        with open(path, "wb") as file:
+            file.write(b"ASEF" + struct.pack(">HHI", 1, 0, len(blocks)) + b"".join(blocks))
+
+    @staticmethod
+    def load_json(path):
+        with open(path, "r", encoding="utf-8") as file:
+            data = json.load(file)
+        name = data.get("name") or os.path.splitext(os.path.basename(path))[0]
+        return name, [PaletteFileUtil.from_hex(color) for color in data.get("colors", [])]
+
+    @staticmethod
+    def save_json(path, colors, name):
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump({"name": name, "colors": [PaletteFileUtil.to_hex(color) for color in colors]}, file,
+                      ensure_ascii=False, indent=2)
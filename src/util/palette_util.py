@@ -0,0 +1,108 @@
+import math
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from loguru import logger
+
+from src.const.fs_constants import FsConstants
+from src.util.image_cache import ImageCache
+
+
+class PaletteUtil:
+    """
+    主色提取：在降采样的像素上先用中位切分得到初始颜色，再用 k-means 细化
+    输入为 ImageCache 中的 BGR/BGRA 数组，输出按像素占比从高到低排列的 RGB 颜色
+    """
+    _cache = OrderedDict()  # (路径, 修改时间, 大小, 颜色数) -> [(RGB, 占比)]
+    _lock = threading.Lock()
+
+    @staticmethod
+    def subsample(image, max_pixels=FsConstants.PALETTE_SAMPLE_PIXELS):
+        """按固定步长取样，返回 (N, 3) 的 float32 RGB；带透明通道时去掉几乎透明的像素"""
+        height, width = image.shape[:2]
+        step = max(int(math.ceil(math.sqrt(height * width / max_pixels))), 1)
+        sample = image[::step, ::step]
+        pixels = sample[:, :, 2::-1].reshape(-1, 3)
+        if image.shape[2] == 4:
+            pixels = pixels[sample[:, :, 3].reshape(-1) >= FsConstants.PALETTE_MIN_ALPHA]
+        return pixels.astype(np.float32)
+
+    @staticmethod
+    def median_cut(pixels, count):
+        """
+        中位切分：每次选取颜色范围最大的盒子，沿范围最大的通道在中位数处一分为二
+        :return: (k, 3) 各盒子的平均颜色，k <= count
+        """
+        boxes = [pixels]
+        while len(boxes) < count:
+            ranges = [np.ptp(box, axis=0) if len(box) > 1 else np.zeros(3) for box in boxes]
+            index = int(np.argmax([value.max() for value in ranges]))
+            if ranges[index].max() == 0:
+                break  # 剩下的盒子都只有一种颜色
+            box = boxes.pop(index)
+            channel = int(np.argmax(ranges[index]))
+            middle = len(box) // 2
+            order = np.argpartition(box[:, channel], middle)
+            boxes.extend([box[order[:middle]], box[order[middle:]]])
+        return np.array([box.mean(axis=0) for box in boxes], dtype=np.float32)
+
+    @staticmethod
+    def kmeans(pixels, centers, iterations=FsConstants.PALETTE_KMEANS_ITERATIONS):
+        """
+        k-means 细化：距离用 |p|² - 2p·c + |c|² 一次矩阵乘法算出，各簇均值用 bincount 求和
+        :return: (中心, 每个中心的像素数)
+        """
+        squared = (pixels * pixels).sum(axis=1, keepdims=True)
+        counts = None
+        for _ in range(iterations):
+            distances = squared - 2 * pixels @ centers.T + (centers * centers).sum(axis=1)
+            labels = np.argmin(distances, axis=1)
+            counts = np.bincount(labels, minlength=len(centers))
+            sums = np.stack([np.bincount(labels, weights=pixels[:, channel], minlength=len(centers))
+                             for channel in range(3)], axis=1)
+            occupied = counts > 0
+            updated = centers.copy()
+            updated[occupied] = (sums[occupied] / counts[occupied, None]).astype(np.float32)
+            shift = np.abs(updated - centers).max()
+            centers = updated
+            if shift < FsConstants.PALETTE_KMEANS_TOLERANCE:
+                break
+        return centers, counts
+
+    @staticmethod
+    def extract(image, count=FsConstants.PALETTE_COLOR_COUNT):
+        """
+        :return: [((R, G, B), 占比)]，按占比从高到低
+        """
+        pixels = PaletteUtil.subsample(image)
+        if not len(pixels):
+            return []
+        centers, counts = PaletteUtil.kmeans(pixels, PaletteUtil.median_cut(pixels, count))
+        total = counts.sum()
+        order = np.argsort(-counts)
+        return [(tuple(int(round(value)) for value in np.clip(centers[index], 0, 255)), float(counts[index] / total))
+                for index in order if counts[index]]
+
+    @staticmethod
+    def get_palette(path, count=FsConstants.PALETTE_COLOR_COUNT):
+        """提取图片主色，结果按 (路径, 修改时间, 大小) 缓存，图片未改动时直接返回"""
+        try:
+            key = ImageCache.make_key(path) + (count,)
+        except OSError as e:
+            logger.warning(f"读取图片信息失败: {e}")
+            return []
+        with PaletteUtil._lock:
+            palette = PaletteUtil._cache.get(key)
+            if palette is not None:
+                PaletteUtil._cache.move_to_end(key)
+                return palette
+        image = ImageCache().get(path)
+        if image is None:
+            return []
+        palette = PaletteUtil.extract(image, count)
+        with PaletteUtil._lock:
+            PaletteUtil._cache[key] = palette
+            while len(PaletteUtil._cache) > FsConstants.PALETTE_CACHE_ITEMS:
+                PaletteUtil._cache.popitem(last=False)
+        return palette
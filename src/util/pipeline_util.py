@@ -0,0 +1,143 @@
+import queue
+import threading
+import time
+
+from loguru import logger
+
+# 队列结束标记
+_END = object()
+
+
+class StageQueue:
+    """有界队列，放不进去时阻塞上游（背压），流水线停止时放弃等待"""
+
+    POLL_INTERVAL = 0.1
+
+    def __init__(self, maxsize, stop_event):
+        self.queue = queue.Queue(maxsize=max(maxsize, 1))
+        self.stop_event = stop_event
+
+    def put(self, item):
+        """放入队列，返回阻塞等待的秒数"""
+        start = time.perf_counter()
+        while not self.stop_event.is_set():
+            try:
+                self.queue.put(item, timeout=self.POLL_INTERVAL)
+                break
+            except queue.Full:
+                continue
+        return time.perf_counter() - start
+
+    def get(self):
+        """取出一项，返回 (项, 等待秒数)；流水线停止时返回结束标记"""
+        start = time.perf_counter()
+        while not self.stop_event.is_set():
+            try:
+                return self.queue.get(timeout=self.POLL_INTERVAL), time.perf_counter() - start
+            except queue.Empty:
+                continue
+        return _END, time.perf_counter() - start
+
+
+class StagedPipeline:
+    """
+    读取 -> 处理 -> 写入 三段流水线
+    读取线程预读放入有界队列，处理在调用线程进行，写入线程异步落盘；
+    队列满时上游阻塞，任一阶段出错时整条流水线停止，并在 run 中重新抛出
+    每个阶段分别统计：处理耗时(busy)、等待上游数据(starved)、等待下游队列腾出空间(blocked)
+    """
+
+    STAGES = ("read", "process", "write")
+
+    def __init__(self, read, process, write, read_ahead=4, write_behind=4):
+        self.read = read
+        self.process = process
+        self.write = write
+        self.stop_event = threading.Event()
+        self.read_queue = StageQueue(read_ahead, self.stop_event)
+        self.write_queue = StageQueue(write_behind, self.stop_event)
+        self.waits = {name: {"busy": 0.0, "starved": 0.0, "blocked": 0.0} for name in self.STAGES}
+        self.error = None
+        self.wall_time = 0.0
+
+    def stop(self, error=None):
+        """停止流水线，只保留第一个错误"""
+        if error is not None and self.error is None:
+            self.error = error
+        self.stop_event.set()
+
+    def run(self, items):
+        start = time.perf_counter()
+        reader = threading.Thread(target=self.run_reader, args=(items,), name="pipeline-read", daemon=True)
+        writer = threading.Thread(target=self.run_writer, name="pipeline-write", daemon=True)
+        reader.start()
+        writer.start()
+        try:
+            self.run_processor()
+        finally:
+            reader.join()
+            writer.join()
+            self.wall_time = time.perf_counter() - start
+        if self.error is not None:
+            raise self.error
+        return self.report()
+
+    def run_reader(self, items):
+        stats = self.waits["read"]
+        try:
+            for item in items:
+                if self.stop_event.is_set():
+                    break
+                start = time.perf_counter()
+                result = self.read(item)
+                stats["busy"] += time.perf_counter() - start
+                stats["blocked"] += self.read_queue.put(result)
+        except Exception as e:
+            logger.error(f"流水线读取阶段出错: {e}")
+            self.stop(e)
+        finally:
+            self.read_queue.put(_END)
+
+    def run_processor(self):
+        stats = self.waits["process"]
+        try:
+            while True:
+                item, waited = self.read_queue.get()
+                stats["starved"] += waited
+                if item is _END:
+                    break
+                start = time.perf_counter()
+                result = self.process(item)
+                stats["busy"] += time.perf_counter() - start
+                stats["blocked"] += self.write_queue.put(result)
+        except Exception as e:
+            logger.error(f"流水线处理阶段出错: {e}")
+            self.stop(e)
+        finally:
+            self.write_queue.put(_END)
+
+    def run_writer(self):
+        stats = self.waits["write"]
+        try:
+            while True:
+                item, waited = self.write_queue.get()
+                stats["starved"] += waited
+                if item is _END:
+                    break
+                start = time.perf_counter()
+                self.write(item)
+                stats["busy"] += time.perf_counter() - start
+        except Exception as e:
+            logger.error(f"流水线写入阶段出错: {e}")
+            self.stop(e)
+
+    def report(self):
+        """各阶段耗时与等待时间，以及占总耗时的比例"""
+        wall_time = self.wall_time or 1e-9
+        return {
+            "wall_time": self.wall_time,
+            "stages": {
+                name: dict(stats, utilization=stats["busy"] / wall_time)
+                for name, stats in self.waits.items()
+            },
+        }
@@ -0,0 +1,155 @@
+import ctypes
+import sys
+
+import numpy as np
+from PySide6.QtCore import QBuffer, QIODevice
+from PySide6.QtGui import QImage, QPixmap
+
+
+class _ImageBuffer:
+    """把 QImage 的像素内存暴露给 numpy，数组存活期间保持 QImage 的引用"""
+
+    def __init__(self, image, shape, dtype, strides):
+        self.image = image
+        self.__array_interface__ = {
+            "shape": shape,
+            "typestr": np.dtype(dtype).str,
+            "data": (int(np.frombuffer(image.constBits(), dtype=np.uint8).ctypes.data), True),
+            "strides": strides,
+            "version": 3,
+        }
+
+
+class QImageUtil:
+    """
+    NumPy 数组与 QImage 互转，内存布局允许时直接共享内存，不复制像素
+    数组约定：uint8/uint16，形状 (高, 宽) 为灰度，(高, 宽, 3/4) 为彩色，通道顺序由 channel_order 指定
+    """
+
+    LITTLE_ENDIAN = sys.byteorder == "little"
+
+    @staticmethod
+    def get_format(array, channel_order="BGR"):
+        """
+        数组可直接包装时对应的 QImage 格式，需要转换时返回 None
+        小端序下 ARGB32 在内存中的字节顺序为 B,G,R,A
+        """
+        channels = 1 if array.ndim == 2 else array.shape[2]
+        if array.dtype == np.uint8:
+            if channels == 1:
+                return QImage.Format.Format_Grayscale8
+            if channels == 3:
+                return QImage.Format.Format_BGR888 if channel_order == "BGR" else QImage.Format.Format_RGB888
+            if channels == 4:
+                if channel_order == "RGB":
+                    return QImage.Format.Format_RGBA8888
+                return QImage.Format.Format_ARGB32 if QImageUtil.LITTLE_ENDIAN else None
+        if array.dtype == np.uint16:
+            if channels == 1:
+                return QImage.Format.Format_Grayscale16
+            if channels == 4 and channel_order == "RGB":
+                return QImage.Format.Format_RGBA64
+        return None
+
+    @staticmethod
+    def normalize(array, channel_order="BGR"):
+        """
+        把无法直接包装的数组转换为可包装的布局（会复制）
+        :return: (数组, 通道顺序)
+        """
+        if array.dtype not in (np.uint8, np.uint16):
+            raise ValueError(f"不支持的像素类型: {array.dtype}")
+        if array.ndim not in (2, 3) or (array.ndim == 3 and array.shape[2] not in (1, 3, 4)):
+            raise ValueError(f"不支持的数组形状: {array.shape}")
+        if array.ndim == 3 and array.shape[2] == 1:
+            array = array[:, :, 0]
+        if QImageUtil.get_format(array, channel_order) is not None:
+            return array, channel_order
+        if array.dtype == np.uint16:
+            # 16 位彩色统一转为 RGBA64
+            height, width, channels = array.shape
+            converted = np.empty((height, width, 4), dtype=np.uint16)
+            order = [2, 1, 0] if channel_order == "BGR" else [0, 1, 2]
+            converted[:, :, :3] = array[:, :, order]
+            converted[:, :, 3] = array[:, :, 3] if channels == 4 else 65535
+            return converted, "RGB"
+        # 大端序的 BGRA
+        return np.ascontiguousarray(array[:, :, [2, 1, 0, 3]]), "RGB"
+
+    @staticmethod
+    def from_array(array, channel_order="BGR", copy=False):
+        """
+        把数组包装为 QImage，行内连续时不复制像素（行步长任意，裁剪得到的视图也可以直接包装）
+        QImage 不持有数组，这里把数组挂在返回的 QImage 对象上保持引用；
+        不要让由它隐式共享出去的 QImage 比这个对象活得更久，需要长期保存时传 copy=True
+        """
+        array, channel_order = QImageUtil.normalize(array, channel_order)
+        pixel_bytes = array.itemsize * (1 if array.ndim == 2 else array.shape[2])
+        if array.strides[-1] != array.itemsize or (array.ndim == 3 and array.strides[1] != pixel_bytes) \
+                or array.strides[0] < array.shape[1] * pixel_bytes:
+            array = np.ascontiguousarray(array)
+        height, width = array.shape[:2]
+        data = array.data
+        if not array.flags.c_contiguous:
+            # 行之间有间隔的视图：按首行地址取覆盖所有行的一段内存
+            data = (ctypes.c_ubyte * (array.strides[0] * (height - 1) + width * pixel_bytes)).from_address(
+                array.ctypes.data)
+        image = QImage(data, width, height, array.strides[0], QImageUtil.get_format(array, channel_order))
+        if copy:
+            return image.copy()
+        image._array = array
+        return image
+
+    @staticmethod
+    def to_pixmap(array, channel_order="BGR"):
+        """直接从数组生成 QPixmap，只复制一次（到 QPixmap）"""
+        return QPixmap.fromImage(QImageUtil.from_array(array, channel_order))
+
+    @staticmethod
+    def to_array(image, channel_order="BGR"):
+        """
+        把 QImage 的像素内存包装为只读数组，格式一致时不复制
+        8 位彩色返回 (高, 宽, 3/4)，灰度返回 (高, 宽)，RGBA64 返回 uint16 的 (高, 宽, 4)
+        格式不匹配时先由 Qt 转换到对应格式（会复制）
+        """
+        image_format = image.format()
+        if image_format == QImage.Format.Format_Grayscale8:
+            return QImageUtil.wrap_bits(image, 1, np.uint8)
+        if image_format == QImage.Format.Format_Grayscale16:
+            return QImageUtil.wrap_bits(image, 1, np.uint16)
+        if image_format == QImage.Format.Format_RGBA64 and channel_order == "RGB":
+            return QImageUtil.wrap_bits(image, 4, np.uint16)
+
+        has_alpha = image.hasAlphaChannel()
+        if channel_order == "BGR" and QImageUtil.LITTLE_ENDIAN:
+            if has_alpha or image_format == QImage.Format.Format_RGB32:
+                target = image_format if image_format in (QImage.Format.Format_ARGB32, QImage.Format.Format_RGB32) \
+                    else QImage.Format.Format_ARGB32
+                return QImageUtil.wrap_bits(QImageUtil.convert(image, target), 4, np.uint8)
+            return QImageUtil.wrap_bits(QImageUtil.convert(image, QImage.Format.Format_BGR888), 3, np.uint8)
+        if has_alpha:
+            return QImageUtil.wrap_bits(QImageUtil.convert(image, QImage.Format.Format_RGBA8888), 4, np.uint8)
+        return QImageUtil.wrap_bits(QImageUtil.convert(image, QImage.Format.Format_RGB888), 3, np.uint8)
+
+    @staticmethod
+    def encode(image, image_format):
+        """把 QImage 编码为字节，格式不支持或编码失败时抛出 ValueError，避免写出空文件"""
+        buffer = QBuffer()
+        buffer.open(QIODevice.OpenModeFlag.WriteOnly)
+        if not image.save(buffer, image_format):
+            raise ValueError(f"无法编码为 {image_format} 格式")
+        return buffer.data().data()
+
+    @staticmethod
+    def convert(image, image_format):
+        return image if image.format() == image_format else image.convertToFormat(image_format)
+
+    @staticmethod
+    def wrap_bits(image, channels, dtype):
+        itemsize = np.dtype(dtype).itemsize
+        shape = (image.height(), image.width()) if channels == 1 else (image.height(), image.width(), channels)
+        strides = (image.bytesPerLine(), itemsize) if channels == 1 \
+            else (image.bytesPerLine(), itemsize * channels, itemsize)
+        array = np.asarray(_ImageBuffer(image, shape, dtype, strides))
+        array.flags.writeable = False
+        return array
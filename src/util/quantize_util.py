@@ -0,0 +1,134 @@
+import os
+
+import numpy as np
+from PIL import Image
+from loguru import logger
+
+from src.const.fs_constants import FsConstants
+from src.util.admission_util import AdmissionController
+from src.util.worker_pool import WorkerPool
+
+
+class QuantizeUtil:
+    """
+    按给定调色板量化图片并保存为索引色 PNG
+    不抖动时用预先计算的三维查找表映射最近颜色，抖动时交给 PIL 的 Floyd–Steinberg 实现；
+    半透明度低于阈值的像素映射到额外的透明索引
+    """
+
+    @staticmethod
+    def build_lut(colors, bits=FsConstants.QUANTIZE_LUT_BITS):
+        """
+        三维查找表：RGB 各取高 bits 位作为下标，值为离该格子中心最近的调色板索引
+        :return: (2^bits, 2^bits, 2^bits) 的 uint8 数组
+        """
+        palette = np.asarray(colors, dtype=np.float32).reshape(-1, 3)
+        side = 1 << bits
+        centers = (np.arange(side, dtype=np.float32) + 0.5) * (256 / side)
+        grid = np.stack(np.meshgrid(centers, centers, indexing="ij"), axis=-1).reshape(-1, 2)
+        palette_squared = (palette * palette).sum(axis=1)
+        lut = np.empty((side, side, side), dtype=np.uint8)
+        # 按 R 分片计算，调色板较大时中间的距离矩阵也不会太大
+        for red in range(side):
+            points = np.column_stack([np.full(len(grid), centers[red], dtype=np.float32), grid])
+            distances = palette_squared - 2 * points @ palette.T
+            lut[red] = np.argmin(distances, axis=1).reshape(side, side)
+        return lut
+
+    @staticmethod
+    def map_pixels(rgb, lut, bits=FsConstants.QUANTIZE_LUT_BITS):
+        """(高, 宽, 3) 的 uint8 RGB -> (高, 宽) 的调色板索引，按行分块避免大图生成大的中间数组"""
+        shift = 8 - bits
+        indices = np.empty(rgb.shape[:2], dtype=np.uint8)
+        rows = max(FsConstants.QUANTIZE_CHUNK_PIXELS // max(rgb.shape[1], 1), 1)
+        for top in range(0, rgb.shape[0], rows):
+            chunk = rgb[top:top + rows] >> shift
+            indices[top:top + rows] = lut[chunk[:, :, 0], chunk[:, :, 1], chunk[:, :, 2]]
+        return indices
+
+    @staticmethod
+    def palette_image(colors):
+        """调色板对应的 P 模式图片，供 PIL 抖动量化使用"""
+        image = Image.new("P", (1, 1))
+        flat = [value for color in colors for value in color]
+        image.putpalette(flat + flat[-3:] * (256 - len(colors)))  # 用最后一个颜色补满，避免映射到多余的黑色
+        return image
+
+    @staticmethod
+    def quantize(image, colors, dither=False, lut=None):
+        """
+        :param image: PIL 图片
+        :param colors: [(R, G, B)]，最多 255 个（保留一个透明索引）
+        :return: 调色板只包含 colors（以及透明色）的 P 模式图片
+        """
+        colors = [tuple(int(value) for value in color) for color in colors][:255]
+        if not colors:
+            raise ValueError("调色板为空")
+        transparent = None
+        if "A" in image.getbands() or "transparency" in image.info:
+            alpha = np.asarray(image.convert("RGBA").getchannel("A"))
+            transparent = alpha < FsConstants.QUANTIZE_ALPHA_THRESHOLD
+            if not transparent.any():
+                transparent = None
+        rgb_image = image.convert("RGB")
+        if dither:
+            indexed = rgb_image.quantize(palette=QuantizeUtil.palette_image(colors),
+                                         dither=Image.Dither.FLOYDSTEINBERG)
+            indices = np.asarray(indexed)
+        else:
+            indices = QuantizeUtil.map_pixels(np.asarray(rgb_image), QuantizeUtil.build_lut(colors)
+                                              if lut is None else lut)
+        if transparent is not None:
+            indices = indices.copy()
+            indices[transparent] = len(colors)
+        result = Image.fromarray(indices, "P")
+        palette = [value for color in colors for value in color]
+        if transparent is not None:
+            palette += [0, 0, 0]
+            result.info["transparency"] = len(colors)
+        result.putpalette(palette)
+        return result
+
+    @staticmethod
+    def quantize_file(path, output_path, colors, dither=False):
+        """
+        量化单个文件并保存为索引色 PNG，供进程池调用
+        :return: (原文件大小, 输出文件大小)
+        """
+        with Image.open(path) as image:
+            result = QuantizeUtil.quantize(image, colors, dither)
+        params = {"optimize": True}
+        if "transparency" in result.info:
+            params["transparency"] = result.info["transparency"]
+        result.save(output_path, "PNG", **params)
+        return os.path.getsize(path), os.path.getsize(output_path)
+
+    @staticmethod
+    def quantize_folder(paths, output_folder, colors, dither=False, workers=None, progress=None, stopped=None):
+        """
+        在常驻进程池中批量量化，每个文件输出为同名的 .png
+        :param workers: 同时量化的文件数，默认为进程池大小
+        :param progress: 每完成一个文件调用 progress(完成数, 总数)
+        :param stopped: 返回 True 时不再开始新的文件
+        :return: (成功数, 原文件总大小, 输出总大小)
+        """
+        done = succeeded = bytes_in = bytes_out = 0
+        items = [(path, os.path.join(output_folder, os.path.splitext(os.path.basename(path))[0] + ".png"),
+                  colors, dither) for path in paths]
+        admission = AdmissionController()
+        for item, future in WorkerPool().map_unordered(QuantizeUtil.quantize_file, items, workers, stopped,
+                                                       lambda item: admission.estimate(item[0])):
+            done += 1
+            if future.cancelled():
+                logger.info(f"量化已取消: {item[0]}")
+            else:
+                try:
+                    size_in, size_out = future.result()
+                    succeeded += 1
+                    bytes_in += size_in
+                    bytes_out += size_out
+                except Exception as e:
+                    logger.error(f"量化失败: {item[0]} {e}")
+            if progress is not None:
+                progress(done, len(items))
+        return succeeded, bytes_in, bytes_out
@@ -0,0 +1,69 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from PySide6.QtCore import Qt, QRect
+from PySide6.QtGui import QGuiApplication, QImage
+from loguru import logger
+
+from src.util.qimage_util import QImageUtil
+
+
+class ScreenCaptureUtil:
+    """
+    整个虚拟桌面截图：按每个屏幕的位置和设备像素比拼接成一张图
+    screens 参数可传入任意实现了 geometry()、devicePixelRatio()、grabWindow(0) 的对象，
+    不传时使用 QGuiApplication.screens()
+    """
+
+    @staticmethod
+    def get_screens(screens=None):
+        return list(screens) if screens else QGuiApplication.screens()
+
+    @staticmethod
+    def virtual_geometry(screens=None):
+        """所有屏幕的外接矩形（逻辑坐标）"""
+        geometry = QRect()
+        for screen in ScreenCaptureUtil.get_screens(screens):
+            geometry = geometry.united(screen.geometry())
+        return geometry
+
+    @staticmethod
+    def device_pixel_ratio(screens=None):
+        """拼接图的像素比取各屏幕中最大的，高分屏不损失细节，低分屏按比例放大"""
+        return max(screen.devicePixelRatio() for screen in ScreenCaptureUtil.get_screens(screens))
+
+    @staticmethod
+    def grab_virtual_desktop(screens=None):
+        """
+        截取所有屏幕并拼接，屏幕之间没有覆盖的区域为黑色
+        截屏只能在界面线程进行，这里逐个截取后，缩放和复制像素放到线程池中并行处理
+        :return: 设置了设备像素比的 QImage，(0, 0) 对应虚拟桌面左上角
+        """
+        screens = ScreenCaptureUtil.get_screens(screens)
+        geometry = ScreenCaptureUtil.virtual_geometry(screens)
+        ratio = ScreenCaptureUtil.device_pixel_ratio(screens)
+        width, height = round(geometry.width() * ratio), round(geometry.height() * ratio)
+        canvas = QImage(width, height, QImage.Format.Format_RGB32)
+        canvas.fill(Qt.GlobalColor.black)
+        # 各屏幕写入画布上互不重叠的区域，可以并行
+        pixels = np.frombuffer(canvas.bits(), dtype=np.uint8).reshape(height, canvas.bytesPerLine())
+        grabs = [(screen.geometry(), screen.grabWindow(0).toImage()) for screen in screens]
+
+        def paste(item):
+            screen_geometry, image = item
+            left = round((screen_geometry.x() - geometry.x()) * ratio)
+            top = round((screen_geometry.y() - geometry.y()) * ratio)
+            right = min(round((screen_geometry.right() + 1 - geometry.x()) * ratio), width)
+            bottom = min(round((screen_geometry.bottom() + 1 - geometry.y()) * ratio), height)
+            if image.width() != right - left or image.height() != bottom - top:
+                # 像素比低于拼接图的屏幕放大到统一的像素比
+                image = image.scaled(right - left, bottom - top, Qt.AspectRatioMode.IgnoreAspectRatio,
+                                     Qt.TransformationMode.SmoothTransformation)
+            source = QImageUtil.to_array(QImageUtil.convert(image, QImage.Format.Format_RGB32))
+            pixels[top:bottom, left * 4:right * 4] = source.reshape(bottom - top, -1)
+
+        with ThreadPoolExecutor(max_workers=len(grabs)) as executor:
+            list(executor.map(paste, grabs))
+        canvas.setDevicePixelRatio(ratio)
+        logger.debug(f"截取 {len(screens)} 个屏幕，虚拟桌面 {geometry.width()}x{geometry.height()}，像素比 {ratio}")
+        return canvas
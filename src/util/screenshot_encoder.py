@@ -0,0 +1,115 @@
+import datetime
+import os
+
+import cv2
+import numpy as np
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal, Qt
+from PySide6.QtGui import QImage
+from loguru import logger
+
+from src.const.fs_constants import FsConstants
+from src.util.qimage_util import QImageUtil
+
+
+class HistoryEntry:
+    """一条截图历史：内存中只保存压缩后的 PNG 数据和缩略图"""
+
+    def __init__(self, data, size, thumbnail):
+        self.data = data
+        self.size = size  # (宽, 高)
+        self.thumbnail = thumbnail
+        self.created = datetime.datetime.now()
+
+    def to_image(self):
+        """解码为 QImage，用于再次复制到剪贴板"""
+        return QImage.fromData(self.data, "PNG")
+
+
+class _EncodeTask(QRunnable):
+    def __init__(self, function, *args):
+        super().__init__()
+        self.function = function
+        self.args = args
+
+    def run(self):
+        self.function(*self.args)
+
+
+class ScreenshotEncoder(QObject):
+    """
+    截图编码：保存文件和生成历史记录都在线程池中进行，界面线程只提交 QImage（隐式共享，不复制像素）
+    编码用 OpenCV，期间释放 GIL，不影响界面响应
+    """
+    saved = Signal(str)  # 保存的文件路径
+    failed = Signal(str)
+    history_ready = Signal(object)  # HistoryEntry
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(FsConstants.SCREENSHOT_ENCODE_WORKERS)
+
+    @staticmethod
+    def encode(image, image_format, level):
+        """
+        :param image_format: FsConstants.SCREENSHOT_FORMATS 之一
+        :param level: PNG 为压缩级别 0~9，JPEG/WebP 为质量 1~100
+        :return: 编码后的字节
+        """
+        array = QImageUtil.to_array(image)
+        if array.ndim == 3 and array.shape[2] == 4 and \
+                (not image.hasAlphaChannel() or image_format == FsConstants.SCREENSHOT_FORMAT_JPEG):
+            # 屏幕截图没有透明通道，只编码 BGR
+            array = array[:, :, :3]
+        if image_format == FsConstants.SCREENSHOT_FORMAT_JPEG:
+            extension, params = ".jpg", [cv2.IMWRITE_JPEG_QUALITY, level]
+        elif image_format == FsConstants.SCREENSHOT_FORMAT_WEBP:
+            extension, params = ".webp", [cv2.IMWRITE_WEBP_QUALITY, level]
+        else:
+            extension, params = ".png", [cv2.IMWRITE_PNG_COMPRESSION, level]
+        success, buffer = cv2.imencode(extension, array, params)
+        if not success:
+            raise ValueError(f"编码失败: {image_format}")
+        return buffer
+
+    def save(self, image, path, image_format, level):
+        """在后台编码并写入 path"""
+        self.pool.start(_EncodeTask(self.save_image, image, path, image_format, level))
+
+    def save_image(self, image, path, image_format, level):
+        try:
+            # np.ndarray.tofile 支持中文路径
+            self.encode(image, image_format, level).tofile(path)
+            logger.info(f"截图已保存: {path}")
+            self.saved.emit(path)
+        except Exception as e:
+            logger.error(f"保存截图失败: {e}")
+            self.failed.emit(str(e))
+
+    def add_to_history(self, image):
+        """在后台压缩并生成缩略图，完成后发出 history_ready"""
+        self.pool.start(_EncodeTask(self.create_history_entry, image))
+
+    def create_history_entry(self, image):
+        try:
+            data = self.encode(image, FsConstants.SCREENSHOT_FORMAT_PNG, FsConstants.SCREENSHOT_HISTORY_PNG_LEVEL)
+            size = FsConstants.SCREENSHOT_THUMBNAIL_SIZE
+            thumbnail = image.scaled(size, size, Qt.AspectRatioMode.KeepAspectRatio,
+                                     Qt.TransformationMode.SmoothTransformation)
+            self.history_ready.emit(HistoryEntry(np.asarray(data).tobytes(), (image.width(), image.height()),
+                                                 thumbnail))
+        except Exception as e:
+            logger.error(f"生成截图历史失败: {e}")
+
+    def wait(self):
+        """等待所有编码完成，退出前调用，避免丢失未写完的文件"""
+        self.pool.waitForDone()
+
+    @staticmethod
+    def default_extension(image_format):
+        return FsConstants.SCREENSHOT_EXTENSIONS[image_format]
+
+    @staticmethod
+    def with_extension(path, image_format):
+        """没有扩展名时按格式补上"""
+        return path if os.path.splitext(path)[1] else path + ScreenshotEncoder.default_extension(image_format)
@@ -0,0 +1,136 @@
+import builtins
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+from loguru import logger
+
+from src.const.fs_constants import FsConstants
+
+
+class StartupProfiler:
+    """
+    启动性能分析：记录各启动阶段的耗时，以及类似 `python -X importtime` 的模块导入耗时报告。
+    通过命令行参数 --profile-startup 或环境变量 FSBESTPNG_PROFILE_STARTUP 开启，
+    打包后的程序无法传 -X 参数，所以导入耗时用 __import__ 钩子统计。
+    """
+
+    def __init__(self, enabled=False, output_path=None, exit_after_show=False, launch_time=None):
+        self.enabled = enabled
+        self.start_time = time.perf_counter()
+        # 基准测试用：结果 JSON 输出路径、首次绘制后是否退出、父进程启动子进程的时间戳
+        self.output_path = output_path
+        self.exit_after_show = exit_after_show
+        self.launch_time = launch_time
+        self.launch_offset = time.time() - launch_time if launch_time else None
+        self.phases = []  # [(阶段名, 开始偏移秒, 耗时秒)]
+        self.imports = []  # [(模块名, 自身耗时秒, 累计耗时秒, 嵌套层级)]
+        self._import_stack = []
+        self._original_import = None
+        if enabled:
+            self.install_import_hook()
+
+    @staticmethod
+    def from_environment():
+        """根据命令行参数和环境变量创建分析器"""
+        enabled = FsConstants.PROFILE_STARTUP_ARG in sys.argv or bool(os.environ.get(FsConstants.PROFILE_STARTUP_ENV))
+        if FsConstants.PROFILE_STARTUP_ARG in sys.argv:
+            # Qt 不认识这个参数，提前移除
+            sys.argv.remove(FsConstants.PROFILE_STARTUP_ARG)
+        launch_time = os.environ.get(FsConstants.PROFILE_LAUNCH_TIME_ENV)
+        return StartupProfiler(
+            enabled,
+            output_path=os.environ.get(FsConstants.PROFILE_OUTPUT_ENV),
+            exit_after_show=bool(os.environ.get(FsConstants.PROFILE_EXIT_AFTER_SHOW_ENV)),
+            launch_time=float(launch_time) if launch_time else None,
+        )
+
+    def install_import_hook(self):
+        """替换 __import__，统计首次导入模块的耗时"""
+        self._original_import = builtins.__import__
+        original_import = self._original_import
+
+        def timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+            if level or name in sys.modules:
+                return original_import(name, globals, locals, fromlist, level)
+            self._import_stack.append(0.0)
+            start = time.perf_counter()
+            try:
+                return original_import(name, globals, locals, fromlist, level)
+            finally:
+                cumulative = time.perf_counter() - start
+                children = self._import_stack.pop()
+                self.imports.append((name, cumulative - children, cumulative, len(self._import_stack)))
+                if self._import_stack:
+                    self._import_stack[-1] += cumulative
+
+        builtins.__import__ = timed_import
+
+    def uninstall_import_hook(self):
+        if self._original_import is not None:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+
+    @contextmanager
+    def phase(self, name):
+        """记录一个启动阶段的耗时"""
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, start - self.start_time, time.perf_counter() - start))
+
+    def mark(self, name):
+        """记录一个时间点（例如首次绘制完成）"""
+        if self.enabled:
+            self.phases.append((name, time.perf_counter() - self.start_time, 0.0))
+
+    def import_time_report(self, limit=30):
+        """生成 -X importtime 风格的报告，按累计耗时倒序取前 limit 条"""
+        lines = ["import time: self [us] | cumulative | imported package"]
+        top = sorted(self.imports, key=lambda item: item[2], reverse=True)[:limit]
+        for name, self_time, cumulative, depth in top:
+            lines.append(f"import time: {int(self_time * 1e6):>9} | {int(cumulative * 1e6):>10} | {'  ' * depth}{name}")
+        return "\n".join(lines)
+
+    def since_launch(self, offset):
+        """把相对分析器创建的偏移换算成相对进程启动（父进程记录的时间戳）的偏移"""
+        if self.launch_offset is None:
+            return None
+        return self.launch_offset + offset
+
+    def to_dict(self):
+        return {
+            "launch_offset": self.launch_offset,
+            "phases": [{"name": name, "offset": offset, "duration": duration, "since_launch": self.since_launch(offset)}
+                       for name, offset, duration in self.phases],
+            "imports": [{"name": name, "self": self_time, "cumulative": cumulative, "depth": depth}
+                        for name, self_time, cumulative, depth in self.imports],
+        }
+
+    def report(self):
+        """停止统计导入耗时并输出报告到日志"""
+        if not self.enabled:
+            return
+        self.uninstall_import_hook()
+        logger.info("=== 启动耗时 ===")
+        for name, offset, duration in self.phases:
+            logger.info(f"{name}: 开始于 {offset * 1000:.1f} ms, 耗时 {duration * 1000:.1f} ms")
+        logger.info(f"模块导入耗时:\n{self.import_time_report()}")
+        logger.info("===============")
+        if self.output_path:
+            with open(self.output_path, "w", encoding="utf-8") as file:
+                json.dump(self.to_dict(), file, ensure_ascii=False)
+
+    def finish(self, app):
+        """首次绘制完成后调用：输出报告，基准测试模式下直接退出"""
+        self.mark("first_paint")
+        self.report()
+        if self.exit_after_show:
+            # quit() 会先关闭窗口，而主窗口关闭时只隐藏到托盘，这里直接退出事件循环
+            app.exit(0)
@@ -0,0 +1,95 @@
+import hashlib
+import io
+import os
+import sqlite3
+import threading
+
+from PIL import Image
+from fs_base.config_manager import singleton
+from loguru import logger
+
+from src.const.fs_constants import FsConstants
+from src.util.common_util import CommonUtil
+
+
+@singleton
+class ThumbnailCache:
+    """
+    按内容寻址的磁盘缩略图缓存
+    缩略图以文件内容的 SHA-1 命名，内容相同的文件共用一张缩略图；
+    索引 (路径, 修改时间, 大小) -> 摘要 保存在 SQLite 中，再次打开文件夹时只需 stat 即可命中，不用重新读取文件
+    """
+
+    def __init__(self, cache_dir=None):
+        self.cache_dir = cache_dir or os.path.join(CommonUtil.get_external_path(), FsConstants.THUMBNAIL_CACHE_DIR)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(os.path.join(self.cache_dir, FsConstants.THUMBNAIL_INDEX_FILE),
+                                          check_same_thread=False)
+        self.connection.execute("CREATE TABLE IF NOT EXISTS thumbnails (path TEXT PRIMARY KEY, folder TEXT, "
+                                "mtime_ns INTEGER, size INTEGER, digest TEXT)")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS thumbnails_folder ON thumbnails (folder)")
+        self.connection.commit()
+        self.pending = []  # 尚未写入索引的记录
+
+    def load_folder(self, folder):
+        """读取文件夹内所有文件的索引：路径 -> (修改时间, 大小, 摘要)"""
+        folder = os.path.abspath(folder)
+        with self.lock:
+            rows = self.connection.execute("SELECT path, mtime_ns, size, digest FROM thumbnails WHERE folder = ?",
+                                           (folder,)).fetchall()
+        return {path: (mtime_ns, size, digest) for path, mtime_ns, size, digest in rows}
+
+    def thumbnail_path(self, digest):
+        # 按摘要前两位分目录，避免单个目录下文件过多
+        return os.path.join(self.cache_dir, digest[:2], f"{digest}.png")
+
+    def lookup(self, path, stat, entries):
+        """索引中的修改时间和大小都一致且缩略图存在时返回缩略图路径"""
+        entry = entries.get(path)
+        if entry is None or entry[0] != stat.st_mtime_ns or entry[1] != stat.st_size:
+            return None
+        thumbnail_path = self.thumbnail_path(entry[2])
+        return thumbnail_path if os.path.exists(thumbnail_path) else None
+
+    def generate(self, path, stat, size=FsConstants.THUMBNAIL_SIZE):
+        """
+        生成缩略图并写入缓存：JPEG 用 draft 模式按 1/2~1/8 缩小解码
+        :return: (摘要, 缩略图路径)
+        """
+        with open(path, "rb") as file:
+            data = file.read()
+        digest = hashlib.sha1(data).hexdigest()
+        thumbnail_path = self.thumbnail_path(digest)
+        if not os.path.exists(thumbnail_path):
+            with Image.open(io.BytesIO(data)) as image:
+                image.draft("RGB", (size, size))
+                image.thumbnail((size, size))
+                image = image.convert("RGBA" if "A" in image.getbands() or image.mode == "P" else "RGB")
+                os.makedirs(os.path.dirname(thumbnail_path), exist_ok=True)
+                # 先写临时文件再改名，避免其他线程读到写了一半的缩略图
+                temp_path = f"{thumbnail_path}.{threading.get_ident()}.tmp"
+                image.save(temp_path, "PNG", compress_level=1)
+                os.replace(temp_path, thumbnail_path)
+        self.record(path, stat, digest)
+        return digest, thumbnail_path
+
+    def record(self, path, stat, digest):
+        with self.lock:
+            self.pending.append((path, os.path.dirname(path), stat.st_mtime_ns, stat.st_size, digest))
+            if len(self.pending) >= FsConstants.THUMBNAIL_INDEX_BATCH:
+                self.flush_locked()
+
+    def flush(self):
+        with self.lock:
+            self.flush_locked()
+
+    def flush_locked(self):
+        if not self.pending:
+            return
+        try:
+            self.connection.executemany("INSERT OR REPLACE INTO thumbnails VALUES (?, ?, ?, ?, ?)", self.pending)
+            self.connection.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"写入缩略图索引失败: {e}")
+        self.pending = []
@@ -0,0 +1,295 @@
+import math
+import os
+import tempfile
+
+import numpy as np
+from PIL import Image
+from fs_base.config_manager import ConfigManager
+from loguru import logger
+
+from src.const.fs_constants import FsConstants
+from src.util.common_util import CommonUtil
+
+
+class ImageFrame:
+    """
+    一张已解码的图片
+    超出内存预算时，像素数据解码到磁盘上的内存映射文件里，由操作系统按需换入换出，
+    常驻内存不再随图片尺寸增长；关闭时删除映射文件
+    """
+
+    def __init__(self, image, buffer=None, buffer_path=None):
+        self.image = image
+        self.buffer = buffer
+        self.buffer_path = buffer_path
+
+    @property
+    def mapped(self):
+        return self.buffer is not None
+
+    def close(self):
+        self.image = None
+        if self.buffer is not None:
+            buffer, self.buffer = self.buffer, None
+            try:
+                # 先释放映射再删除文件，Windows 下映射未释放时无法删除
+                buffer._mmap.close()
+            except BufferError:
+                # 仍有图像引用这块映射，交给垃圾回收释放
+                pass
+        if self.buffer_path and os.path.exists(self.buffer_path):
+            try:
+                os.remove(self.buffer_path)
+            except OSError as e:
+                logger.warning(f"删除临时映射文件失败: {e}")
+        self.buffer_path = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class TileUtil:
+    """
+    大图分块处理：按内存预算决定是否把整帧放到内存映射缓冲，变换按条带进行，
+    峰值内存由预算决定，而不是由图片尺寸决定
+    """
+
+    @staticmethod
+    def get_memory_budget():
+        """内存预算（字节），在 app.ini 中配置，单位 MB"""
+        budget_mb = ConfigManager().get_config(FsConstants.TILE_MEMORY_BUDGET_KEY)
+        return max(int(budget_mb or FsConstants.TILE_MEMORY_BUDGET_DEFAULT), 1) * 1024 * 1024
+
+    @staticmethod
+    def bytes_per_pixel(mode):
+        """PIL 内部每个像素占用的字节数（RGB 也按 4 字节存储）"""
+        if mode in ("1", "L", "P"):
+            return 1
+        if mode.startswith("I;16"):
+            return 2
+        return 4
+
+    @staticmethod
+    def estimate_frame_bytes(size, mode):
+        width, height = size
+        return width * height * TileUtil.bytes_per_pixel(mode)
+
+    @staticmethod
+    def fits_in_budget(source, memory_budget=None):
+        """只读取文件头判断整帧解码是否在内存预算内"""
+        memory_budget = memory_budget or TileUtil.get_memory_budget()
+        with Image.open(source) as image:
+            return TileUtil.estimate_frame_bytes(image.size, image.mode) <= memory_budget
+
+    @staticmethod
+    def strip_height(width, mode, memory_budget=None, parts=FsConstants.TILE_STRIP_PARTS):
+        """条带行数：每个条带占预算的 1/parts，至少 1 行"""
+        memory_budget = memory_budget or TileUtil.get_memory_budget()
+        row_bytes = max(width * TileUtil.bytes_per_pixel(mode), 1)
+        return max(memory_budget // parts // row_bytes, 1)
+
+    @staticmethod
+    def create_buffer(size, mode):
+        """在外部目录下创建内存映射缓冲"""
+        width, height = size
+        temp_dir = os.path.join(CommonUtil.get_external_path(), FsConstants.TILE_TEMP_DIR)
+        os.makedirs(temp_dir, exist_ok=True)
+        fd, buffer_path = tempfile.mkstemp(suffix=".raw", dir=temp_dir)
+        os.close(fd)
+        stride = width * TileUtil.bytes_per_pixel(mode)
+        buffer = np.memmap(buffer_path, dtype=np.uint8, mode="w+", shape=(max(height * stride, 1),))
+        return buffer, buffer_path, stride
+
+    @staticmethod
+    def create_array(shape, memory_budget=None):
+        """
+        创建 uint8 数组，超出预算时放到内存映射缓冲
+        :return: ImageFrame，像素数组在 frame.image
+        """
+        memory_budget = memory_budget or TileUtil.get_memory_budget()
+        if int(np.prod(shape)) <= memory_budget:
+            return ImageFrame(np.empty(shape, dtype=np.uint8))
+        height, width, channels = shape
+        buffer, buffer_path, stride = TileUtil.create_buffer((width * channels, height), "L")
+        return ImageFrame(buffer.reshape(shape), buffer, buffer_path)
+
+    @staticmethod
+    def frame_to_array(frame):
+        """
+        内存映射帧的像素数组视图（RGB/RGBA 模式内部均为每像素 4 字节）
+        :return: (数组, 有效通道数)，通道顺序为 RGB
+        """
+        image = frame.image
+        array = frame.buffer.reshape(image.height, image.width, 4)
+        return array, 4 if image.mode == "RGBA" else 3
+
+    @staticmethod
+    def map_buffer(buffer, size, mode, stride):
+        """
+        把内存映射缓冲包装成 PIL 的图像内存，像素直接读写缓冲
+        Image.frombuffer 映射出的图像是只读的，粘贴时会整帧复制，也不支持 RGB，所以使用 Image.core.map_buffer；
+        它不是公开接口，当前 Pillow 不提供或参数不兼容时返回 None，调用方改为在内存中处理
+        """
+        map_buffer = getattr(Image.core, "map_buffer", None)
+        if map_buffer is None or not hasattr(Image.Image, "_new"):
+            logger.warning("当前 Pillow 不支持内存映射图像，改为在内存中处理")
+            return None
+        try:
+            return map_buffer(buffer, size, "raw", 0, (mode, stride, 1))
+        except (TypeError, ValueError) as e:
+            logger.warning(f"当前 Pillow 不支持内存映射图像，改为在内存中处理: {e}")
+            return None
+
+    @staticmethod
+    def new_frame(size, mode, memory_budget=None, color=0):
+        """创建空白帧，超出预算时放到内存映射缓冲"""
+        memory_budget = memory_budget or TileUtil.get_memory_budget()
+        if TileUtil.estimate_frame_bytes(size, mode) <= memory_budget:
+            return ImageFrame(Image.new(mode, size, color))
+        buffer, buffer_path, stride = TileUtil.create_buffer(size, mode)
+        mapped = TileUtil.map_buffer(buffer, size, mode, stride)
+        if mapped is None:
+            ImageFrame(None, buffer, buffer_path).close()
+            return ImageFrame(Image.new(mode, size, color))
+        image = Image.new(mode, (0, 0))._new(mapped)
+        return ImageFrame(image, buffer, buffer_path)
+
+    @staticmethod
+    def open_frame(source, memory_budget=None):
+        """
+        打开并解码图片
+        :param source: 文件路径或文件对象
+        :return: ImageFrame，超出预算时直接解码到内存映射缓冲，不在内存中保留整帧
+        """
+        memory_budget = memory_budget or TileUtil.get_memory_budget()
+        image = Image.open(source)
+        if TileUtil.estimate_frame_bytes(image.size, image.mode) <= memory_budget:
+            image.load()
+            return ImageFrame(image)
+
+        logger.info(f"图片超出内存预算，分块处理: {image.size} {image.mode}")
+        if isinstance(source, str):
+            # 按路径打开的未压缩图片会被 PIL 映射成只读内存，修改时又会整帧复制，所以改用文件对象打开
+            image.close()
+            with open(source, "rb") as file:
+                return TileUtil.decode_to_buffer(Image.open(file))
+        return TileUtil.decode_to_buffer(image)
+
+    @staticmethod
+    def decode_to_buffer(image):
+        """把尚未解码的图片解码到内存映射缓冲"""
+        buffer, buffer_path, stride = TileUtil.create_buffer(image.size, image.mode)
+        try:
+            mapped = TileUtil.map_buffer(buffer, image.size, image.mode, stride)
+            if mapped is not None:
+                # 预先放入映射到缓冲的图像内存，解码器会直接写入这里
+                image.im = mapped
+            image.load()
+        except Exception:
+            image = None
+            ImageFrame(None, buffer, buffer_path).close()
+            raise
+        if mapped is None or image.im is not mapped:
+            # 解码时换成了新分配的图像内存，像素不在缓冲里，按普通帧处理
+            if mapped is not None:
+                logger.warning("解码未写入内存映射缓冲，改为在内存中处理")
+            mapped = None  # 释放对缓冲的引用后才能关闭映射
+            ImageFrame(None, buffer, buffer_path).close()
+            return ImageFrame(image)
+        return ImageFrame(image, buffer, buffer_path)
+
+    @staticmethod
+    def iter_strips(height, rows):
+        for top in range(0, height, rows):
+            yield top, min(top + rows, height)
+
+    @staticmethod
+    def convert(frame, mode, memory_budget=None):
+        """按条带转换颜色模式，返回新的 ImageFrame（原帧由调用方关闭）"""
+        if not frame.mapped:
+            return ImageFrame(frame.image.convert(mode))
+        image = frame.image
+        target = TileUtil.new_frame(image.size, mode, memory_budget)
+        rows = TileUtil.strip_height(image.width, mode, memory_budget)
+        for top, bottom in TileUtil.iter_strips(image.height, rows):
+            target.image.paste(image.crop((0, top, image.width, bottom)).convert(mode), (0, top))
+        return target
+
+    @staticmethod
+    def resize(frame, size, memory_budget=None, resample=Image.Resampling.LANCZOS):
+        """按输出条带缩放，每个条带只读取对应的源图行，结果与整帧缩放一致"""
+        image = frame.image
+        if not frame.mapped and TileUtil.estimate_frame_bytes(size, image.mode) <= (
+                memory_budget or TileUtil.get_memory_budget()):
+            return ImageFrame(image.resize(size, resample))
+        width, height = size
+        target = TileUtil.new_frame(size, image.mode, memory_budget)
+        scale_y = image.height / height
+        # 源图条带要覆盖输出条带对应的行，按源图宽度估算条带高度
+        rows = max(int(TileUtil.strip_height(image.width, image.mode, memory_budget) / max(scale_y, 1)), 1)
+        for top, bottom in TileUtil.iter_strips(height, rows):
+            box = (0, top * scale_y, image.width, bottom * scale_y)
+            target.image.paste(image.resize((width, bottom - top), resample, box=box), (0, top))
+        return target
+
+    @staticmethod
+    def rotate(frame, angle, memory_budget=None):
+        """按条带顺时针旋转 90 的倍数"""
+        turns = (angle // 90) % 4
+        image = frame.image
+        if turns == 0:
+            return TileUtil.convert(frame, image.mode, memory_budget)
+        method = {1: Image.Transpose.ROTATE_270, 2: Image.Transpose.ROTATE_180, 3: Image.Transpose.ROTATE_90}[turns]
+        if not frame.mapped:
+            return ImageFrame(image.transpose(method))
+        width, height = image.size
+        size = (height, width) if turns % 2 else (width, height)
+        target = TileUtil.new_frame(size, image.mode, memory_budget)
+        rows = TileUtil.strip_height(width, image.mode, memory_budget)
+        for top, bottom in TileUtil.iter_strips(height, rows):
+            strip = image.crop((0, top, width, bottom)).transpose(method)
+            if turns == 1:
+                position = (height - bottom, 0)
+            elif turns == 2:
+                position = (0, height - bottom)
+            else:
+                position = (top, 0)
+            target.image.paste(strip, position)
+        return target
+
+    @staticmethod
+    def preview(source, max_size, memory_budget=None):
+        """生成预览图：JPEG 用 draft 模式按 1/2~1/8 缩小解码，其他格式超出预算时解码到内存映射缓冲再缩小"""
+        with Image.open(source) as image:
+            image.draft("RGB", (max_size, max_size))
+            if image.decoderconfig or TileUtil.estimate_frame_bytes(image.size, image.mode) <= (
+                    memory_budget or TileUtil.get_memory_budget()):
+                image.thumbnail((max_size, max_size))
+                return image.convert("RGBA" if "A" in image.getbands() else "RGB")
+        with TileUtil.open_frame(source, memory_budget) as frame:
+            frame.image.thumbnail((max_size, max_size))
+            return frame.image.convert("RGBA" if "A" in frame.image.getbands() else "RGB")
+
+    @staticmethod
+    def save(frame, path, memory_budget=None, **params):
+        """
+        按扩展名流式编码保存，JPEG 不支持透明通道时先按条带转换为 RGB
+        :return: 写出的字节数
+        """
+        image_format = Image.registered_extensions().get(os.path.splitext(path)[1].lower())
+        if image_format is None:
+            raise ValueError(f"不支持的图片格式: {path}")
+        if image_format == "JPEG" and frame.image.mode not in ("RGB", "L", "CMYK"):
+            with TileUtil.convert(frame, "RGB", memory_budget) as converted:
+                converted.image.save(path, image_format, **params)
+        else:
+            frame.image.save(path, image_format, **params)
+        return os.path.getsize(path)
+
+    @staticmethod
+    def scaled_size(size, scale_factor):
+        width, height = size
+        return max(int(math.floor(width * scale_factor)), 1), max(int(math.floor(height * scale_factor)), 1)
@@ -0,0 +1,288 @@
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from PIL import Image
+from PySide6.QtCore import QObject, QFileSystemWatcher, QTimer, Signal
+from fs_base.config_manager import singleton
+from loguru import logger
+
+from src.batch_watermark import process_single_image
+from src.util.admission_util import AdmissionController
+from src.const.fs_constants import FsConstants
+from src.util.common_util import CommonUtil
+from src.util.convert_util import ConvertUtil
+from src.util.job_scheduler import Job, JobScheduler
+from src.util.metadata_strip_util import MetadataStripUtil
+
+
+class WatchPipeline:
+    """
+    监视文件夹的处理流程：加水印 -> 转换/压缩 -> 去除元数据，按配置跳过未启用的步骤
+    配置以 JSON 保存在外部目录，与 app.ini 同级
+    """
+
+    @staticmethod
+    def get_config_path():
+        return os.path.join(CommonUtil.get_external_path(), FsConstants.WATCH_CONFIG_FILE)
+
+    @staticmethod
+    def default_config():
+        return {
+            "enabled": False,
+            "input": "",
+            "output": "",
+            "watermark": {"enabled": False, "path": "", "position": "右下角", "transparency": 100, "scale": 100},
+            "convert": {"enabled": False, "format": FsConstants.CONVERT_FORMAT_JPEG,
+                        "quality": FsConstants.CONVERT_QUALITY_DEFAULT, "lossless": False,
+                        "background": FsConstants.CONVERT_BACKGROUND_DEFAULT, "keep_metadata": True},
+            "strip": {"enabled": False, "keep_icc": True},
+        }
+
+    @staticmethod
+    def load_config():
+        config = WatchPipeline.default_config()
+        path = WatchPipeline.get_config_path()
+        if os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as file:
+                    saved = json.load(file)
+                for key, value in saved.items():
+                    if isinstance(value, dict) and isinstance(config.get(key), dict):
+                        config[key].update(value)
+                    else:
+                        config[key] = value
+            except (OSError, ValueError) as e:
+                logger.warning(f"读取监视文件夹配置失败: {e}")
+        return config
+
+    @staticmethod
+    def save_config(config):
+        with open(WatchPipeline.get_config_path(), "w", encoding="utf-8") as file:
+            json.dump(config, file, ensure_ascii=False, indent=2)
+
+    @staticmethod
+    def validate(config):
+        """:return: 错误信息，配置可用时为 None"""
+        if not config["input"] or not config["output"]:
+            return "请填写输入和输出文件夹！"
+        if not os.path.isdir(config["input"]):
+            return "输入文件夹不存在！"
+        if os.path.normcase(os.path.abspath(config["input"])) == os.path.normcase(os.path.abspath(config["output"])):
+            return "输出文件夹不能与输入文件夹相同！"
+        if not any(config[step]["enabled"] for step in ("watermark", "convert", "strip")):
+            return "请至少启用一个处理步骤！"
+        if config["watermark"]["enabled"] and not os.path.isfile(config["watermark"]["path"]):
+            return "水印文件不存在！"
+        return None
+
+    @staticmethod
+    def run_file(path, config, watermark):
+        """
+        处理单个文件，中间结果直接写在输出文件夹，后续步骤在其上继续
+        :param watermark: 已加载的 RGBA 水印，未启用水印时为 None
+        :return: {"path", "output", "error"}
+        """
+        result = {"path": path, "output": None, "error": None}
+        output_folder = config["output"]
+        current = path
+        try:
+            if watermark is not None:
+                step = config["watermark"]
+                process_single_image(path, watermark, step["position"], step["transparency"], step["scale"],
+                                     output_folder)
+                current = os.path.join(output_folder, os.path.basename(path))
+            if config["convert"]["enabled"]:
+                options = dict(config["convert"], skip_larger=False)
+                output_path = os.path.join(output_folder, ConvertUtil.output_name(current, options["format"]))
+                with AdmissionController().admit(current):
+                    converted = ConvertUtil.convert_file(current, output_path, options)
+                if converted["error"]:
+                    raise ValueError(converted["error"])
+                if current != path and current != output_path:
+                    os.remove(current)
+                current = output_path
+            if config["strip"]["enabled"] and current.lower().endswith(FsConstants.METADATA_STRIP_EXTENSIONS):
+                output_path = current if current != path else os.path.join(output_folder, os.path.basename(path))
+                stripped = MetadataStripUtil.strip_file(current, output_path, config["strip"]["keep_icc"])
+                if stripped["error"]:
+                    raise ValueError(stripped["error"])
+                current = output_path
+            result["output"] = current
+        except Exception as e:
+            logger.error(f"监视文件夹处理失败: {path} {e}")
+            result["error"] = str(e)
+        return result
+
+
+@singleton
+class WatchFolderService(QObject):
+    """
+    监视输入文件夹，新文件写完后按保存的流程自动处理，主窗口隐藏到托盘时也继续运行
+    - QFileSystemWatcher 只通知目录变化，之后定时检查新文件的大小和修改时间，
+      稳定一段时间且能打开后才认为写入完成
+    - 短时间内到达的文件合并为一批提交到 JobScheduler，和其他任务共享 CPU 限制
+    - 处理线程和已加载的水印在批次之间保留，新文件不用重新启动线程或读取水印
+    """
+    state_changed = Signal(bool)
+    batch_done = Signal(list)  # 一批文件的处理结果
+
+    def __init__(self):
+        super().__init__()
+        self.config = WatchPipeline.load_config()
+        self.watcher = None
+        # 常驻线程池，批次之间保留线程
+        self.executor = ThreadPoolExecutor(max_workers=FsConstants.WATCH_WORKERS, thread_name_prefix="watch")
+        self.known = {}  # 文件名 -> (大小, 修改时间)，已存在或已处理的文件
+        self.pending = {}  # 路径 -> (大小, 修改时间, 首次稳定的时间)
+        self.batch = []
+        self.watermark = None
+        self.watermark_key = None
+        self.watermark_lock = threading.Lock()
+
+        self.poll_timer = QTimer(self)
+        self.poll_timer.setInterval(FsConstants.WATCH_POLL_INTERVAL)
+        self.poll_timer.timeout.connect(self.check_pending)
+        self.batch_timer = QTimer(self)
+        self.batch_timer.setSingleShot(True)
+        self.batch_timer.setInterval(FsConstants.WATCH_BATCH_DELAY)
+        self.batch_timer.timeout.connect(self.flush_batch)
+
+    @property
+    def running(self):
+        return self.watcher is not None
+
+    def start_from_config(self):
+        """按保存的配置自动启动，配置不可用时不启动"""
+        if self.config["enabled"] and WatchPipeline.validate(self.config) is None:
+            self.start(self.config)
+
+    def start(self, config):
+        """:return: 是否已开始监视，文件夹无法访问时保持停止状态"""
+        self.stop()
+        self.config = config
+        try:
+            os.makedirs(config["output"], exist_ok=True)
+            # 启动前已存在的文件不处理
+            self.known = {entry.name: self.stat_key(entry.stat()) for entry in os.scandir(config["input"])
+                          if entry.is_file()}
+        except OSError as e:
+            # 文件夹被删除、改名或所在的移动/网络驱动器已断开
+            logger.warning(f"读取监视文件夹失败: {e}")
+            self.state_changed.emit(False)
+            return False
+        self.watcher = QFileSystemWatcher([config["input"]], self)
+        self.watcher.directoryChanged.connect(self.scan)
+        logger.info(f"开始监视文件夹: {config['input']} -> {config['output']}")
+        self.state_changed.emit(True)
+        return True
+
+    def stop(self):
+        if self.watcher is None:
+            return
+        self.watcher.deleteLater()
+        self.watcher = None
+        self.poll_timer.stop()
+        self.batch_timer.stop()
+        self.pending.clear()
+        self.batch = []
+        logger.info("停止监视文件夹")
+        self.state_changed.emit(False)
+
+    @staticmethod
+    def stat_key(stat):
+        return stat.st_size, stat.st_mtime_ns
+
+    def scan(self, _=None):
+        """目录变化时找出新增或改动的图片，加入待确认列表"""
+        if not self.running:
+            return
+        try:
+            entries = list(os.scandir(self.config["input"]))
+        except OSError as e:
+            logger.warning(f"读取监视文件夹失败: {e}")
+            return
+        for entry in entries:
+            if not entry.is_file() or not entry.name.lower().endswith(FsConstants.CONVERT_INPUT_EXTENSIONS):
+                continue
+            key = self.stat_key(entry.stat())
+            if self.known.get(entry.name) != key and entry.path not in self.pending:
+                self.pending[entry.path] = key + (None,)
+        if self.pending and not self.poll_timer.isActive():
+            self.poll_timer.start()
+
+    def check_pending(self):
+        """大小和修改时间持续不变且能打开的文件视为写入完成"""
+        now = time.monotonic()
+        for path, (size, mtime_ns, stable_since) in list(self.pending.items()):
+            try:
+                key = self.stat_key(os.stat(path))
+            except OSError:
+                del self.pending[path]  # 文件已被移走
+                continue
+            if key != (size, mtime_ns):
+                self.pending[path] = key + (None,)
+            elif stable_since is None:
+                self.pending[path] = key + (now,)
+            elif (now - stable_since) * 1000 >= FsConstants.WATCH_SETTLE_TIME and self.can_open(path):
+                del self.pending[path]
+                self.known[os.path.basename(path)] = key
+                self.batch.append(path)
+                if len(self.batch) >= FsConstants.WATCH_BATCH_MAX:
+                    self.flush_batch()
+                else:
+                    self.batch_timer.start()
+        if not self.pending:
+            self.poll_timer.stop()
+
+    @staticmethod
+    def can_open(path):
+        """Windows 下写入方仍占用文件时无法打开"""
+        try:
+            with open(path, "rb"):
+                return True
+        except OSError:
+            return False
+
+    def get_watermark(self, config):
+        """水印按 (路径, 修改时间) 缓存，批次之间复用"""
+        step = config["watermark"]
+        if not step["enabled"]:
+            return None
+        key = (step["path"], os.path.getmtime(step["path"]))
+        with self.watermark_lock:
+            if self.watermark_key != key:
+                self.watermark = Image.open(step["path"]).convert("RGBA")
+                self.watermark_key = key
+            return self.watermark
+
+    def flush_batch(self):
+        if not self.batch:
+            return
+        paths, self.batch = self.batch, []
+        config = self.config
+        job = Job(f"监视文件夹（{len(paths)} 个文件）", lambda job: self.run_batch(job, paths, config),
+                  max_workers=FsConstants.WATCH_WORKERS)
+        job.finished.connect(lambda results: self.batch_done.emit(results or []))
+        JobScheduler().submit(job)
+
+    def run_batch(self, job, paths, config):
+        """在常驻线程池中处理一批文件，同时运行的文件数不超过调度器分配的并发数"""
+        watermark = self.get_watermark(config)
+        results = []
+        remaining = iter(paths)
+        running = set()
+        while True:
+            while len(running) < job.workers and not job.is_cancelled():
+                path = next(remaining, None)
+                if path is None:
+                    break
+                running.add(self.executor.submit(WatchPipeline.run_file, path, config, watermark))
+            if not running:
+                return results
+            done, running = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                results.append(future.result())
+                job.report_item(results[-1], len(results), len(paths))
@@ -0,0 +1,203 @@
+import importlib
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+
+from fs_base.config_manager import ConfigManager, singleton
+from loguru import logger
+
+from src.const.fs_constants import FsConstants
+from src.util.admission_util import AdmissionController
+
+
+def preload_worker():
+    """子进程启动时导入图像库和任务模块，第一个任务不用再等导入"""
+    for name in FsConstants.WORKER_POOL_PRELOAD:
+        try:
+            importlib.import_module(name)
+        except ImportError as e:
+            logger.warning(f"子进程预加载失败: {name} {e}")
+    from PIL import Image
+    Image.init()
+
+
+def ping():
+    return os.getpid()
+
+
+@singleton
+class WorkerPool:
+    """
+    常驻进程池，各批量任务共用：
+    - 主窗口显示后在后台线程启动并预加载模块，第一次点击处理时进程已就绪
+    - 打包后的程序（Nuitka/PyInstaller）和 Windows 用 spawn，其余平台用 forkserver，
+      新进程从已导入模块的 forkserver 复制，不用重新导入
+    - 空闲超过 app.ini 中配置的时间后关闭，下次使用时重新启动
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.executor = None
+        self.active = 0  # 正在使用进程池的调用数
+        self.last_used = time.monotonic()
+        self.idle_timer = None
+
+    @staticmethod
+    def is_frozen():
+        return getattr(sys, "frozen", False) or "__compiled__" in globals()
+
+    @staticmethod
+    def get_context():
+        methods = multiprocessing.get_all_start_methods()
+        if WorkerPool.is_frozen() or "forkserver" not in methods:
+            return multiprocessing.get_context("spawn")
+        context = multiprocessing.get_context("forkserver")
+        context.set_forkserver_preload(list(FsConstants.WORKER_POOL_PRELOAD))
+        return context
+
+    @staticmethod
+    def get_max_workers():
+        return min(os.cpu_count() or 1, FsConstants.WORKER_POOL_MAX_WORKERS)
+
+    @staticmethod
+    def get_idle_timeout():
+        """空闲关闭时间（秒），在 app.ini 中配置"""
+        timeout = ConfigManager().get_config(FsConstants.WORKER_POOL_IDLE_TIMEOUT_KEY)
+        return max(int(timeout or FsConstants.WORKER_POOL_IDLE_TIMEOUT_DEFAULT), 1)
+
+    def get_executor(self):
+        """调用方需持有 self.lock"""
+        if self.executor is None:
+            context = self.get_context()
+            logger.info(f"启动进程池: {self.get_max_workers()} 个进程，{context.get_start_method()}")
+            self.executor = ProcessPoolExecutor(max_workers=self.get_max_workers(), mp_context=context,
+                                                initializer=preload_worker)
+        return self.executor
+
+    def warm_up(self):
+        """在后台线程中启动全部子进程，不阻塞界面"""
+        threading.Thread(target=self._warm_up, name="worker-pool-warm-up", daemon=True).start()
+
+    def _warm_up(self):
+        start = time.perf_counter()
+        try:
+            with self.lock:
+                self.active += 1
+                executor = self.get_executor()
+            # 进程按需创建，每个任务对应一个新进程，提交与进程数相同的任务即可全部启动
+            futures = [executor.submit(ping) for _ in range(self.get_max_workers())]
+            pids = {future.result() for future in futures}
+            logger.info(f"进程池预热完成: {len(pids)} 个进程，耗时 {time.perf_counter() - start:.2f}s")
+        except Exception as e:
+            logger.warning(f"进程池预热失败: {e}")
+        finally:
+            self.release()
+
+    def release(self):
+        with self.lock:
+            self.active -= 1
+            self.last_used = time.monotonic()
+            if self.active == 0:
+                self.schedule_idle_check()
+
+    def schedule_idle_check(self):
+        """调用方需持有 self.lock"""
+        if self.idle_timer is not None:
+            self.idle_timer.cancel()
+        self.idle_timer = threading.Timer(self.get_idle_timeout(), self.shutdown_if_idle)
+        self.idle_timer.daemon = True
+        self.idle_timer.start()
+
+    def shutdown_if_idle(self):
+        with self.lock:
+            if self.executor is None or self.active or \
+                    time.monotonic() - self.last_used < self.get_idle_timeout():
+                return
+            executor, self.executor = self.executor, None
+        logger.info("进程池空闲，关闭子进程")
+        executor.shutdown(wait=False)
+
+    def discard(self, executor):
+        """子进程异常退出后进程池不可再用，下次使用时重新创建"""
+        with self.lock:
+            if self.executor is not executor:
+                return
+            self.executor = None
+        executor.shutdown(wait=False)
+
+    def shutdown(self):
+        with self.lock:
+            executor, self.executor = self.executor, None
+            if self.idle_timer is not None:
+                self.idle_timer.cancel()
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def map_unordered(self, function, items, workers=None, stopped=None, cost=None):
+        """
+        在常驻进程池中执行 function(*item)，同时在执行的任务不超过 workers 个
+        :param stopped: 返回 True 时不再提交新任务
+        :param cost: cost(item) 返回任务的内存占用（字节），提交前向 AdmissionController 申请，
+                     预算不足时先等已提交的任务完成
+        :return: 生成器，按完成顺序产生 (item, future)；退出程序时关闭进程池取消的任务 future.cancelled() 为 True，
+                 调用 result() 会抛出 CancelledError（不是 Exception 的子类），调用方需先检查
+        """
+        workers = max(min(workers or self.get_max_workers(), self.get_max_workers()), 1)
+        controller = AdmissionController() if cost is not None else None
+        with self.lock:
+            executor = self.get_executor()
+            self.active += 1
+        remaining = iter(items)
+        running = {}
+        waiting = None  # 预算不足、等待提交的任务 (item, 内存)
+        shut_down = False  # 进程池已被关闭，不再提交
+        try:
+            while True:
+                while len(running) < workers and not shut_down and not (stopped is not None and stopped()):
+                    if waiting is None:
+                        item = next(remaining, None)
+                        if item is None:
+                            break
+                        waiting = (item, cost(item) if controller is not None else 0)
+                    item, size = waiting
+                    if controller is not None:
+                        if running:
+                            if not controller.try_acquire(size):
+                                break
+                        elif not controller.acquire(size, stopped):
+                            break
+                    try:
+                        future = executor.submit(function, *item)
+                    except RuntimeError as e:
+                        if controller is not None:
+                            controller.release(size)
+                        if isinstance(e, BrokenProcessPool):
+                            raise
+                        shut_down = True  # 退出程序时进程池已关闭
+                        break
+                    if controller is not None:
+                        # 任务结束时释放，生成器提前关闭时仍在运行的任务也在完成后才释放
+                        future.add_done_callback(lambda _, size=size: controller.release(size))
+                    waiting = None
+                    running[future] = item
+                if not running:
+                    return
+                # shutdown(cancel_futures=True) 取消的任务处于 CANCELLED 状态，wait 不会把它算作完成，
+                # 所以定时检查，避免退出程序时一直等待
+                done = {future for future in running if future.cancelled()} or \
+                    wait(running, timeout=FsConstants.WORKER_POOL_WAIT_INTERVAL, return_when=FIRST_COMPLETED)[0]
+                for future in done:
+                    if future.cancelled():
+                        shut_down = True
+                    elif isinstance(future.exception(), BrokenProcessPool):
+                        self.discard(executor)
+                    yield running.pop(future), future
+        except BrokenProcessPool:
+            self.discard(executor)
+            raise
+        finally:
+            self.release()
@@ -1,6 +1,55 @@
-from PySide6.QtWidgets import QWidget, QVBoxLayout, QPushButton, QHBoxLayout, QColorDialog, QLabel
+import os
+
+from PySide6.QtWidgets import QWidget, QVBoxLayout, QPushButton, QHBoxLayout, QColorDialog, QLabel, QFileDialog, \
+    QScrollArea
 from PySide6.QtGui import QColor
-from PySide6.QtCore import Signal
+from PySide6.QtCore import Qt, Signal, QObject, QRunnable, QThreadPool
+from loguru import logger
+
+from src.const.fs_constants import FsConstants
+from src.util.palette_file_util import PaletteFileUtil
+from src.util.palette_util import PaletteUtil
+from src.widget.swatch_grid import SwatchGrid
+
+
+class PaletteExtractor(QObject):
+    """在后台线程提取图片主色，只发出最近一次请求的结果"""
+    extracted = Signal(str, list)  # 图片路径, [((R, G, B), 占比)]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(1)
+        self.generation = 0
+
+    def request(self, path, count=FsConstants.PALETTE_COLOR_COUNT, image=None):
+        """:param image: 已解码的 BGR/BGRA 数组，给出时直接从数组提取，不读取 path"""
+        self.generation += 1
+        self.pool.start(_ExtractTask(self, path, count, self.generation, image))
+
+
+class _ExtractTask(QRunnable):
+    def __init__(self, extractor, path, count, generation, image=None):
+        super().__init__()
+        self.extractor = extractor
+        self.path = path
+        self.count = count
+        self.generation = generation
+        self.image = image
+
+    def run(self):
+        if self.generation != self.extractor.generation:
+            return  # 已有更新的请求
+        try:
+            if self.image is not None:
+                palette = PaletteUtil.extract(self.image, self.count)
+            else:
+                palette = PaletteUtil.get_palette(self.path, self.count)
+        except Exception as e:
+            logger.error(f"提取主色失败: {e}")
+            return
+        if self.generation == self.extractor.generation:
+            self.extractor.extracted.emit(self.path, palette)
 
 
 class ColorPaletteWidget(QWidget):
@@ -15,6 +64,11 @@ class ColorPaletteWidget(QWidget):
         self.setWindowTitle("调色板")
         self.setMinimumSize(300, 200)
 
+        # 显示颜色的区域
+        self.swatch_grid = SwatchGrid()
+        self.swatch_grid.color_clicked.connect(self.color_selected.emit)
+        self.swatch_grid.remove_requested.connect(self.remove_color)
+
         # 初始化颜色列表
         self.colors = initial_colors if initial_colors else [
             QColor("#FF5733"),  # 红色
@@ -27,41 +81,98 @@ class ColorPaletteWidget(QWidget):
         # 布局
         self.layout = QVBoxLayout(self)
 
-        # 显示颜色的区域
-        self.color_display_layout = QHBoxLayout()
-        self.layout.addLayout(self.color_display_layout)
-
-        # 添加颜色按钮
+        # 颜色较多时在限定高度内滚动
+        self.scroll_area = QScrollArea()
+        self.scroll_area.setWidgetResizable(True)
+        self.scroll_area.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+        self.scroll_area.setWidget(self.swatch_grid)
+        self.scroll_area.setMaximumHeight(FsConstants.SWATCH_MAX_ROWS * (FsConstants.SWATCH_CELL_SIZE +
+                                                                         FsConstants.SWATCH_SPACING) + 8)
+        self.layout.addWidget(self.scroll_area)
+
+        # 添加颜色、导入导出按钮
+        button_layout = QHBoxLayout()
         self.add_color_button = QPushButton("添加颜色")
         self.add_color_button.clicked.connect(self.open_color_dialog)
-        self.layout.addWidget(self.add_color_button)
+        button_layout.addWidget(self.add_color_button)
+        self.import_button = QPushButton("导入")
+        self.import_button.clicked.connect(self.import_palette)
+        button_layout.addWidget(self.import_button)
+        self.export_button = QPushButton("导出")
+        self.export_button.clicked.connect(self.export_palette)
+        button_layout.addWidget(self.export_button)
+        self.layout.addLayout(button_layout)
+
+        # 从图片提取的主色
+        self.extractor = PaletteExtractor(self)
+        self.extractor.extracted.connect(self.on_palette_extracted)
+
+    @property
+    def colors(self):
+        """当前颜色列表（由色块网格持有）"""
+        return self.swatch_grid.colors
+
+    @colors.setter
+    def colors(self, colors):
+        self.swatch_grid.set_colors(colors)
+
+    def add_color(self, color):
+        self.swatch_grid.append(color)
+        self.color_added.emit(color)
+
+    def remove_color(self, index):
+        self.swatch_grid.remove(index)
+
+    def set_palette(self, colors):
+        """替换全部颜色，每个颜色发出 color_added"""
+        self.colors = colors
+        for color in colors:
+            self.color_added.emit(color)
 
-        # 初始化颜色显示
-        self.update_color_display()
+    def extract_from_image(self, path, image=None):
+        """在后台提取图片主色，完成后替换当前颜色；image 为已解码的数组时不再读取文件"""
+        self.extractor.request(path, image=image)
+
+    def on_palette_extracted(self, path, palette):
+        self.set_palette([QColor(*rgb) for rgb, _ in palette])
+        logger.info(f"提取主色: {path} " + ", ".join(f"{QColor(*rgb).name()} {ratio:.0%}" for rgb, ratio in palette))
 
     def open_color_dialog(self):
         """打开颜色选择对话框以添加新颜色"""
         color = QColorDialog.getColor()
         if color.isValid():
-            self.colors.append(color)
-            self.color_added.emit(color)
-            self.update_color_display()
+            self.add_color(color)
 
     def update_color_display(self):
         """刷新颜色显示区域"""
-        # 清空现有的颜色显示
-        for i in reversed(range(self.color_display_layout.count())):
-            widget = self.color_display_layout.itemAt(i).widget()
-            if widget:
-                widget.deleteLater()
-
-        # 重新创建颜色显示
-        for color in self.colors:
-            color_button = QPushButton()
-            color_button.setFixedSize(30, 30)
-            color_button.setStyleSheet(f"background-color: {color.name()}; border: 1px solid black;")
-            color_button.clicked.connect(lambda _, c=color: self.color_selected.emit(c))
-            self.color_display_layout.addWidget(color_button)
+        self.swatch_grid.update()
+
+    def import_palette(self):
+        """从 GPL/ASE/JSON 文件导入调色板，默认打开 app.ini 所在目录下的调色板目录"""
+        path, _ = QFileDialog.getOpenFileName(self, "导入调色板", PaletteFileUtil.get_palette_dir(),
+                                              FsConstants.PALETTE_FILE_FILTER)
+        if not path:
+            return
+        try:
+            name, colors = PaletteFileUtil.load(path)
+        except Exception as e:
+            logger.error(f"导入调色板失败: {e}")
+            return
+        self.set_palette([QColor(*color) for color in colors])
+        logger.info(f"导入调色板: {name}，{len(colors)} 种颜色")
+
+    def export_palette(self):
+        path, _ = QFileDialog.getSaveFileName(
+            self, "导出调色板", os.path.join(PaletteFileUtil.get_palette_dir(), "palette.gpl"),
+            FsConstants.PALETTE_FILE_FILTER)
+        if not path:
+            return
+        if not os.path.splitext(path)[1]:
+            path += ".gpl"
+        try:
+            PaletteFileUtil.save(path, [color.getRgb()[:3] for color in self.colors])
+        except Exception as e:
+            logger.error(f"导出调色板失败: {e}")
 
 
 if __name__ == "__main__":
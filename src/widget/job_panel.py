@@ -0,0 +1,93 @@
+from PySide6.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QTableWidget, QTableWidgetItem, QHeaderView, QProgressBar, QPushButton,
+    QComboBox, QLabel
+)
+
+from src.const.fs_constants import FsConstants
+from src.util.job_scheduler import JobScheduler
+
+
+class JobPanel(QWidget):
+    """任务列表：每个任务一行，显示优先级、状态和进度，排队中可调整优先级，未结束的任务可取消"""
+
+    COLUMN_NAME, COLUMN_PRIORITY, COLUMN_STATE, COLUMN_PROGRESS, COLUMN_CANCEL = range(5)
+    FINISHED_STATES = (FsConstants.JOB_STATE_DONE, FsConstants.JOB_STATE_FAILED, FsConstants.JOB_STATE_CANCELLED)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.scheduler = JobScheduler()
+        self.jobs = []  # 与表格行一一对应
+
+        self.table = QTableWidget(0, 5)
+        self.table.setHorizontalHeaderLabels(["任务", "优先级", "状态", "进度", ""])
+        self.table.horizontalHeader().setSectionResizeMode(self.COLUMN_NAME, QHeaderView.ResizeMode.Stretch)
+        self.table.verticalHeader().hide()
+        self.table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.summary_label = QLabel()
+        self.clear_button = QPushButton("清除已结束")
+        self.clear_button.clicked.connect(self.clear_finished)
+
+        bottom_layout = QHBoxLayout()
+        bottom_layout.addWidget(self.summary_label)
+        bottom_layout.addStretch()
+        bottom_layout.addWidget(self.clear_button)
+
+        layout = QVBoxLayout(self)
+        layout.addWidget(self.table)
+        layout.addLayout(bottom_layout)
+
+        self.scheduler.job_added.connect(self.add_job)
+        self.scheduler.job_done.connect(lambda _: self.update_summary())
+        for job in self.scheduler.active_jobs():
+            self.add_job(job)
+
+    def add_job(self, job):
+        row = self.table.rowCount()
+        self.table.insertRow(row)
+        self.jobs.append(job)
+        self.table.setItem(row, self.COLUMN_NAME, QTableWidgetItem(job.name))
+
+        priority_combo = QComboBox()
+        for priority, text in FsConstants.JOB_PRIORITIES.items():
+            priority_combo.addItem(text, priority)
+        priority_combo.setCurrentIndex(priority_combo.findData(job.priority))
+        priority_combo.currentIndexChanged.connect(
+            lambda _, combo=priority_combo, target=job: self.scheduler.set_priority(target, combo.currentData()))
+        self.table.setCellWidget(row, self.COLUMN_PRIORITY, priority_combo)
+
+        self.table.setItem(row, self.COLUMN_STATE, QTableWidgetItem(job.state))
+        progress_bar = QProgressBar()
+        progress_bar.setValue(job.percent)
+        self.table.setCellWidget(row, self.COLUMN_PROGRESS, progress_bar)
+        cancel_button = QPushButton("取消")
+        cancel_button.clicked.connect(lambda _, target=job: self.scheduler.cancel(target))
+        self.table.setCellWidget(row, self.COLUMN_CANCEL, cancel_button)
+
+        job.progress.connect(progress_bar.setValue)
+        job.state_changed.connect(lambda state, target=job: self.on_state_changed(target, state))
+        self.on_state_changed(job, job.state)
+
+    def on_state_changed(self, job, state):
+        if job not in self.jobs:
+            return
+        row = self.jobs.index(job)
+        self.table.item(row, self.COLUMN_STATE).setText(state)
+        self.table.cellWidget(row, self.COLUMN_PRIORITY).setEnabled(state == FsConstants.JOB_STATE_QUEUED)
+        self.table.cellWidget(row, self.COLUMN_CANCEL).setEnabled(state not in self.FINISHED_STATES)
+        if state == FsConstants.JOB_STATE_FAILED and job.error:
+            self.table.item(row, self.COLUMN_STATE).setToolTip(job.error)
+        self.update_summary()
+
+    def update_summary(self):
+        running = sum(1 for job in self.jobs if job.state == FsConstants.JOB_STATE_RUNNING)
+        queued = sum(1 for job in self.jobs if job.state == FsConstants.JOB_STATE_QUEUED)
+        workers = sum(job.workers for job in self.jobs if job.state == FsConstants.JOB_STATE_RUNNING)
+        self.summary_label.setText(f"运行 {running} 个（占用 {workers}/{self.scheduler.get_max_cpu()} 核），"
+                                   f"排队 {queued} 个")
+
+    def clear_finished(self):
+        for row in reversed(range(len(self.jobs))):
+            if self.jobs[row].state in self.FINISHED_STATES:
+                self.table.removeRow(row)
+                del self.jobs[row]
+        self.update_summary()
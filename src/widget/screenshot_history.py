@@ -0,0 +1,30 @@
+from PySide6.QtCore import Qt, QSize, Signal
+from PySide6.QtGui import QIcon, QPixmap
+from PySide6.QtWidgets import QListWidget, QListWidgetItem
+
+from src.const.fs_constants import FsConstants
+
+
+class ScreenshotHistory(QListWidget):
+    """最近截图的缩略图列表，最新的在最前，超过上限时丢弃最早的；双击重新复制到剪贴板"""
+    entry_activated = Signal(object)  # HistoryEntry
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        size = FsConstants.SCREENSHOT_THUMBNAIL_SIZE
+        self.setViewMode(QListWidget.ViewMode.IconMode)
+        self.setFlow(QListWidget.Flow.LeftToRight)
+        self.setWrapping(False)
+        self.setMovement(QListWidget.Movement.Static)
+        self.setIconSize(QSize(size, size))
+        self.setFixedHeight(size + 48)
+        self.setToolTip("双击复制到剪贴板")
+        self.itemDoubleClicked.connect(lambda item: self.entry_activated.emit(item.data(Qt.ItemDataRole.UserRole)))
+
+    def add_entry(self, entry):
+        item = QListWidgetItem(QIcon(QPixmap.fromImage(entry.thumbnail)), entry.created.strftime("%H:%M:%S"))
+        item.setData(Qt.ItemDataRole.UserRole, entry)
+        item.setToolTip(f"{entry.size[0]}x{entry.size[1]}，{len(entry.data) / 1024:.0f} KB")
+        self.insertItem(0, item)
+        while self.count() > FsConstants.SCREENSHOT_HISTORY_SIZE:
+            self.takeItem(self.count() - 1)
@@ -0,0 +1,25 @@
+from PySide6.QtCore import Signal
+from PySide6.QtWidgets import QPushButton, QMenu
+
+
+class SendToButton(QPushButton):
+    """
+    “发送到”按钮，弹出其他工具页列表，选中后发出 send_requested 信号
+    目标页直接接收源页当前已解码的图片，不再重新打开文件
+    """
+    send_requested = Signal(object)  # 目标工具页
+
+    def __init__(self, text="发送到", parent=None):
+        super().__init__(text, parent)
+        self.menu = QMenu(self)
+        self.setMenu(self.menu)
+        self.setEnabled(False)
+
+    def set_targets(self, targets):
+        """
+        :param targets: List[Tuple[str, QWidget]] 标题和工具页的列表
+        """
+        self.menu.clear()
+        for title, target in targets:
+            action = self.menu.addAction(title)
+            action.triggered.connect(lambda checked=False, widget=target: self.send_requested.emit(widget))
@@ -0,0 +1,110 @@
+from PySide6.QtCore import Qt, QRect, QSize, Signal, QEvent
+from PySide6.QtGui import QPainter, QColor, QPen
+from PySide6.QtWidgets import QWidget, QSizePolicy, QToolTip, QMenu
+
+from src.const.fs_constants import FsConstants
+
+
+class SwatchGrid(QWidget):
+    """
+    色块网格：所有颜色在一个控件里自绘，按位置计算点中的色块
+    增删颜色时只重绘受影响的格子，不为每个颜色创建按钮
+    """
+    color_clicked = Signal(QColor)
+    remove_requested = Signal(int)  # 右键删除的颜色下标
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.colors = []
+        self.cell = FsConstants.SWATCH_CELL_SIZE
+        self.spacing = FsConstants.SWATCH_SPACING
+        self.setMouseTracking(True)
+        size_policy = QSizePolicy(QSizePolicy.Policy.Preferred, QSizePolicy.Policy.Preferred)
+        size_policy.setHeightForWidth(True)
+        self.setSizePolicy(size_policy)
+
+    def columns(self, width=None):
+        width = self.width() if width is None else width
+        return max((width + self.spacing) // (self.cell + self.spacing), 1)
+
+    def cell_rect(self, index):
+        columns = self.columns()
+        step = self.cell + self.spacing
+        return QRect(index % columns * step, index // columns * step, self.cell, self.cell)
+
+    def index_at(self, position):
+        """:return: 位置对应的颜色下标，落在间隙或空白处时返回 -1"""
+        step = self.cell + self.spacing
+        column, row = int(position.x()) // step, int(position.y()) // step
+        if column >= self.columns() or position.x() % step >= self.cell or position.y() % step >= self.cell:
+            return -1
+        index = row * self.columns() + column
+        return index if 0 <= index < len(self.colors) else -1
+
+    def hasHeightForWidth(self):
+        return True
+
+    def heightForWidth(self, width):
+        rows = -(-len(self.colors) // self.columns(width))
+        return max(rows * (self.cell + self.spacing) - self.spacing, self.cell)
+
+    def sizeHint(self):
+        width = FsConstants.SWATCH_HINT_COLUMNS * (self.cell + self.spacing) - self.spacing
+        return QSize(width, self.heightForWidth(width))
+
+    def set_colors(self, colors):
+        self.colors = list(colors)
+        self.updateGeometry()
+        self.update()
+
+    def append(self, color):
+        """添加一个颜色，只重绘新的格子；换行时才重新布局"""
+        self.colors.append(color)
+        if (len(self.colors) - 1) % self.columns() == 0:
+            self.updateGeometry()
+        self.update(self.cell_rect(len(self.colors) - 1))
+
+    def remove(self, index):
+        """删除一个颜色，只重绘该位置之后的格子"""
+        del self.colors[index]
+        if len(self.colors) % self.columns() == 0:
+            self.updateGeometry()
+        first = self.cell_rect(index)
+        self.update(QRect(0, first.top(), self.width(), self.height() - first.top()))
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.setPen(QPen(QColor(0, 0, 0), 1))
+        # 只绘制与重绘区域相交的行
+        step = self.cell + self.spacing
+        columns = self.columns()
+        dirty = event.rect()
+        first = max(dirty.top() // step, 0) * columns
+        last = min((dirty.bottom() // step + 1) * columns, len(self.colors))
+        for index in range(first, last):
+            rect = self.cell_rect(index)
+            if rect.intersects(dirty):
+                painter.fillRect(rect, self.colors[index])
+                painter.drawRect(rect.adjusted(0, 0, -1, -1))
+
+    def mousePressEvent(self, event):
+        index = self.index_at(event.position())
+        if index < 0:
+            return
+        if event.button() == Qt.MouseButton.LeftButton:
+            self.color_clicked.emit(self.colors[index])
+        elif event.button() == Qt.MouseButton.RightButton:
+            menu = QMenu(self)
+            remove_action = menu.addAction("删除")
+            if menu.exec(event.globalPosition().toPoint()) is remove_action:
+                self.remove_requested.emit(index)
+
+    def event(self, event):
+        if event.type() == QEvent.Type.ToolTip:
+            index = self.index_at(event.pos())
+            if index >= 0:
+                QToolTip.showText(event.globalPos(), self.colors[index].name().upper(), self)
+            else:
+                QToolTip.hideText()
+            return True
+        return super().event(event)
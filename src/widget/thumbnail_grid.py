@@ -0,0 +1,195 @@
+import os
+import threading
+from collections import OrderedDict
+
+from PySide6.QtCore import Qt, QAbstractListModel, QModelIndex, QObject, QRunnable, QThreadPool, QSize, Signal, \
+    QTimer
+from PySide6.QtGui import QImage, QPixmap, QColor
+from PySide6.QtWidgets import QApplication, QListView
+from loguru import logger
+
+from src.const.fs_constants import FsConstants
+from src.util.thumbnail_cache import ThumbnailCache
+
+
+class ThumbnailLoader(QObject):
+    """
+    后台加载缩略图：请求按后进先出处理，最近滚动到的格子先加载
+    命中磁盘缓存时直接读取缩略图文件，否则读取原图生成
+    """
+    loaded = Signal(str, QImage)  # 路径, 缩略图
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(FsConstants.THUMBNAIL_WORKERS)
+        self.lock = threading.Lock()
+        self.requests = OrderedDict()
+        self.inflight = set()
+        self.entries = {}
+        self.generation = 0  # 切换文件夹后丢弃旧请求的结果
+
+    def reset(self, entries):
+        with self.lock:
+            self.requests.clear()
+            self.entries = entries
+            self.generation += 1
+
+    def request(self, path):
+        with self.lock:
+            if path in self.inflight:
+                return
+            if path in self.requests:
+                self.requests.move_to_end(path)
+                return
+            self.requests[path] = None
+            # 快速滚动时丢弃最早的请求，它们已经滚出可见区域，再次可见时会重新请求
+            while len(self.requests) > FsConstants.THUMBNAIL_MAX_PENDING:
+                self.requests.popitem(last=False)
+        self.pool.start(_LoadTask(self))
+
+    def take(self):
+        with self.lock:
+            if not self.requests:
+                return None, None, self.generation
+            path, _ = self.requests.popitem(last=True)
+            self.inflight.add(path)
+            return path, self.entries, self.generation
+
+    def done(self, path):
+        with self.lock:
+            self.inflight.discard(path)
+
+    def load(self, path, entries):
+        cache = ThumbnailCache()
+        stat = os.stat(path)
+        thumbnail_path = cache.lookup(path, stat, entries)
+        if thumbnail_path is None:
+            _, thumbnail_path = cache.generate(path, stat)
+        return QImage(thumbnail_path)
+
+
+class _LoadTask(QRunnable):
+    def __init__(self, loader):
+        super().__init__()
+        self.loader = loader
+
+    def run(self):
+        path, entries, generation = self.loader.take()
+        if path is None:
+            return
+        try:
+            image = self.loader.load(path, entries)
+        except Exception as e:
+            logger.warning(f"生成缩略图失败: {path} {e}")
+            image = QImage()
+        finally:
+            self.loader.done(path)
+        if generation == self.loader.generation:
+            self.loader.loaded.emit(path, image)
+
+
+class ThumbnailModel(QAbstractListModel):
+    """
+    文件夹缩略图模型：只列出文件名，缩略图在视图请求显示时才加载
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.paths = []
+        self.rows = {}
+        self.pixmaps = OrderedDict()  # 内存中的缩略图，LRU
+        self.failed = set()
+        self.loader = ThumbnailLoader(self)
+        self.loader.loaded.connect(self.on_loaded)
+        self.placeholder = QPixmap(FsConstants.THUMBNAIL_SIZE, FsConstants.THUMBNAIL_SIZE)
+        self.placeholder.fill(QColor(FsConstants.TILE_VIEW_BACKGROUND))
+
+    def set_folder(self, folder, extensions=FsConstants.BATCH_IMAGE_EXTENSIONS):
+        folder = os.path.abspath(folder)
+        ThumbnailCache().flush()
+        self.beginResetModel()
+        try:
+            with os.scandir(folder) as iterator:
+                # 只用目录项判断类型，不逐个 stat，十万个文件也能立即列出
+                self.paths = sorted(entry.path for entry in iterator
+                                    if entry.name.endswith(extensions) and entry.is_file())
+        except OSError as e:
+            logger.warning(f"读取文件夹失败: {e}")
+            self.paths = []
+        self.rows = {path: row for row, path in enumerate(self.paths)}
+        self.pixmaps.clear()
+        self.failed.clear()
+        self.loader.reset(ThumbnailCache().load_folder(folder))
+        self.endResetModel()
+        logger.info(f"缩略图文件夹: {folder}，共 {len(self.paths)} 张图片")
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.paths)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        path = self.paths[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return os.path.basename(path)
+        if role == Qt.ItemDataRole.ToolTipRole:
+            return path
+        if role == Qt.ItemDataRole.DecorationRole:
+            pixmap = self.pixmaps.get(path)
+            if pixmap is not None:
+                self.pixmaps.move_to_end(path)
+                return pixmap
+            if path not in self.failed:
+                # 视图只为可见的格子请求数据，这里触发的加载也只针对可见格子
+                self.loader.request(path)
+            return self.placeholder
+        return None
+
+    def on_loaded(self, path, image):
+        row = self.rows.get(path)
+        if row is None:
+            return
+        if image.isNull():
+            self.failed.add(path)
+            return
+        self.pixmaps[path] = QPixmap.fromImage(image)
+        while len(self.pixmaps) > FsConstants.THUMBNAIL_MEMORY_ITEMS:
+            self.pixmaps.popitem(last=False)
+        index = self.index(row)
+        self.dataChanged.emit(index, index, [Qt.ItemDataRole.DecorationRole])
+
+
+class ThumbnailGrid(QListView):
+    """输入文件夹的缩略图网格，统一尺寸的格子只为可见区域取数据"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.thumbnail_model = ThumbnailModel(self)
+        self.setModel(self.thumbnail_model)
+        self.setViewMode(QListView.ViewMode.IconMode)
+        self.setResizeMode(QListView.ResizeMode.Adjust)
+        self.setMovement(QListView.Movement.Static)
+        self.setUniformItemSizes(True)
+        self.setLayoutMode(QListView.LayoutMode.Batched)
+        self.setBatchSize(FsConstants.THUMBNAIL_LAYOUT_BATCH)
+        self.setIconSize(QSize(FsConstants.THUMBNAIL_SIZE, FsConstants.THUMBNAIL_SIZE))
+        self.setGridSize(QSize(FsConstants.THUMBNAIL_SIZE + 16, FsConstants.THUMBNAIL_SIZE + 28))
+        self.setTextElideMode(Qt.TextElideMode.ElideMiddle)
+        self.setSelectionMode(QListView.SelectionMode.NoSelection)
+        # 定期把新生成的缩略图索引写入磁盘，打开文件夹后才启动
+        self.flush_timer = QTimer(self)
+        self.flush_timer.timeout.connect(lambda: ThumbnailCache().flush())
+        # 退出前写入最后一批索引，否则两次定时写入之间生成的缩略图下次要重新生成
+        app = QApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(self.flush_index)
+
+    def flush_index(self):
+        self.flush_timer.stop()
+        ThumbnailCache().flush()
+
+    def set_folder(self, folder):
+        if folder and os.path.isdir(folder):
+            self.thumbnail_model.set_folder(folder)
+            self.flush_timer.start(FsConstants.THUMBNAIL_INDEX_FLUSH_INTERVAL)
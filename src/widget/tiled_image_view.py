@@ -0,0 +1,323 @@
+import math
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+from PIL import Image
+from PySide6.QtCore import Qt, QThread, Signal, QRectF, QPointF, QTimer
+from PySide6.QtGui import QPainter, QTransform, QColor
+from PySide6.QtWidgets import QWidget, QApplication
+from loguru import logger
+
+from src.const.fs_constants import FsConstants
+from src.util.image_cache import ImageCache
+from src.util.qimage_util import QImageUtil
+from src.util.tile_util import TileUtil
+
+
+class PyramidBuilder(QThread):
+    """
+    后台生成多分辨率金字塔：每一级是上一级的 1/2，按条带缩小，超出内存预算的级别放到内存映射缓冲
+    传入路径时先把原图解码到内存映射缓冲作为第 0 级
+    """
+    level_ready = Signal(int, object)  # 级别, 像素数组
+    error = Signal(str)
+
+    def __init__(self, level0=None, path=None, tile_size=FsConstants.TILE_VIEW_TILE_SIZE):
+        super().__init__()
+        self.level0 = level0
+        self.path = path
+        self.tile_size = tile_size
+        self.frames = []  # 本线程创建的缓冲，由查看器在清空时关闭
+        self.stopped = False
+
+    def stop(self):
+        self.stopped = True
+        self.wait()
+
+    def run(self):
+        try:
+            level = self.level0
+            if level is None:
+                level = self.open_source()
+                if level is None:
+                    return
+                self.level_ready.emit(0, level)
+            index = 0
+            while max(level.shape[0], level.shape[1]) > self.tile_size and not self.stopped:
+                level = self.downscale(level)
+                index += 1
+                if level is not None:
+                    self.level_ready.emit(index, level)
+        except Exception as e:
+            logger.error(f"生成图片金字塔失败: {e}")
+            self.error.emit(str(e))
+
+    def open_source(self):
+        frame = TileUtil.open_frame(self.path)
+        self.frames.append(frame)
+        if frame.mapped and frame.image.mode not in ("RGB", "RGBA"):
+            frame = TileUtil.convert(frame, "RGBA")
+            self.frames.append(frame)
+        if not frame.mapped:
+            # 预算内的图片解码后直接转为数组
+            image = frame.image.convert("RGBA" if "A" in frame.image.getbands() else "RGB")
+            return np.asarray(image)
+        array, channels = TileUtil.frame_to_array(frame)
+        return array[:, :, :channels]
+
+    def downscale(self, level):
+        """按 2x2 取平均缩小一半，奇数行列丢弃，条带之间结果一致"""
+        height, width = level.shape[0] // 2, level.shape[1] // 2
+        frame = TileUtil.create_array((height, width, level.shape[2]))
+        self.frames.append(frame)
+        target = frame.image
+        rows = max(TileUtil.strip_height(level.shape[1], "RGBA") // 2, 1)
+        for top in range(0, height, rows):
+            if self.stopped:
+                return None
+            bottom = min(top + rows, height)
+            strip = np.ascontiguousarray(level[top * 2:bottom * 2, :width * 2])
+            target[top:bottom] = cv2.resize(strip, (width, bottom - top), interpolation=cv2.INTER_AREA) \
+                .reshape(bottom - top, width, -1)
+        return target
+
+
+class TiledImageView(QWidget):
+    """
+    分块显示的大图查看器：滚轮缩放、拖动平移、双击适应窗口
+    后台生成多分辨率金字塔，绘制时按缩放比例选择级别，只加载可见的图块，
+    图块按 LRU 缓存，数量有上限，内存占用与图片尺寸无关
+    """
+    zoom_changed = Signal(float)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setMinimumSize(200, 150)
+        self.setMouseTracking(False)
+        self.tile_size = FsConstants.TILE_VIEW_TILE_SIZE
+        self.tiles = OrderedDict()  # (级别, 列, 行) -> QPixmap
+        self.levels = {}
+        self.image_size = (0, 0)  # 原图 (宽, 高)
+        self.channel_order = "BGR"
+        self.builder = None
+        self.frames = []
+        self.turns = 0  # 顺时针旋转的 90 度次数
+        self.scale = 1.0
+        self.center = QPointF(0, 0)  # 视图中心对应的显示坐标（旋转后的图片坐标）
+        self.fit_factor = 1.0  # 适应窗口的倍数，保持后窗口大小变化时自动适应
+        self.drag_position = None
+        app = QApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(self.clear)
+
+    def set_image(self, array, channel_order="BGR"):
+        """显示内存中的 BGR/BGRA 数组"""
+        self.clear()
+        self.channel_order = channel_order
+        self.image_size = (array.shape[1], array.shape[0])
+        self.levels[0] = array
+        self.start_builder(PyramidBuilder(level0=array, tile_size=self.tile_size))
+
+    def set_path(self, path):
+        """显示图片文件，预算内的图片从全局缓存获取，超出预算的大图在后台解码到内存映射缓冲"""
+        if TileUtil.fits_in_budget(path):
+            array = ImageCache().get(path)
+            if array is not None:
+                self.set_image(array)
+            return
+        self.clear()
+        self.channel_order = "RGB"
+        with Image.open(path) as image:
+            self.image_size = image.size
+        self.start_builder(PyramidBuilder(path=path, tile_size=self.tile_size))
+
+    def start_builder(self, builder):
+        self.builder = builder
+        self.builder.level_ready.connect(self.on_level_ready)
+        self.builder.start()
+        self.fit_to_view(self.fit_factor or 1.0)
+
+    def clear(self):
+        """停止后台任务并释放金字塔和图块"""
+        if self.builder is not None:
+            self.builder.stop()
+            self.frames.extend(self.builder.frames)
+            self.builder = None
+        self.tiles.clear()
+        self.levels = {}
+        for frame in self.frames:
+            frame.close()
+        self.frames = []
+        self.image_size = (0, 0)
+        self.update()
+
+    def on_level_ready(self, index, array):
+        if self.sender() is not self.builder:
+            return
+        self.levels[index] = array
+        self.update()
+
+    def set_rotation(self, angle):
+        """按顺时针角度（90 的倍数）旋转显示，不修改像素"""
+        self.turns = (angle // 90) % 4
+        self.fit_to_view(self.fit_factor or 1.0)
+
+    def display_size(self):
+        width, height = self.image_size
+        return (height, width) if self.turns % 2 else (width, height)
+
+    def fit_to_view(self, factor=1.0):
+        """缩放到适应窗口的 factor 倍并居中"""
+        self.fit_factor = factor
+        width, height = self.display_size()
+        if width and height:
+            self.scale = min(self.width() / width, self.height() / height) * factor
+            self.center = QPointF(width / 2, height / 2)
+            self.zoom_changed.emit(self.scale)
+        self.update()
+
+    def image_transform(self):
+        """图片坐标 -> 窗口坐标"""
+        width, height = self.image_size
+        transform = QTransform()
+        transform.translate(self.width() / 2, self.height() / 2)
+        transform.scale(self.scale, self.scale)
+        transform.translate(-self.center.x(), -self.center.y())
+        if self.turns == 1:
+            transform.translate(height, 0)
+        elif self.turns == 2:
+            transform.translate(width, height)
+        elif self.turns == 3:
+            transform.translate(0, width)
+        transform.rotate(90 * self.turns)
+        return transform
+
+    def choose_level(self):
+        """选择分辨率不低于屏幕像素的最粗级别"""
+        wanted = max(int(math.floor(math.log2(1 / self.scale))), 0) if self.scale < 1 else 0
+        ready = [index for index in self.levels if index <= wanted]
+        return max(ready) if ready else None
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), QColor(FsConstants.TILE_VIEW_BACKGROUND))
+        if not self.image_size[0]:
+            return
+        level = self.choose_level()
+        if level is None:
+            painter.drawText(self.rect(), Qt.AlignmentFlag.AlignCenter, "正在生成预览...")
+            return
+
+        transform = self.image_transform()
+        inverse, _ = transform.inverted()
+        visible = inverse.mapRect(QRectF(self.rect())).intersected(QRectF(0, 0, *self.image_size))
+        factor = 2 ** level
+        span = self.tile_size * factor  # 一个图块覆盖的原图像素
+        columns = range(int(visible.left() // span), int(math.ceil(visible.right() / span)))
+        rows = range(int(visible.top() // span), int(math.ceil(visible.bottom() / span)))
+        if len(columns) * len(rows) > FsConstants.TILE_VIEW_MAX_VISIBLE:
+            # 需要的级别还没生成，不用精细级别一次加载大量图块
+            painter.drawText(self.rect(), Qt.AlignmentFlag.AlignCenter, "正在生成预览...")
+            return
+
+        painter.setTransform(transform)
+        # 放大查看细节时不做平滑，方便观察压缩痕迹
+        painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform, self.scale < 1)
+        loaded = 0
+        pending = False
+        for row in rows:
+            for column in columns:
+                key = (level, column, row)
+                pixmap = self.tiles.get(key)
+                if pixmap is None and loaded < FsConstants.TILE_VIEW_LOADS_PER_PAINT:
+                    pixmap = self.load_tile(key)
+                    loaded += 1
+                if pixmap is None:
+                    pending = True
+                    self.draw_fallback(painter, level, column, row)
+                    continue
+                self.tiles.move_to_end(key)
+                painter.drawPixmap(QRectF(column * span, row * span, pixmap.width() * factor,
+                                          pixmap.height() * factor), pixmap, QRectF(pixmap.rect()))
+        painter.end()
+        if pending:
+            # 剩余图块在下一帧继续加载，避免一次绘制阻塞界面
+            QTimer.singleShot(0, self.update)
+
+    def draw_fallback(self, painter, level, column, row):
+        """图块未加载时，用已缓存的更粗级别图块的对应区域代替"""
+        for coarse in range(level + 1, max(self.levels) + 1):
+            shift = coarse - level
+            key = (coarse, column >> shift, row >> shift)
+            pixmap = self.tiles.get(key)
+            if pixmap is None and coarse in self.levels and \
+                    max(self.levels[coarse].shape[:2]) <= self.tile_size:
+                # 金字塔顶层只有一个图块，总是可以立即加载
+                pixmap = self.load_tile(key)
+            if pixmap is None:
+                continue
+            size = self.tile_size >> shift
+            source = QRectF((column - (key[1] << shift)) * size, (row - (key[2] << shift)) * size, size, size)
+            source = source.intersected(QRectF(pixmap.rect()))
+            span = self.tile_size * 2 ** level
+            factor = 2 ** coarse
+            painter.drawPixmap(QRectF(column * span, row * span, source.width() * factor,
+                                      source.height() * factor), pixmap, source)
+            return
+
+    def load_tile(self, key):
+        level, column, row = key
+        array = self.levels[level]
+        top, left = row * self.tile_size, column * self.tile_size
+        tile = np.ascontiguousarray(array[top:top + self.tile_size, left:left + self.tile_size])
+        if tile.size == 0:
+            return None
+        pixmap = QImageUtil.to_pixmap(tile, self.channel_order)
+        self.tiles[key] = pixmap
+        while len(self.tiles) > FsConstants.TILE_VIEW_CACHE_TILES:
+            self.tiles.popitem(last=False)
+        return pixmap
+
+    def zoom_at(self, position, factor):
+        """以窗口坐标 position 为中心缩放"""
+        width, height = self.display_size()
+        if not width:
+            return
+        fit_scale = min(self.width() / width, self.height() / height)
+        scale = min(max(self.scale * factor, fit_scale * FsConstants.TILE_VIEW_MIN_ZOOM),
+                    FsConstants.TILE_VIEW_MAX_ZOOM)
+        offset = QPointF(position) - QPointF(self.width() / 2, self.height() / 2)
+        anchor = self.center + offset / self.scale
+        self.scale = scale
+        self.center = anchor - offset / self.scale
+        self.fit_factor = None
+        self.zoom_changed.emit(self.scale)
+        self.update()
+
+    def wheelEvent(self, event):
+        steps = event.angleDelta().y() / 120
+        if steps:
+            self.zoom_at(event.position(), FsConstants.TILE_VIEW_ZOOM_STEP ** steps)
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.MouseButton.LeftButton:
+            self.drag_position = event.position()
+
+    def mouseMoveEvent(self, event):
+        if self.drag_position is not None:
+            delta = event.position() - self.drag_position
+            self.drag_position = event.position()
+            self.center -= delta / self.scale
+            self.update()
+
+    def mouseReleaseEvent(self, event):
+        self.drag_position = None
+
+    def mouseDoubleClickEvent(self, event):
+        self.fit_to_view()
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        if self.fit_factor is not None:
+            self.fit_to_view(self.fit_factor)
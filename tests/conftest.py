@@ -0,0 +1,27 @@
+import os
+import sys
+
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+# 界面相关的测试不需要显示器
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from src.util.common_util import CommonUtil  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def external_path(tmp_path, monkeypatch):
+    """外部目录（临时映射文件、配置等）指向测试的临时目录，不写入用户目录"""
+    path = tmp_path / "external"
+    path.mkdir()
+    monkeypatch.setattr(CommonUtil, "get_external_path", staticmethod(lambda: str(path)))
+    return path
+
+
+@pytest.fixture(scope="session")
+def qapp():
+    """整个测试会话共用一个 QApplication"""
+    from PySide6.QtWidgets import QApplication
+    return QApplication.instance() or QApplication([])
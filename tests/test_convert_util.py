@@ -0,0 +1,36 @@
+import io
+
+from PIL import Image
+
+from src.const.fs_constants import FsConstants
+from src.util.convert_util import ConvertUtil
+
+
+def make_rotated_jpeg():
+    """存储为 200x100、EXIF 方向为 6（顺时针旋转 90°）的 JPEG，正确显示为 100x200"""
+    buffer = io.BytesIO()
+    exif = Image.Exif()
+    exif[0x0112] = 6
+    Image.new("RGB", (200, 100), "red").save(buffer, "JPEG", exif=exif)
+    buffer.seek(0)
+    return Image.open(buffer)
+
+
+def options(keep_metadata):
+    return {"quality": 90, "lossless": False, "background": FsConstants.CONVERT_BACKGROUND_DEFAULT,
+            "keep_metadata": keep_metadata}
+
+
+def test_encode_applies_orientation_when_metadata_is_removed():
+    for image_format in FsConstants.CONVERT_FORMATS:
+        data = ConvertUtil.encode(make_rotated_jpeg(), image_format, options(False))
+        with Image.open(io.BytesIO(data)) as result:
+            assert result.size == (100, 200), image_format
+            assert result.getexif().get(0x0112, 1) == 1
+
+
+def test_encode_keeps_orientation_tag_with_metadata():
+    data = ConvertUtil.encode(make_rotated_jpeg(), FsConstants.CONVERT_FORMAT_JPEG, options(True))
+    with Image.open(io.BytesIO(data)) as result:
+        assert result.size == (200, 100)
+        assert result.getexif().get(0x0112) == 6
@@ -0,0 +1,97 @@
+import random
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from src.util.duplicate_util import BKTree, DuplicateUtil, HashIndex
+
+ALL_BITS = (1 << 64) - 1
+
+
+def create_image(path, seed, size=(240, 180)):
+    """平滑的随机图案：8x6 随机明暗放大，哈希对重新编码和缩放稳定"""
+    rng = np.random.default_rng(seed)
+    coarse = rng.integers(0, 256, size=(6, 8, 3), dtype=np.uint8)
+    image = Image.fromarray(coarse).resize(size, Image.Resampling.BICUBIC)
+    image.save(path)
+    return image
+
+
+def test_bktree_search_radius():
+    tree = BKTree()
+    for value in (0b0000, 0b0001, 0b0011, 0b0111, 0b1111):
+        tree.add(value, bin(value))
+    assert tree.search(0, 0) == [(0, "0b0")]
+    assert tree.search(0, 1) == [(0, "0b0"), (1, "0b1")]
+    found = tree.search(0b0011, 1)
+    assert found[0] == (0, "0b11")
+    assert sorted(found[1:]) == [(1, "0b1"), (1, "0b111")]
+    assert [distance for distance, _ in tree.search(0, 4)] == [0, 1, 2, 3, 4]
+    assert BKTree().search(0, 64) == []
+
+
+def test_bktree_matches_brute_force():
+    rng = random.Random(0)
+    values = [rng.getrandbits(64) for _ in range(300)]
+    # 加入若干近似值，保证每个半径都有命中
+    values += [value ^ (1 << rng.randrange(64)) for value in values[:50]]
+    tree = BKTree()
+    for index, value in enumerate(values):
+        tree.add(value, index)
+    for query in values[:20] + [rng.getrandbits(64) for _ in range(20)]:
+        for radius in (0, 3, 10, 24):
+            expected = sorted(index for index, value in enumerate(values) if BKTree.distance(query, value) <= radius)
+            found = tree.search(query, radius)
+            assert sorted(index for _, index in found) == expected
+            assert [distance for distance, _ in found] == sorted(distance for distance, _ in found)
+
+
+def test_pack_bits_most_significant_first():
+    bits = np.zeros((3, 8, 8), dtype=bool)
+    bits[0, 0, 0] = True
+    bits[1, 7, 7] = True
+    bits[2] = True
+    assert DuplicateUtil.pack_bits(bits).tolist() == [1 << 63, 1, ALL_BITS]
+
+
+def test_dhash_of_gradients():
+    increasing = np.tile(np.arange(9, dtype=np.float32), (8, 1))
+    hashes = DuplicateUtil.dhash_batch(np.stack([increasing, increasing[:, ::-1]]))
+    assert hashes.tolist() == [ALL_BITS, 0]
+
+
+def test_hash_index_round_trips_64_bit_values(tmp_path):
+    index = type(HashIndex())(index_path=str(tmp_path / "index.sqlite3"))
+    path = str(tmp_path / "a.png")
+    index.save([(path, 1, 2, ALL_BITS, 1 << 63)])
+    assert index.load([str(tmp_path)]) == {path: (1, 2, ALL_BITS, 1 << 63)}
+
+
+def test_find_duplicates_groups_reencoded_copy(tmp_path):
+    original = create_image(str(tmp_path / "a.png"), seed=1)
+    # 同一张图片缩小后重新编码为 JPEG
+    original.resize((180, 135), Image.Resampling.LANCZOS).save(str(tmp_path / "b.jpg"), quality=70)
+    create_image(str(tmp_path / "c.png"), seed=2)
+    paths = [str(tmp_path / name) for name in ("c.png", "b.jpg", "a.png")]
+    assert DuplicateUtil.find_duplicates(paths) == [[str(tmp_path / "a.png"), str(tmp_path / "b.jpg")]]
+
+
+def test_find_duplicates_requires_both_hashes(monkeypatch):
+    hashes = {
+        "a": (0, 0),
+        "b": (0xFF, 0),  # pHash 相同，dHash 相差 8 位
+        "c": (0b1, 0b11),  # 两个哈希都接近 a
+        "d": (ALL_BITS, ALL_BITS),
+    }
+    monkeypatch.setattr(type(HashIndex()), "get_hashes", lambda self, paths: hashes)
+    assert DuplicateUtil.find_duplicates(list(hashes), max_distance=6) == [["a", "c"]]
+    assert DuplicateUtil.find_duplicates(list(hashes), max_distance=8) == [["a", "b", "c"]]
+
+
+@pytest.mark.parametrize("max_distance", [0, 6])
+def test_find_duplicates_identical_files(tmp_path, max_distance):
+    create_image(str(tmp_path / "a.png"), seed=3)
+    create_image(str(tmp_path / "b.png"), seed=3)
+    paths = [str(tmp_path / "a.png"), str(tmp_path / "b.png")]
+    assert DuplicateUtil.find_duplicates(paths, max_distance) == [paths]
@@ -0,0 +1,29 @@
+import cv2
+import numpy as np
+import pytest
+from PIL import Image
+
+from src.util.image_cache import ImageCache
+
+
+@pytest.mark.parametrize("orientation", range(1, 9))
+def test_decode_applies_exif_orientation_like_imread(tmp_path, orientation):
+    """带 EXIF 方向的 JPEG，缓存解码的结果与 cv2.imread 一致"""
+    path = str(tmp_path / f"orientation_{orientation}.jpg")
+    pixels = np.random.default_rng(orientation).integers(0, 255, (100, 200, 3), dtype=np.uint8)
+    exif = Image.Exif()
+    exif[0x0112] = orientation
+    Image.fromarray(pixels).save(path, exif=exif, quality=100)
+
+    expected = cv2.imread(path)
+    decoded = ImageCache.decode(path)
+    assert decoded.shape == expected.shape
+    assert np.abs(decoded.astype(np.int16) - expected.astype(np.int16)).max() <= 1
+
+
+def test_decode_keeps_alpha(tmp_path):
+    path = str(tmp_path / "alpha.png")
+    Image.new("RGBA", (30, 20), (10, 20, 30, 40)).save(path)
+    decoded = ImageCache.decode(path)
+    assert decoded.shape == (20, 30, 4)
+    assert tuple(decoded[0, 0]) == (30, 20, 10, 40)
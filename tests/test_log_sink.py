@@ -0,0 +1,33 @@
+from src.util.log_sink import LogSink
+
+
+def create_sink(max_lines):
+    # LogSink 是单例，测试用原始类创建独立的缓冲
+    return type(LogSink())(max_lines=max_lines)
+
+
+def test_drain_renders_backlog_over_several_calls():
+    sink = create_sink(10)
+    for i in range(7):
+        sink.write(f"line {i}\n")
+    first, dropped = sink.drain(3)
+    assert [text for _, text in first] == ["line 0", "line 1", "line 2"]
+    assert dropped == 0
+    second, dropped = sink.drain(3)
+    assert [text for _, text in second] == ["line 3", "line 4", "line 5"]
+    assert dropped == 0
+    third, dropped = sink.drain(3)
+    assert [text for _, text in third] == ["line 6"]
+    assert dropped == 0
+
+
+def test_drain_counts_only_records_pushed_out_of_the_ring():
+    sink = create_sink(4)
+    for i in range(6):
+        sink.write(f"line {i}\n")
+    items, dropped = sink.drain(2)
+    assert dropped == 2
+    assert [text for _, text in items] == ["line 2", "line 3"]
+    items, dropped = sink.drain(2)
+    assert dropped == 0
+    assert [text for _, text in items] == ["line 4", "line 5"]
@@ -0,0 +1,156 @@
+import os
+import struct
+
+import numpy as np
+import pytest
+from PIL import Image, ImageOps
+from PIL.PngImagePlugin import PngInfo
+
+from src.util.metadata_strip_util import MetadataStripUtil
+
+
+def png_chunk_types(data):
+    types = []
+    offset = 8
+    while offset < len(data):
+        length, chunk_type = struct.unpack_from(">I4s", data, offset)
+        types.append(chunk_type)
+        offset += 12 + length
+    return types
+
+
+def jpeg_markers(data):
+    """SOS 之前的段标记"""
+    markers = []
+    offset = 2
+    while data[offset + 1] != 0xDA:
+        marker = data[offset + 1]
+        markers.append(marker)
+        offset += 2 + struct.unpack_from(">H", data, offset + 2)[0]
+    return markers
+
+
+def scan_data(data):
+    return data[data.index(b"\xff\xda"):]
+
+
+@pytest.fixture
+def pixels():
+    # 随机像素压缩不了，编码后会分成多个 IDAT 块
+    return np.random.default_rng(0).integers(0, 256, size=(200, 300, 3), dtype=np.uint8)
+
+
+@pytest.fixture
+def png_path(tmp_path, pixels):
+    info = PngInfo()
+    info.add_text("Comment", "metadata")
+    info.add_itxt("Description", "描述")
+    path = str(tmp_path / "source.png")
+    Image.fromarray(pixels).save(path, pnginfo=info)
+    return path
+
+
+def save_jpeg(path, pixels, orientation=None):
+    exif = Image.Exif()
+    exif[0x0131] = "editor"  # Software
+    if orientation is not None:
+        exif[0x0112] = orientation
+    Image.fromarray(pixels).save(path, exif=exif, comment=b"comment", quality=90)
+
+
+def test_png_removes_ancillary_chunks_and_merges_idat(tmp_path, png_path, pixels):
+    with open(png_path, "rb") as file:
+        source_types = png_chunk_types(file.read())
+    assert source_types.count(b"IDAT") > 1
+
+    output_path = str(tmp_path / "output.png")
+    result = MetadataStripUtil.strip_file(png_path, output_path)
+    assert result["error"] is None
+    assert sorted(result["removed"]) == ["iTXt", "tEXt"]
+
+    with open(output_path, "rb") as file:
+        assert png_chunk_types(file.read()) == [b"IHDR", b"IDAT", b"IEND"]
+    with Image.open(output_path) as image:
+        assert np.array_equal(np.asarray(image), pixels)
+
+
+def test_png_crc_mismatch_fails_without_part_file(tmp_path, png_path):
+    with open(png_path, "rb") as file:
+        data = bytearray(file.read())
+    # 改动第一个 IDAT 块数据中的一个字节
+    offset = data.index(b"IDAT") + 4 + 100
+    data[offset] ^= 0xFF
+    corrupt_path = str(tmp_path / "corrupt.png")
+    with open(corrupt_path, "wb") as file:
+        file.write(data)
+
+    output_path = str(tmp_path / "output.png")
+    result = MetadataStripUtil.strip_file(corrupt_path, output_path)
+    assert "CRC" in result["error"]
+    assert not os.path.exists(output_path)
+    assert not os.path.exists(output_path + ".part")
+
+
+def test_jpeg_removes_segments_and_copies_scan_data(tmp_path, pixels):
+    source_path = str(tmp_path / "source.jpg")
+    save_jpeg(source_path, pixels)
+    output_path = str(tmp_path / "output.jpg")
+    result = MetadataStripUtil.strip_file(source_path, output_path)
+    assert result["error"] is None
+    assert sorted(result["removed"]) == ["APP1/Exif", "COM"]
+
+    with open(source_path, "rb") as file:
+        source = file.read()
+    with open(output_path, "rb") as file:
+        output = file.read()
+    assert 0xE1 in jpeg_markers(source) and 0xFE in jpeg_markers(source)
+    assert not {0xE1, 0xFE} & set(jpeg_markers(output))
+    assert scan_data(output) == scan_data(source)
+
+
+def test_jpeg_keeps_orientation_only(tmp_path, pixels):
+    source_path = str(tmp_path / "source.jpg")
+    save_jpeg(source_path, pixels, orientation=6)
+    output_path = str(tmp_path / "output.jpg")
+    result = MetadataStripUtil.strip_file(source_path, output_path)
+    assert result["error"] is None
+    assert "APP1/Exif（保留方向）" in result["removed"]
+
+    with open(source_path, "rb") as file:
+        source = file.read()
+    with open(output_path, "rb") as file:
+        output = file.read()
+    assert scan_data(output) == scan_data(source)
+    with Image.open(output_path) as image:
+        exif = image.getexif()
+        assert dict(exif) == {0x0112: 6}
+        assert ImageOps.exif_transpose(image).size == (200, 300)
+
+
+def test_orientation_segment_round_trips():
+    for orientation in range(1, 9):
+        segment = MetadataStripUtil.exif_orientation_segment(orientation)
+        assert MetadataStripUtil.read_exif_orientation(segment[4:]) == orientation
+    assert MetadataStripUtil.read_exif_orientation(b"Exif\x00\x00XX") is None
+
+
+@pytest.mark.parametrize("kind", ["png", "jpeg"])
+def test_truncated_input_fails_without_part_file(tmp_path, png_path, pixels, kind):
+    if kind == "png":
+        source_path = png_path
+    else:
+        source_path = str(tmp_path / "source.jpg")
+        save_jpeg(source_path, pixels)
+    with open(source_path, "rb") as file:
+        data = file.read()
+    # PNG 截断在 IDAT 中间，JPEG 截断在 SOS 之前的注释段中
+    end = len(data) // 2 if kind == "png" else data.index(b"\xff\xfe") + 6
+    truncated_path = str(tmp_path / f"truncated.{kind}")
+    with open(truncated_path, "wb") as file:
+        file.write(data[:end])
+
+    output_path = str(tmp_path / f"output.{kind}")
+    result = MetadataStripUtil.strip_file(truncated_path, output_path)
+    assert result["error"]
+    assert not os.path.exists(output_path)
+    assert not os.path.exists(output_path + ".part")
@@ -0,0 +1,118 @@
+import itertools
+import threading
+import time
+
+import pytest
+
+from src.util.pipeline_util import StageQueue, StagedPipeline, _END
+
+
+def test_items_keep_order_through_all_stages():
+    written = []
+    pipeline = StagedPipeline(lambda item: item * 2, lambda item: item + 1, written.append)
+    report = pipeline.run(range(50))
+    assert written == [item * 2 + 1 for item in range(50)]
+    assert set(report["stages"]) == {"read", "process", "write"}
+    for stats in report["stages"].values():
+        assert set(stats) == {"busy", "starved", "blocked", "utilization"}
+
+
+def test_bounded_queues_apply_back_pressure():
+    read_count = itertools.count()
+    released = threading.Event()
+    written = []
+
+    def read(item):
+        next(read_count)
+        return item
+
+    def write(item):
+        released.wait()
+        written.append(item)
+
+    pipeline = StagedPipeline(read, lambda item: item, write, read_ahead=2, write_behind=2)
+    runner = threading.Thread(target=pipeline.run, args=(range(100),))
+    runner.start()
+    time.sleep(0.3)
+    # 写入阻塞时，读取的数量不超过两个队列的容量加上各阶段手上的一项
+    in_flight = next(read_count)
+    assert in_flight <= 2 + 2 + 3
+    released.set()
+    runner.join(timeout=5)
+    assert not runner.is_alive()
+    assert written == list(range(100))
+    assert pipeline.waits["read"]["blocked"] > 0.1
+
+
+@pytest.mark.parametrize("stage", ["read", "process", "write"])
+def test_stage_error_stops_pipeline_and_is_raised(stage):
+    written = []
+
+    def step(name):
+        def run(item):
+            if name == stage and item == 3:
+                raise ValueError(f"{name} failed")
+            return item
+        return run
+
+    pipeline = StagedPipeline(step("read"), step("process"), lambda item: written.append(step("write")(item)))
+    with pytest.raises(ValueError, match=f"{stage} failed"):
+        pipeline.run(itertools.count())
+    assert pipeline.stop_event.is_set()
+    assert 3 not in written
+
+
+def test_stop_drains_an_endless_source():
+    written = []
+
+    def write(item):
+        written.append(item)
+        if len(written) == 5:
+            pipeline.stop()
+
+    pipeline = StagedPipeline(lambda item: item, lambda item: item, write)
+    runner = threading.Thread(target=pipeline.run, args=(itertools.count(),))
+    runner.start()
+    runner.join(timeout=5)
+    assert not runner.is_alive()
+    assert pipeline.error is None
+    assert written[:5] == list(range(5))
+
+
+def test_stop_keeps_first_error():
+    pipeline = StagedPipeline(None, None, None)
+    first = ValueError("first")
+    pipeline.stop(first)
+    pipeline.stop(ValueError("second"))
+    assert pipeline.error is first
+
+
+def test_wait_accounting_for_slow_process_stage():
+    delay = 0.02
+    count = 10
+
+    def process(item):
+        time.sleep(delay)
+        return item
+
+    pipeline = StagedPipeline(lambda item: item, process, lambda item: None, read_ahead=1, write_behind=1)
+    report = pipeline.run(range(count))
+    stages = report["stages"]
+    assert stages["process"]["busy"] >= count * delay * 0.9
+    # 处理是瓶颈：读取等待队列腾出空间，写入等待上游数据
+    assert stages["read"]["blocked"] >= count * delay * 0.5
+    assert stages["write"]["starved"] >= count * delay * 0.5
+    assert stages["write"]["busy"] < stages["process"]["busy"]
+    assert 0.5 < stages["process"]["utilization"] <= 1.0
+
+
+def test_stage_queue_gives_up_when_stopped():
+    stop_event = threading.Event()
+    stage_queue = StageQueue(1, stop_event)
+    assert stage_queue.put("item") < StageQueue.POLL_INTERVAL
+    assert stage_queue.get()[0] == "item"
+    stage_queue.put("item")
+    threading.Timer(0.2, stop_event.set).start()
+    # 队列已满，停止后放弃等待
+    assert stage_queue.put("blocked") >= 0.15
+    assert stage_queue.get()[0] is _END
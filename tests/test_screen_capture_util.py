@@ -0,0 +1,83 @@
+import pytest
+from PySide6.QtCore import QRect
+from PySide6.QtGui import QColor, QImage
+
+from src.util.screen_capture_util import ScreenCaptureUtil
+
+
+class FakeGrab:
+    def __init__(self, image):
+        self.image = image
+
+    def toImage(self):
+        return self.image
+
+
+class FakeScreen:
+    """按逻辑几何和像素比生成纯色截图的屏幕"""
+
+    def __init__(self, geometry, ratio, color):
+        self.rect = geometry
+        self.ratio = ratio
+        self.color = color
+
+    def geometry(self):
+        return self.rect
+
+    def devicePixelRatio(self):
+        return self.ratio
+
+    def grabWindow(self, _):
+        image = QImage(round(self.rect.width() * self.ratio), round(self.rect.height() * self.ratio),
+                       QImage.Format.Format_RGB32)
+        image.fill(QColor(self.color))
+        image.setDevicePixelRatio(self.ratio)
+        return FakeGrab(image)
+
+
+def color_at(image, x, y):
+    return image.pixelColor(x, y).name()
+
+
+@pytest.fixture
+def screens():
+    # 左侧副屏在主屏左边（x 为负）且低 10 个逻辑像素，像素比 1；主屏像素比 2
+    return [FakeScreen(QRect(-40, 10, 40, 30), 1, "#ff0000"),
+            FakeScreen(QRect(0, 0, 50, 40), 2, "#00ff00")]
+
+
+def test_virtual_geometry_covers_negative_origin(qapp, screens):
+    assert ScreenCaptureUtil.virtual_geometry(screens) == QRect(-40, 0, 90, 40)
+    assert ScreenCaptureUtil.device_pixel_ratio(screens) == 2
+
+
+def test_grab_virtual_desktop_stitches_screens(qapp, screens):
+    canvas = ScreenCaptureUtil.grab_virtual_desktop(screens)
+    assert (canvas.width(), canvas.height()) == (180, 80)
+    assert canvas.devicePixelRatio() == 2
+
+    # 副屏放大到像素比 2，落在画布左侧 (0, 20) - (80, 80)
+    assert color_at(canvas, 0, 20) == "#ff0000"
+    assert color_at(canvas, 79, 79) == "#ff0000"
+    # 主屏落在 (80, 0) - (180, 80)
+    assert color_at(canvas, 80, 0) == "#00ff00"
+    assert color_at(canvas, 179, 79) == "#00ff00"
+    # 副屏上方没有屏幕覆盖的区域为黑色
+    assert color_at(canvas, 0, 0) == "#000000"
+    assert color_at(canvas, 79, 19) == "#000000"
+
+
+def test_grab_virtual_desktop_with_gap_between_screens(qapp):
+    screens = [FakeScreen(QRect(0, 0, 20, 20), 1.5, "#0000ff"),
+               FakeScreen(QRect(30, 0, 20, 20), 1, "#ffffff")]
+    canvas = ScreenCaptureUtil.grab_virtual_desktop(screens)
+    assert (canvas.width(), canvas.height()) == (75, 30)
+    assert canvas.devicePixelRatio() == 1.5
+    assert color_at(canvas, 0, 0) == "#0000ff"
+    assert color_at(canvas, 29, 29) == "#0000ff"
+    # 两个屏幕之间 10 个逻辑像素的空隙
+    assert color_at(canvas, 30, 15) == "#000000"
+    assert color_at(canvas, 44, 15) == "#000000"
+    assert color_at(canvas, 45, 0) == "#ffffff"
+    assert color_at(canvas, 74, 29) == "#ffffff"
+    assert canvas.format() == QImage.Format.Format_RGB32
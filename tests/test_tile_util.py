@@ -0,0 +1,57 @@
+import os
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from src.const.fs_constants import FsConstants
+from src.util.tile_util import TileUtil
+
+# 远小于测试图片的预算，强制走内存映射路径
+MEMORY_BUDGET = 64
+
+
+def create_image(path, mode):
+    rng = np.random.default_rng(0)
+    channels = len(mode)
+    pixels = rng.integers(0, 256, size=(37, 53, channels), dtype=np.uint8)
+    Image.fromarray(pixels.squeeze(), mode).save(path)
+    return pixels
+
+
+@pytest.mark.parametrize("mode", ["RGB", "RGBA", "L"])
+def test_open_frame_decodes_into_mapped_buffer(tmp_path, external_path, mode):
+    path = str(tmp_path / "source.png")
+    pixels = create_image(path, mode)
+    with TileUtil.open_frame(path, MEMORY_BUDGET) as frame:
+        assert frame.mapped
+        assert np.array_equal(np.asarray(frame.image).reshape(pixels.shape), pixels)
+        # 像素必须真正写在映射缓冲里，而不是解码器另外分配的内存
+        stride = pixels.shape[1] * TileUtil.bytes_per_pixel(mode)
+        rows = np.asarray(frame.buffer).reshape(pixels.shape[0], stride)
+        stored = rows.reshape(pixels.shape[0], pixels.shape[1], -1)[:, :, :pixels.shape[2]]
+        assert np.array_equal(stored, pixels)
+        buffer_path = frame.buffer_path
+    assert os.path.dirname(buffer_path) == str(external_path / FsConstants.TILE_TEMP_DIR)
+    assert not os.path.exists(buffer_path)
+
+
+def test_new_frame_writes_through_to_buffer():
+    with TileUtil.new_frame((20, 10), "RGBA", MEMORY_BUDGET) as frame:
+        assert frame.mapped
+        frame.image.paste((1, 2, 3, 4), (0, 0, 20, 10))
+        array, channels = TileUtil.frame_to_array(frame)
+        assert channels == 4
+        assert (array == (1, 2, 3, 4)).all()
+
+
+def test_falls_back_to_memory_without_map_buffer(tmp_path, monkeypatch):
+    monkeypatch.delattr(Image.core, "map_buffer")
+    path = str(tmp_path / "source.png")
+    pixels = create_image(path, "RGB")
+    with TileUtil.open_frame(path, MEMORY_BUDGET) as frame:
+        assert not frame.mapped
+        assert np.array_equal(np.asarray(frame.image), pixels)
+    with TileUtil.new_frame((20, 10), "RGB", MEMORY_BUDGET) as frame:
+        assert not frame.mapped
+        assert frame.image.size == (20, 10)
@@ -0,0 +1,34 @@
+import os
+
+import pytest
+
+from src.util.watch_folder import WatchFolderService, WatchPipeline
+
+
+@pytest.fixture
+def config(tmp_path):
+    config = WatchPipeline.default_config()
+    config.update({"enabled": True, "input": str(tmp_path / "input"), "output": str(tmp_path / "output")})
+    config["strip"]["enabled"] = True
+    os.makedirs(config["input"])
+    return config
+
+
+def test_validate_requires_existing_input(config):
+    assert WatchPipeline.validate(config) is None
+    os.rmdir(config["input"])
+    assert WatchPipeline.validate(config) == "输入文件夹不存在！"
+
+
+def test_start_stays_stopped_when_input_is_gone(qapp, config):
+    service = WatchFolderService()
+    states = []
+    service.state_changed.connect(states.append)
+    os.rmdir(config["input"])
+    try:
+        assert not service.start(config)
+        assert not service.running
+        assert states == [False]
+    finally:
+        service.state_changed.disconnect(states.append)
+        service.stop()